@@ -1,9 +1,251 @@
-from flask import Flask, request, jsonify
-from scanner.nmap_scanner import run_nmap_scan
-from ml_model.vulnerability_predictor import predict_vulnerabilities
+import functools
+import math
+import os
+import threading
+import time
+import uuid
+
+from flask import Flask, Response, request, jsonify, stream_with_context, url_for
+from scanner.nmap_scanner import (
+    BATCH_CHUNK_SIZE, STREAM_CHUNK_SIZE, check_target, count_targets, iter_nmap_batch, iter_targets,
+    run_incremental_scan, run_nmap_batch, run_nmap_scan
+)
+from scanner.cache import cache_from_env, normalize_target
+from scanner.backends import default_backend
+from scanner.profiles import ProfileEngine, cache_arguments, cached_profile, check_profile
+from scanner.snapshots import SnapshotStore
+from ml_model.model_store import default_store
+from ml_model.vulnerability_predictor import assess_vulnerabilities, assess_vulnerabilities_batch
+from service.job_queue import JobQueue, QueueFull
+from service.rate_limit import RateLimiter
+from service.job_store import JobStore
+from service.history import QUERY_LIMIT, ScanHistory, parse_port, parse_time
+from service.metrics import STAGE_METRIC, default_metrics
+from service.serialization import (
+    COMPRESS_MIN_BYTES, StreamCompressor, compress, dumps, negotiate_encoding, parse_fields, shape_host, shape_result
+)
+
+SCAN_WORKERS = int(os.environ.get('AUTOPENML_SCAN_WORKERS', '4'))
+SCAN_QUEUE_SIZE = int(os.environ.get('AUTOPENML_SCAN_QUEUE_SIZE', '64'))
+JOB_RETENTION = int(os.environ.get('AUTOPENML_JOB_RETENTION', '3600'))
+MAX_BATCH_HOSTS = int(os.environ.get('AUTOPENML_MAX_BATCH_HOSTS', '4096'))
+MAX_STREAMS = int(os.environ.get('AUTOPENML_MAX_STREAMS', '4'))
+FULL_RESCAN_AFTER = float(os.environ.get('AUTOPENML_FULL_RESCAN_AFTER', '86400'))
+JOB_DB = os.environ.get('AUTOPENML_JOB_DB')
+# Identifies the client for rate limits and fair scheduling; falls back to the remote address.
+CLIENT_HEADER = os.environ.get('AUTOPENML_CLIENT_HEADER', 'X-API-Key')
 
 app = Flask(__name__)
 
+# The trained artifact is loaded once per process (see wsgi.py and __main__);
+# importing this module stays cheap so health checks answer right away.
+model_store = default_store()
+inference = None
+inference_lock = threading.Lock()
+
+def inference_model():
+    # Concurrent jobs share one predict_proba call per batching window.
+    global inference
+    if inference is None:
+        with inference_lock:
+            if inference is None:
+                from ml_model.batcher import BATCH_WINDOW_MS, InferenceBatcher
+                inference = InferenceBatcher(model_store.get) if BATCH_WINDOW_MS > 0 else False
+    return inference or model_store.get()
+
+scan_backend = default_backend()
+job_queue = JobQueue(
+    workers=SCAN_WORKERS, max_pending=SCAN_QUEUE_SIZE, retention=JOB_RETENTION,
+    on_start=scan_backend.assign, on_cancel=scan_backend.cancel, on_finish=scan_backend.release,
+    store=JobStore(JOB_DB) if JOB_DB else None
+)
+stream_slots = threading.BoundedSemaphore(MAX_STREAMS)
+scan_cache = cache_from_env()
+snapshots = SnapshotStore()
+history = ScanHistory()
+profiles = ProfileEngine(history)
+rate_limiter = RateLimiter()
+
+metrics = default_metrics()
+metrics.describe('autopenml_job_seconds', 'Run time of scan jobs, by kind and final status.')
+metrics.gauge('autopenml_queue_depth', lambda: job_queue.depth, 'Scan jobs waiting for a worker.')
+metrics.gauge('autopenml_jobs_running', lambda: job_queue.running, 'Scan jobs currently running.')
+metrics.gauge('autopenml_nmap_processes', lambda: scan_backend.active, 'nmap processes currently running.')
+metrics.gauge('autopenml_model_version', lambda: model_store.version, 'Loaded model artifact version.', 'max')
+metrics.gauge('autopenml_model_ready', lambda: int(model_store.ready), '1 once every worker has loaded the model.', 'min')
+metrics.counter('autopenml_cache_hits_total', lambda: scan_cache.hits, 'Scan cache lookups served from cache.')
+metrics.counter('autopenml_cache_misses_total', lambda: scan_cache.misses, 'Scan cache lookups that ran nmap.')
+metrics.counter('autopenml_rate_limited_total', lambda: rate_limiter.rejected,
+                'Requests refused because the client was over its rate limit.')
+metrics.counter('autopenml_inference_batches_total', lambda: inference.batches if inference else 0,
+                'predict_proba calls made by the inference batcher.')
+metrics.counter('autopenml_inference_rows_total', lambda: inference.rows if inference else 0,
+                'Rows predicted by the inference batcher.')
+
+def timed_job(kind):
+    # Queue wait per job, then its whole run time labelled with how it ended.
+    def decorate(func):
+        @functools.wraps(func)
+        def run(job):
+            metrics.observe(STAGE_METRIC, max(0.0, job.started_at - job.created_at), stage='queue')
+            start = time.perf_counter()
+            status = 'failed'
+            try:
+                result = func(job)
+                status = 'finished'
+                return result
+            finally:
+                metrics.observe('autopenml_job_seconds', time.perf_counter() - start, kind=kind, status=status)
+        return run
+    return decorate
+
+def record_history(results, arguments, job_id=None):
+    # History is best effort: a write failure must not fail the scan itself.
+    try:
+        with metrics.stage('history'):
+            history.record(results, arguments=arguments, model_version=model_store.version, job_id=job_id)
+    except Exception:
+        app.logger.exception('Failed to record scan history')
+
+def response_shape():
+    # ?compact=1 and ?fields=a,b apply to job results and streamed hosts alike.
+    compact = request.args.get('compact', '').lower() in ('1', 'true', 'yes')
+    return compact, parse_fields(request.args.get('fields'), compact)
+
+def send_json(payload, status=200):
+    # Large bodies are compressed when the client accepts it; small ones aren't worth the CPU.
+    body = dumps(payload)
+    encoding = None
+    if len(body) >= COMPRESS_MIN_BYTES:
+        encoding = negotiate_encoding(request.headers.get('Accept-Encoding'))
+    response = Response(compress(body, encoding), status=status, mimetype='application/json')
+    response.vary.add('Accept-Encoding')
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    return response
+
+def host_key(target_ip, scan_data):
+    addresses = scan_data.get('addresses') or {}
+    return addresses.get('ipv4') or addresses.get('ipv6') or normalize_target(target_ip)
+
+@timed_job('scan')
+def run_scan_job(job):
+    target_ip = job.params['target_ip']
+    requested = job.params['profile']
+    chosen = []
+
+    def scan(target, _):
+        # The profile is only resolved on a miss; the cache is keyed by the requested one.
+        chosen.append(profiles.choose(normalize_target(target), requested))
+        return run_nmap_scan(target, chosen[0].arguments, scan_id=job.id)
+
+    scan_data, cached = scan_cache.get_or_scan(
+        target_ip, cache_arguments(requested), scan, force_refresh=job.params['force_refresh']
+    )
+    profile = chosen[0] if chosen else cached_profile(requested)
+    predictions, port_risks = assess_vulnerabilities(scan_data, inference_model(), job.params['explain'])
+    if not cached:
+        record_history({host_key(target_ip, scan_data): (scan_data, predictions)}, profile.arguments, job.id)
+    return {
+        'target': target_ip,
+        'scan_data': scan_data,
+        'vulnerability_predictions': predictions,
+        'port_risks': port_risks,
+        'cached': cached,
+        'profile': profile.to_dict(),
+        'model_version': model_store.version
+    }
+
+@timed_job('incremental')
+def run_incremental_job(job):
+    target_ip = job.params['target_ip']
+    host = normalize_target(target_ip)
+    snapshot = snapshots.get(host)
+    previous, full = None, False
+    if snapshot is not None:
+        scanned_at, previous = snapshot
+        full = job.params['force_refresh'] or time.time() - scanned_at > FULL_RESCAN_AFTER
+    scan_data, diff = run_incremental_scan(target_ip, previous, full=full, scan_id=job.id)
+    snapshots.set(host, scan_data)
+    predictions, port_risks = assess_vulnerabilities(scan_data, inference_model(), job.params['explain'])
+    record_history({host_key(target_ip, scan_data): (scan_data, predictions)}, 'incremental', job.id)
+    return {
+        'target': target_ip,
+        'scan_data': scan_data,
+        'diff': diff,
+        'vulnerability_predictions': predictions,
+        'port_risks': port_risks,
+        'model_version': model_store.version
+    }
+
+@timed_job('batch')
+def run_batch_job(job):
+    cache_key = cache_arguments(job.params['profile'])
+    arguments = profiles.arguments_for(job.params['profile'])
+    scan_results = {}
+    missing = []
+    for host in iter_targets(job.params['targets']):
+        scan_data = None if job.params['force_refresh'] else scan_cache.get(host, cache_key)
+        if scan_data is None:
+            missing.append(host)
+        else:
+            scan_results[host] = scan_data
+    cached_hosts = set(scan_results)
+
+    if missing:
+        fresh = run_nmap_batch(missing, chunk_size=job.params['chunk_size'], arguments=arguments, scan_id=job.id)
+        for host, scan_data in fresh.items():
+            scan_cache.set(host, cache_key, scan_data)
+        scan_results.update(fresh)
+
+    assessed = assess_vulnerabilities_batch(scan_results, inference_model(), job.params['explain'])
+    # Results are keyed by requested target, so arguments() returns what ran; history
+    # rows use the scanned address, as single scans do.
+    fresh_hosts = [host for host in scan_results if host not in cached_hosts]
+    record_history(
+        {host_key(host, scan_results[host]): (scan_results[host], assessed[host][0]) for host in fresh_hosts},
+        {host_key(host, scan_results[host]): arguments(host) for host in fresh_hosts}, job.id
+    )
+    return {
+        'targets': job.params['targets'],
+        'hosts': {
+            host: {
+                'scan_data': scan_data,
+                'vulnerability_predictions': assessed[host][0],
+                'port_risks': assessed[host][1],
+                'cached': host in cached_hosts
+            }
+            for host, scan_data in scan_results.items()
+        },
+        'profile': job.params['profile'],
+        'model_version': model_store.version
+    }
+
+def client_id():
+    return request.headers.get(CLIENT_HEADER) or request.remote_addr or 'anonymous'
+
+def rate_limit(client, cost):
+    # A 429 response when the client is out of tokens, else None.
+    allowed, retry_after = rate_limiter.take(client, cost)
+    if allowed:
+        return None
+    retry_after = math.ceil(retry_after)
+    return jsonify({'error': f'Rate limit exceeded; retry in {retry_after}s'}), 429, {'Retry-After': str(retry_after)}
+
+def enqueue(func, params, cost=1):
+    client = client_id()
+    limited = rate_limit(client, cost)
+    if limited:
+        return limited
+    try:
+        job = job_queue.submit(func, params, client=client, cost=cost)
+    except QueueFull as e:
+        # Nothing was queued, so the client keeps its tokens.
+        rate_limiter.refund(client, cost)
+        return jsonify({'error': str(e)}), 429, {'Retry-After': '5'}
+    status_url = url_for('scan_status', job_id=job.id)
+    return jsonify({'job_id': job.id, 'status': job.status, 'status_url': status_url}), 202, {'Location': status_url}
+
 @app.route('/scan', methods=['POST'])
 def scan():
     data = request.get_json()
@@ -11,14 +253,182 @@ def scan():
     if not target_ip:
         return jsonify({'error': 'Missing target_ip'}), 400
 
-    scan_data = run_nmap_scan(target_ip)
-    predictions = predict_vulnerabilities(scan_data)
+    try:
+        check_target(target_ip)
+        check_profile(data.get('profile'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    params = {
+        'target_ip': target_ip,
+        'force_refresh': bool(data.get('force_refresh')),
+        'explain': bool(data.get('explain')),
+        'profile': data.get('profile')
+    }
+    if data.get('incremental'):
+        return enqueue(run_incremental_job, params)
+    return enqueue(run_scan_job, params)
+
+def parse_batch_request(data, default_chunk_size):
+    targets = data.get('targets')
+    if isinstance(targets, str):
+        targets = [targets]
+    if not targets or not all(isinstance(target, str) for target in targets):
+        return None, (jsonify({'error': 'Missing targets'}), 400)
+    chunk_size = data.get('chunk_size', default_chunk_size)
+    if not isinstance(chunk_size, int) or chunk_size < 1:
+        return None, (jsonify({'error': 'chunk_size must be a positive integer'}), 400)
+
+    try:
+        host_count = count_targets(targets)
+        check_profile(data.get('profile'))
+    except ValueError as e:
+        return None, (jsonify({'error': str(e)}), 400)
+    if host_count > MAX_BATCH_HOSTS:
+        return None, (jsonify({'error': f'Batch expands to {host_count} hosts (limit {MAX_BATCH_HOSTS})'}), 400)
+    return {
+        'targets': targets,
+        'chunk_size': chunk_size,
+        'force_refresh': bool(data.get('force_refresh')),
+        'explain': bool(data.get('explain')),
+        'profile': data.get('profile'),
+        'host_count': host_count
+    }, None
+
+@app.route('/scan/batch', methods=['POST'])
+def scan_batch():
+    params, error = parse_batch_request(request.get_json(), BATCH_CHUNK_SIZE)
+    if error:
+        return error
+
+    return enqueue(run_batch_job, params, cost=params['host_count'])
+
+@app.route('/scan/stream', methods=['POST'])
+def scan_stream():
+    params, error = parse_batch_request(request.get_json(), STREAM_CHUNK_SIZE)
+    if error:
+        return error
+    try:
+        compact, fields = response_shape()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if not stream_slots.acquire(blocking=False):
+        return jsonify({'error': f'Too many open scan streams (limit {MAX_STREAMS})'}), 429, {'Retry-After': '5'}
+    client = client_id()
+    limited = rate_limit(client, params['host_count'])
+    if limited:
+        stream_slots.release()
+        return limited
+
+    sse = 'text/event-stream' in request.headers.get('Accept', '') or request.args.get('format') == 'sse'
+    compressor = StreamCompressor(negotiate_encoding(request.headers.get('Accept-Encoding')))
+    model = inference_model()
+    scan_id = uuid.uuid4().hex
+    scan_backend.assign(scan_id, client)
+
+    def encode(record, event='host'):
+        with metrics.stage('serialize'):
+            line = dumps(record)
+            return compressor.compress(b'event: %s\ndata: %s\n\n' % (event.encode(), line) if sse else line + b'\n')
 
+    def generate():
+        hosts = 0
+        pending_history = {}
+        arguments = profiles.arguments_for(params['profile'])
+        results = iter_nmap_batch(params['targets'], chunk_size=params['chunk_size'], arguments=arguments, scan_id=scan_id)
+        try:
+            for host, scan_data in results:
+                hosts += 1
+                predictions, port_risks = assess_vulnerabilities(scan_data, model, params['explain'])
+                pending_history[host] = (scan_data, predictions)
+                if len(pending_history) >= params['chunk_size']:
+                    record_history(pending_history, {host: arguments(host) for host in pending_history})
+                    pending_history = {}
+                yield encode(shape_host({
+                    'host': host,
+                    'scan_data': scan_data,
+                    'vulnerability_predictions': predictions,
+                    'port_risks': port_risks
+                }, compact, fields))
+            yield encode({'done': True, 'hosts': hosts, 'model_version': model_store.version}, 'done')
+            yield compressor.finish()
+        finally:
+            # A client that disconnects mid-stream stops the remaining nmap work.
+            scan_backend.cancel(scan_id)
+            results.close()
+            if pending_history:
+                record_history(pending_history, {host: arguments(host) for host in pending_history})
+
+    def close():
+        scan_backend.release(scan_id)
+        stream_slots.release()
+
+    mimetype = 'text/event-stream' if sse else 'application/x-ndjson'
+    response = Response(stream_with_context(generate()), mimetype=mimetype, headers={'X-Accel-Buffering': 'no'})
+    response.vary.add('Accept-Encoding')
+    if compressor.encoding:
+        response.headers['Content-Encoding'] = compressor.encoding
+    response.call_on_close(close)
+    return response
+
+@app.route('/scan/<job_id>', methods=['GET'])
+def scan_status(job_id):
+    try:
+        compact, fields = response_shape()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    job = job_queue.status(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown job_id'}), 404
+    with metrics.stage('serialize'):
+        if 'result' in job:
+            job['result'] = shape_result(job['result'], compact, fields)
+        return send_json(job)
+
+@app.route('/scan/<job_id>', methods=['DELETE'])
+def scan_cancel(job_id):
+    job = job_queue.cancel(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown job_id'}), 404
+    if job['status'] in ('finished', 'failed'):
+        return jsonify({'error': f"Job already {job['status']}"}), 409
+    return jsonify(job)
+
+@app.route('/history', methods=['GET'])
+def scan_history():
+    args = request.args
+    try:
+        port = parse_port(args.get('port'))
+        since = parse_time(args.get('since'))
+        until = parse_time(args.get('until'))
+        limit = int(args.get('limit', QUERY_LIMIT))
+    except ValueError as e:
+        return jsonify({'error': f'Invalid query: {e}'}), 400
+
+    start = time.perf_counter()
+    rows = history.query(
+        host=args.get('host'), port=port, service=args.get('service'), protocol=args.get('protocol'),
+        state=args.get('state'), since=since, until=until, distinct_hosts=args.get('distinct') == 'host',
+        limit=limit
+    )
+    return send_json({'count': len(rows), 'results': rows, 'query_ms': (time.perf_counter() - start) * 1000})
+
+@app.route('/health', methods=['GET'])
+def health():
     return jsonify({
-        'target': target_ip,
-        'scan_data': scan_data,
-        'vulnerability_predictions': predictions
+        'status': 'ok',
+        'model_ready': model_store.ready,
+        'model_version': model_store.version
     })
 
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/cache/stats', methods=['GET'])
+def cache_stats():
+    return jsonify(scan_cache.stats())
+
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5000)
\ No newline at end of file
+    model_store.preload_async()
+    app.run(host='0.0.0.0', port=5000, threaded=True)
@@ -0,0 +1,66 @@
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ml_model.batcher import InferenceBatcher  # noqa: E402
+from ml_model.model_store import ModelStore  # noqa: E402
+from ml_model.synthetic import generate_scan_result  # noqa: E402
+from ml_model.train import train_and_save  # noqa: E402
+from ml_model.vulnerability_predictor import predict_vulnerabilities  # noqa: E402
+
+
+def drive(model, scans, threads, per_thread):
+    barrier = threading.Barrier(threads + 1)
+
+    def worker(offset):
+        barrier.wait()
+        for i in range(per_thread):
+            predict_vulnerabilities(scans[(offset + i) % len(scans)], model)
+
+    pool = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for thread in pool:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in pool:
+        thread.join()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare per-request predict against micro-batched inference.')
+    parser.add_argument('--threads', type=int, default=32)
+    parser.add_argument('--requests', type=int, default=50, help='predictions per thread')
+    parser.add_argument('--window-ms', type=float, default=2)
+    parser.add_argument('--max-rows', type=int, default=4096)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    scans = [generate_scan_result(rng, int(rng.integers(1, 6))) for _ in range(256)]
+    total = args.threads * args.requests
+    with tempfile.TemporaryDirectory() as artifact_dir:
+        train_and_save(artifact_dir)
+        store = ModelStore(artifact_dir)
+        model = store.get()
+        batcher = InferenceBatcher(store.get, window_ms=args.window_ms, max_rows=args.max_rows)
+        predict_vulnerabilities(scans[0], model)
+        predict_vulnerabilities(scans[0], batcher)
+
+        direct = drive(model, scans, args.threads, args.requests)
+        batched = drive(batcher, scans, args.threads, args.requests)
+
+    print(f'{args.threads} threads x {args.requests} predictions')
+    print(f'direct   {direct:7.2f}s  {direct / total * 1000:7.3f}ms/prediction')
+    print(f'batched  {batched:7.2f}s  {batched / total * 1000:7.3f}ms/prediction  '
+          f'({batcher.batches} predict_proba calls, {batcher.rows / max(1, batcher.batches):.1f} rows each)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from service.history import ScanHistory  # noqa: E402
+
+PORTS = np.array([21, 22, 23, 25, 53, 80, 110, 139, 143, 443, 445, 3306, 3389, 5432, 5900, 8080])
+SERVICES = ['ftp', 'ssh', 'telnet', 'smtp', 'domain', 'http', 'pop3', 'netbios-ssn', 'imap', 'https',
+            'microsoft-ds', 'mysql', 'ms-wbt-server', 'postgresql', 'vnc', 'http-proxy']
+
+
+def fill(history, rows, days, seed=0):
+    """Insert roughly `rows` port rows spread over the last `days` days, in bulk batches."""
+    rng = np.random.default_rng(seed)
+    now = time.time()
+    written = 0
+    while written < rows:
+        batch = {}
+        for _ in range(500):
+            host = f'10.{rng.integers(256)}.{rng.integers(256)}.{rng.integers(1, 255)}'
+            picks = rng.choice(len(PORTS), size=rng.integers(1, 8), replace=False)
+            tcp = {int(PORTS[i]): {'state': 'open', 'name': SERVICES[i], 'product': '', 'version': ''} for i in picks}
+            batch[host] = ({'status': {'state': 'up'}, 'tcp': tcp}, rng.integers(0, 2, len(tcp)).tolist())
+            written += len(tcp)
+        history.record(batch, scanned_at=now - rng.uniform(0, days * 86400))
+    return written
+
+
+def timed(label, fn, repeat=5):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    print(f'{label:<48} {min(samples):8.2f}ms  ({len(result)} rows)')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Fill a scan history store and time indexed queries.')
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--days', type=int, default=60)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        history = ScanHistory(os.path.join(tmp, 'history.sqlite3'))
+        start = time.perf_counter()
+        written = fill(history, args.rows, args.days)
+        print(f'wrote {written} port rows in {time.perf_counter() - start:.1f}s')
+
+        week_ago = int(time.time() - 7 * 86400)
+        timed('hosts exposing 3389 in the last week', lambda: history.query(
+            port=3389, since=week_ago, distinct_hosts=True, limit=10000))
+        timed('port rows for one host', lambda: history.query(host='10.1.2.3'))
+        timed('telnet rows in the last week', lambda: history.query(service='telnet', since=week_ago))
+        timed('latest 1000 rows', lambda: history.query())
+
+
+if __name__ == '__main__':
+    main()
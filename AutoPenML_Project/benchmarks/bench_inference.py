@@ -0,0 +1,64 @@
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ml_model.model_store import ModelStore  # noqa: E402
+from ml_model.train import train_and_save  # noqa: E402
+from ml_model.vulnerability_predictor import predict_vulnerabilities  # noqa: E402
+
+
+def legacy_predict(scan_data):
+    # The old per-request path: build and fit a fresh forest on every call.
+    from sklearn.ensemble import RandomForestClassifier
+    ports = list(scan_data.get('tcp', {}).keys())
+    model = RandomForestClassifier()
+    model.fit([[0], [1]], [0, 1])
+    return model.predict([[port % 2] for port in ports]).tolist()
+
+
+def sample_scan(n_ports):
+    return {'tcp': {port: {'state': 'open', 'name': ''} for port in range(1, n_ports + 1)}}
+
+
+def timeit(fn, scan_data, requests):
+    samples = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        fn(scan_data)
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def report(name, samples):
+    samples = sorted(samples)
+    p95 = samples[int(len(samples) * 0.95) - 1]
+    print(f'{name:<12} mean={statistics.mean(samples):8.3f}ms  p50={statistics.median(samples):8.3f}ms  p95={p95:8.3f}ms')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare per-request fit against a preloaded model artifact.')
+    parser.add_argument('--requests', type=int, default=50)
+    parser.add_argument('--ports', type=int, default=100)
+    args = parser.parse_args()
+
+    scan_data = sample_scan(args.ports)
+    with tempfile.TemporaryDirectory() as artifact_dir:
+        train_and_save(artifact_dir)
+        store = ModelStore(artifact_dir)
+        store.load()
+        preloaded = timeit(lambda data: predict_vulnerabilities(data, store.get()), scan_data, args.requests)
+    legacy = timeit(legacy_predict, scan_data, args.requests)
+
+    print(f'{args.requests} requests, {args.ports} ports each')
+    report('fit/request', legacy)
+    report('preloaded', preloaded)
+    print(f'speedup: {statistics.mean(legacy) / statistics.mean(preloaded):.1f}x')
+
+
+if __name__ == '__main__':
+    main()
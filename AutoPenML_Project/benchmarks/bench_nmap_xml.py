@@ -0,0 +1,100 @@
+import argparse
+import ipaddress
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+import xml.etree.ElementTree as ET
+from xml.sax.saxutils import quoteattr
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ml_model.synthetic import generate_scan_result  # noqa: E402
+from scanner.nmap_xml import iter_nmap_xml, parse_host  # noqa: E402
+
+
+def host_xml(address, scan_result):
+    ports = []
+    for port, info in scan_result['tcp'].items():
+        service = ' '.join(f'{field}={quoteattr(info[field])}' for field in ('name', 'product', 'version', 'conf'))
+        ports.append(
+            f'<port protocol="tcp" portid="{port}"><state state={quoteattr(info["state"])} reason="syn-ack"/>'
+            f'<service {service}><cpe>{info["cpe"]}</cpe></service></port>'
+        )
+    return (
+        f'<host><status state="up" reason="syn-ack"/><address addr="{address}" addrtype="ipv4"/>'
+        f'<hostnames/><ports><extraports state="closed" count="{100 - len(ports)}"/>{"".join(ports)}</ports></host>\n'
+    )
+
+
+def write_sweep(path, network, ports_per_host, seed):
+    """Write an nmap -oX document for every host of `network`, like a -F sweep would."""
+    rng = np.random.default_rng(seed)
+    hosts = 0
+    with open(path, 'w') as f:
+        f.write('<?xml version="1.0"?>\n<nmaprun scanner="nmap" args="nmap -T4 -F" version="7.94">\n')
+        for address in ipaddress.ip_network(network).hosts():
+            scan_result = generate_scan_result(rng, max(1, int(rng.poisson(ports_per_host))), with_os=False)
+            f.write(host_xml(address, scan_result))
+            hosts += 1
+        f.write(f'<runstats><hosts up="{hosts}" down="0" total="{hosts}"/></runstats>\n</nmaprun>\n')
+    return hosts
+
+
+def buffered(path):
+    # The old path: read all of nmap's output, build a tree, then a dict per host.
+    with open(path, 'rb') as f:
+        dom = ET.fromstring(f.read())
+    return sum(len(scan_result['tcp']) for _, scan_result in map(parse_host, dom.findall('host')))
+
+
+def streaming(path):
+    with open(path, 'rb') as f:
+        return sum(len(record) for record in iter_nmap_xml(f))
+
+
+def measure(fn, path):
+    start = time.perf_counter()
+    ports = fn(path)
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    fn(path)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return ports, elapsed, peak
+
+
+def retained(path, compact):
+    """Memory held by keeping every host's result, as dicts or HostRecords."""
+    tracemalloc.start()
+    with open(path, 'rb') as f:
+        kept = [record if compact else record.to_scan_result() for record in iter_nmap_xml(f)]
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return len(kept), size
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Peak memory of buffered vs streaming nmap XML parsing.')
+    parser.add_argument('--network', default='10.0.0.0/16')
+    parser.add_argument('--ports', type=float, default=6.0, help='mean open ports per host')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        path = os.path.join(workdir, 'sweep.xml')
+        hosts = write_sweep(path, args.network, args.ports, args.seed)
+        print(f'{hosts} hosts, {os.path.getsize(path) / 2 ** 20:.1f}MB of XML')
+        for name, fn in (('buffered', buffered), ('streaming', streaming)):
+            ports, elapsed, peak = measure(fn, path)
+            print(f'{name:<10} {elapsed:6.2f}s  peak {peak / 2 ** 20:8.1f}MB  ({ports} ports)')
+        for name, compact in (('dicts', False), ('records', True)):
+            count, size = retained(path, compact)
+            print(f'holding {count} hosts as {name:<8} {size / 2 ** 20:8.1f}MB')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+import argparse
+import gzip
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ml_model.synthetic import generate_scan_result  # noqa: E402
+from service import serialization  # noqa: E402
+from service.serialization import BROTLI_QUALITY, GZIP_LEVEL, dumps, shape_result  # noqa: E402
+
+
+def big_host(rng, ports, script_bytes):
+    """A job result for one host with `ports` ports, each carrying NSE script output."""
+    scan_data = generate_scan_result(rng, 1)
+    template = next(iter(scan_data['tcp'].values()))
+    scan_data['tcp'] = {}
+    for port in range(1, ports + 1):
+        info = dict(template)
+        info['script'] = {'banner': 'x' * script_bytes, 'ssl-cert': f'Subject: commonName=host-{port}.example'}
+        scan_data['tcp'][port] = info
+    port_risks = [
+        {'protocol': 'tcp', 'port': port, 'risk': round(float(rng.random()), 4), 'label': int(rng.random() > 0.8)}
+        for port in scan_data['tcp']
+    ]
+    return {
+        'target': '10.0.0.1',
+        'scan_data': scan_data,
+        'vulnerability_predictions': [risk['label'] for risk in port_risks],
+        'port_risks': port_risks,
+        'cached': False,
+        'model_version': 1
+    }
+
+
+def flask_dumps(obj):
+    # What jsonify did: the stdlib encoder with sorted keys.
+    return json.dumps(obj, sort_keys=True).encode()
+
+
+def timed(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        value = fn()
+    return value, (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Payload size and encode time of verbose vs compact scan results.')
+    parser.add_argument('--ports', type=int, default=1000)
+    parser.add_argument('--script-bytes', type=int, default=64)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    result = big_host(np.random.default_rng(args.seed), args.ports, args.script_bytes)
+    variants = (
+        ('jsonify verbose', lambda: flask_dumps(result)),
+        ('dumps verbose', lambda: dumps(result)),
+        ('dumps compact', lambda: dumps(shape_result(result, compact=True))),
+        ('dumps compact ports', lambda: dumps(shape_result(result, compact=True, fields=('ports',)))),
+    )
+    print(f"{args.ports} ports, orjson {'on' if serialization.orjson else 'off'}, "
+          f"brotli {'on' if serialization.brotli else 'off'}")
+    print(f"{'':<22}{'encode':>10}{'bytes':>10}{'gzip':>10}{'gzip ms':>8}{'br':>10}{'br ms':>8}")
+    for name, fn in variants:
+        body, encode_ms = timed(fn, args.repeat)
+        gz, gzip_ms = timed(lambda: gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0), args.repeat)
+        row = f'{name:<22}{encode_ms:8.2f}ms{len(body):>10}{len(gz):>10}{gzip_ms:8.2f}'
+        if serialization.brotli:
+            br, br_ms = timed(lambda: serialization.brotli.compress(body, quality=BROTLI_QUALITY), args.repeat)
+            row += f'{len(br):>10}{br_ms:8.2f}'
+        print(row)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def import_times(module, top):
+    # -X importtime writes "import time: self | cumulative | name" lines to stderr.
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line.split(':', 1)[1].split('|')
+        rows.append((int(cumulative_us), int(self_us), name.strip()))
+    total = next((row[0] for row in rows if row[2] == module), 0)
+    packages = sorted((row for row in rows if '.' not in row[2]), reverse=True)
+    return total, packages[:top]
+
+
+def wait_for(url, predicate, timeout):
+    start = time.perf_counter()
+    while time.perf_counter() - start < timeout:
+        try:
+            with urllib.request.urlopen(url, timeout=1) as response:
+                body = json.loads(response.read())
+            if predicate(body):
+                return time.perf_counter() - start
+        except OSError:
+            pass
+        time.sleep(0.02)
+    raise TimeoutError(url)
+
+
+def serve_times(port, model_dir, timeout):
+    env = dict(os.environ, PORT=str(port), AUTOPENML_MODEL_DIR=model_dir,
+               AUTOPENML_MODEL_PRELOAD='background', WEB_CONCURRENCY='1')
+    with tempfile.TemporaryDirectory() as workdir:
+        env.setdefault('AUTOPENML_JOB_DB', os.path.join(workdir, 'jobs.sqlite3'))
+        for name in ('HISTORY', 'CACHE', 'SNAPSHOT'):
+            env.setdefault(f'AUTOPENML_{name}_PATH', os.path.join(workdir, f'{name.lower()}.sqlite3'))
+        start = time.perf_counter()
+        proc = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'wsgi:app'],
+            cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        try:
+            url = f'http://127.0.0.1:{port}/health'
+            wait_for(url, lambda body: True, timeout)
+            first = time.perf_counter() - start
+            wait_for(url, lambda body: body.get('model_ready'), timeout)
+            ready = time.perf_counter() - start
+        finally:
+            proc.terminate()
+            proc.wait()
+    return first, ready
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure import cost and time to first /health.')
+    parser.add_argument('--module', default='api')
+    parser.add_argument('--top', type=int, default=10)
+    parser.add_argument('--serve', action='store_true', help='also start gunicorn and time /health')
+    parser.add_argument('--port', type=int, default=5055)
+    parser.add_argument('--timeout', type=float, default=120)
+    args = parser.parse_args()
+
+    total, rows = import_times(args.module, args.top)
+    print(f'import {args.module}: {total / 1000:.1f}ms')
+    for cumulative, self_us, name in rows:
+        print(f'  {name:<24} {cumulative / 1000:8.1f}ms')
+
+    if args.serve:
+        with tempfile.TemporaryDirectory() as model_dir:
+            subprocess.run([sys.executable, '-m', 'ml_model.train', '--artifact-dir', model_dir],
+                           cwd=ROOT, check=True, stdout=subprocess.DEVNULL)
+            first, ready = serve_times(args.port, model_dir, args.timeout)
+        print(f'first /health  {first:6.2f}s')
+        print(f'model ready    {ready:6.2f}s')
+
+
+if __name__ == '__main__':
+    main()
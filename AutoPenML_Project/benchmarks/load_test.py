@@ -0,0 +1,120 @@
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class HTTPClient:
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+
+    def request(self, method, path, body=None):
+        data = json.dumps(body).encode() if body is not None else None
+        req = urllib.request.Request(
+            self.base_url + path, data=data, method=method, headers={'Content-Type': 'application/json'}
+        )
+        try:
+            with urllib.request.urlopen(req, timeout=60) as resp:
+                return resp.status, json.loads(resp.read() or b'null')
+        except urllib.error.HTTPError as e:
+            return e.code, json.loads(e.read() or b'null')
+
+
+class InProcessClient:
+    """Drive the Flask app directly; pair with AUTOPENML_SCAN_BACKEND=synthetic."""
+
+    def __init__(self):
+        import api
+        self.client = api.app.test_client()
+
+    def request(self, method, path, body=None):
+        resp = self.client.open(path, method=method, json=body)
+        return resp.status_code, resp.get_json()
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return float('nan')
+    index = min(len(sorted_values) - 1, max(0, int(round(q / 100 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def run_one(client, target, force_refresh, poll_interval, results, lock):
+    start = time.perf_counter()
+    status, body = client.request('POST', '/scan', {'target_ip': target, 'force_refresh': force_refresh})
+    if status == 429:
+        outcome = 'rejected'
+    elif status != 202:
+        outcome = 'error'
+    else:
+        status_url = body['status_url']
+        while True:
+            status, body = client.request('GET', status_url)
+            if status != 200 or body['status'] in ('finished', 'failed', 'cancelled'):
+                break
+            time.sleep(poll_interval)
+        outcome = body['status'] if status == 200 else 'error'
+    with lock:
+        results.append((outcome, time.perf_counter() - start))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Drive POST /scan at a target rate and report latency percentiles.')
+    parser.add_argument('--url', help='base URL of a running server; omit to drive the app in-process')
+    parser.add_argument('--rps', type=float, default=20)
+    parser.add_argument('--duration', type=float, default=10, help='seconds of load')
+    parser.add_argument('--concurrency', type=int, default=64, help='max outstanding client requests')
+    parser.add_argument('--network', default='10.0.0.0/16', help='targets are drawn from this network')
+    parser.add_argument('--force-refresh', action='store_true', help='bypass the scan cache')
+    parser.add_argument('--poll-interval', type=float, default=0.05)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    if args.url:
+        client = HTTPClient(args.url)
+    else:
+        os.environ.setdefault('AUTOPENML_SCAN_BACKEND', 'synthetic')
+        client = InProcessClient()
+
+    import ipaddress
+    network = ipaddress.ip_network(args.network)
+    rng = random.Random(args.seed)
+    results = []
+    lock = threading.Lock()
+    total = int(args.rps * args.duration)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        for i in range(total):
+            # Open-loop arrivals: requests go out on schedule even when the server lags.
+            delay = started + i / args.rps - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            target = str(network[rng.randrange(1, network.num_addresses - 1)])
+            pool.submit(run_one, client, target, args.force_refresh, args.poll_interval, results, lock)
+    elapsed = time.perf_counter() - started
+
+    # Failed jobs (e.g. hosts that were down) still cost a full scan, so they count toward latency.
+    latencies = sorted(latency * 1000 for outcome, latency in results if outcome in ('finished', 'failed'))
+    counts = {
+        outcome: sum(1 for o, _ in results if o == outcome)
+        for outcome in ('finished', 'failed', 'rejected', 'error')
+    }
+    print(f'target {args.rps:.1f} req/s for {args.duration:.0f}s -> {total} requests in {elapsed:.1f}s')
+    print(f"finished={counts['finished']} failed={counts['failed']} rejected(429)={counts['rejected']} "
+          f"errors={counts['error']}")
+    print(f"throughput {(counts['finished'] + counts['failed']) / elapsed:.1f} scans/s")
+    print(f'latency ms  p50={percentile(latencies, 50):.1f}  p95={percentile(latencies, 95):.1f}  '
+          f'p99={percentile(latencies, 99):.1f}')
+
+
+if __name__ == '__main__':
+    main()
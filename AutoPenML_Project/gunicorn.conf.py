@@ -0,0 +1,44 @@
+import multiprocessing
+import os
+
+cpu_count = multiprocessing.cpu_count()
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+workers = int(os.environ.get('WEB_CONCURRENCY', cpu_count * 2 + 1))
+worker_class = 'gthread'
+threads = int(os.environ.get('AUTOPENML_WEB_THREADS', '4'))
+# Load the app (and the model artifact) once in the master; workers share it copy-on-write.
+preload_app = True
+# Long enough for in-flight scans to drain on shutdown.
+graceful_timeout = int(os.environ.get('AUTOPENML_GRACEFUL_TIMEOUT', '120'))
+timeout = 120
+
+# Job status and cache must be visible from whichever worker serves the next request.
+os.environ.setdefault('AUTOPENML_JOB_DB', 'scan_jobs.sqlite3')
+os.environ.setdefault('AUTOPENML_CACHE_BACKEND', 'sqlite')
+# Workers share metric snapshots here so /metrics on any worker reports the whole server.
+os.environ.setdefault('AUTOPENML_METRICS_DIR', 'scan_metrics')
+# nmap concurrency is bounded per worker; split the cores between workers.
+os.environ.setdefault('AUTOPENML_NMAP_PROCESSES', str(max(1, cpu_count // workers)))
+
+
+def on_starting(server):
+    from service.metrics import clear_directory
+    clear_directory(os.environ['AUTOPENML_METRICS_DIR'])
+
+
+def post_fork(server, worker):
+    if os.environ.get('AUTOPENML_MODEL_PRELOAD') == 'background':
+        from wsgi import model_store
+        model_store.preload_async()
+
+
+def worker_exit(server, worker):
+    # Runs in the worker once it stops taking requests; finish queued and
+    # running scans before the master's graceful timeout runs out.
+    from wsgi import job_queue
+    worker.log.info('Draining %d queued and %d running scan jobs', job_queue.depth, job_queue.running)
+    job_queue.shutdown(timeout=max(1, graceful_timeout - 5))
+    # Final counts from this worker stay in the merged totals after it exits.
+    from service.metrics import default_metrics
+    default_metrics().flush()
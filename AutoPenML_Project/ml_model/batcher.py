@@ -0,0 +1,102 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+BATCH_WINDOW_MS = float(os.environ.get('AUTOPENML_BATCH_WINDOW_MS', '2'))
+BATCH_MAX_ROWS = int(os.environ.get('AUTOPENML_BATCH_MAX_ROWS', '4096'))
+
+
+class InferenceBatcher:
+    """Coalesce concurrent predictions into one predict_proba call.
+
+    Callers transform their own scan results, then wait while the batching
+    thread gathers rows for up to `window_ms` (or `max_rows` rows), runs the
+    classifier once and hands each caller its slice. It exposes the same
+    predict() as VulnerabilityPipeline so it can be passed wherever a model is.
+    """
+
+    def __init__(self, model_source, window_ms=BATCH_WINDOW_MS, max_rows=BATCH_MAX_ROWS):
+        # model_source() returns the current pipeline (e.g. ModelStore.get) so hot reloads apply.
+        self.model_source = model_source
+        self.window = window_ms / 1000
+        self.max_rows = max_rows
+        self.batches = 0
+        self.rows = 0
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def predict_proba(self, X, model=None):
+        if not len(X):
+            model = model or self.model_source()
+            return model.predict_proba_matrix(X)
+        self._start()
+        future = Future()
+        self._queue.put((model or self.model_source(), X, future))
+        return future.result()
+
+    def predict(self, scan_results):
+        model = self.model_source()
+        X, counts = model.transform(scan_results)
+        labels = model.labels_from_proba(self.predict_proba(X, model))
+        return np.split(labels, np.cumsum(counts)[:-1])
+
+    def assess(self, scan_results, explain=False, **kwargs):
+        model = self.model_source()
+        return model.assess(
+            scan_results, explain=explain, predict_proba=lambda X: self.predict_proba(X, model), **kwargs
+        )
+
+    def _start(self):
+        # Started on first use so the thread lives in the serving process, not a pre-fork parent.
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='inference-batcher', daemon=True)
+                self._thread.start()
+
+    def _collect(self):
+        pending = [self._queue.get()]
+        rows = len(pending[0][1])
+        deadline = time.monotonic() + self.window
+        while rows < self.max_rows:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            pending.append(item)
+            rows += len(item[1])
+        return pending
+
+    def _run(self):
+        while True:
+            pending = self._collect()
+            # Requests transformed by different model versions (hot reload) are predicted separately.
+            groups = {}
+            for item in pending:
+                groups.setdefault(id(item[0]), []).append(item)
+            for items in groups.values():
+                self._predict_group(items)
+
+    def _predict_group(self, items):
+        model = items[0][0]
+        try:
+            proba = model.predict_proba_matrix(np.vstack([X for _, X, _ in items]))
+        except Exception as e:
+            for _, _, future in items:
+                future.set_exception(e)
+            return
+        self.batches += 1
+        self.rows += len(proba)
+        offset = 0
+        for _, X, future in items:
+            future.set_result(proba[offset:offset + len(X)])
+            offset += len(X)
@@ -0,0 +1,336 @@
+import argparse
+import pickle
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+from ml_model.explain import positive_column
+from ml_model.model_store import ARTIFACT_DIR, artifact_path, latest_version, save_artifact
+from ml_model.pipeline import VulnerabilityPipeline
+
+# Rows evaluated per pass; bounds the (rows x trees) node matrix.
+EVAL_CHUNK_ROWS = 4096
+
+
+class CompactForest:
+    """A random forest flattened into a few contiguous arrays, evaluated with NumPy.
+
+    Every tree is stored in preorder in shared arrays: split feature, float32
+    threshold, right child index and per-node class probabilities; the left
+    child is always the next node. Leaves have a -inf threshold and point
+    right at themselves, so evaluation is `depth` gather steps over a
+    (rows x trees) node matrix with no branching. Drop-in for the parts of
+    RandomForestClassifier the pipeline uses (classes_, predict,
+    predict_proba) and it explains itself the same way TreePathExplainer does.
+    """
+
+    def __init__(self, feature, threshold, right, value, roots, depth, classes, n_features):
+        self.feature = feature
+        self.threshold = threshold
+        self.right = right
+        self.value = value
+        self.roots = roots
+        self.depth = depth
+        self.classes_ = classes
+        self.n_features_in_ = n_features
+        column = positive_column(classes)
+        self.positive = value[:, column].astype(np.float64) if column is not None else np.zeros(len(value))
+        self.bias = float(self.positive[roots].mean()) if len(roots) else 0.0
+        # Two classes: averaging one column and taking the complement halves the work.
+        self.second = value[:, 1].astype(np.float64) if value.shape[1] == 2 else None
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    @property
+    def n_nodes(self):
+        return len(self.feature)
+
+    @property
+    def nbytes(self):
+        return sum(a.nbytes for a in (self.feature, self.threshold, self.right, self.value, self.roots))
+
+    def __getstate__(self):
+        # positive, second and bias are derived from value; recomputed on load.
+        return {name: getattr(self, name) for name in (
+            'feature', 'threshold', 'right', 'value', 'roots', 'depth', 'classes_', 'n_features_in_'
+        )}
+
+    def __setstate__(self, state):
+        self.__init__(
+            state['feature'], state['threshold'], state['right'], state['value'],
+            state['roots'], state['depth'], state['classes_'], state['n_features_in_']
+        )
+
+    def _chunks(self, X):
+        X = np.asarray(X, dtype=np.float32)
+        for start in range(0, len(X), EVAL_CHUNK_ROWS):
+            chunk = X[start:start + EVAL_CHUNK_ROWS]
+            # Flat X plus a per-row offset turns the feature lookup into one gather.
+            offsets = np.arange(len(chunk), dtype=np.intp)[:, None] * chunk.shape[1]
+            yield start, np.ascontiguousarray(chunk).ravel(), offsets
+
+    def _step(self, X, offsets, nodes):
+        # np.take with intp indices is the cheapest gather NumPy offers; the
+        # stored arrays stay narrow and only the node matrix is intp.
+        go_left = np.take(X, offsets + np.take(self.feature, nodes)) <= np.take(self.threshold, nodes)
+        return np.where(go_left, nodes + 1, np.take(self.right, nodes))
+
+    def _start(self, rows):
+        return np.repeat(self.roots.astype(np.intp)[None, :], rows, axis=0)
+
+    def _leaves(self, X, offsets):
+        nodes = self._start(len(offsets))
+        for _ in range(self.depth):
+            nodes = self._step(X, offsets, nodes)
+        return nodes
+
+    def apply(self, X):
+        """Leaf index per (row, tree)."""
+        return np.vstack([self._leaves(chunk, offsets) for _, chunk, offsets in self._chunks(X)]) \
+            if len(X) else np.zeros((0, self.n_trees), dtype=self.right.dtype)
+
+    def predict_proba(self, X):
+        proba = np.empty((len(X), len(self.classes_)))
+        for start, chunk, offsets in self._chunks(X):
+            leaves = self._leaves(chunk, offsets)
+            rows = slice(start, start + len(offsets))
+            if self.second is None:
+                proba[rows] = np.take(self.value, leaves, axis=0).mean(axis=1)
+            else:
+                proba[rows, 1] = np.take(self.second, leaves).mean(axis=1)
+                proba[rows, 0] = 1 - proba[rows, 1]
+        return proba
+
+    def predict(self, X):
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+    def explain(self, X):
+        """Tree-path contributions to the class-1 probability, accumulated while walking the trees."""
+        contributions = np.zeros((len(X), self.n_features_in_))
+        for start, chunk, offsets in self._chunks(X):
+            nodes = self._start(len(offsets))
+            totals = np.zeros(len(chunk))
+            for _ in range(self.depth):
+                children = self._step(chunk, offsets, nodes)
+                # Leaves loop onto themselves, so their delta is 0.
+                delta = np.take(self.positive, children) - np.take(self.positive, nodes)
+                totals += np.bincount(
+                    (offsets + np.take(self.feature, nodes)).ravel(), weights=delta.ravel(), minlength=len(totals)
+                )
+                nodes = children
+            contributions[start:start + len(offsets)] = totals.reshape(len(offsets), -1) / max(1, self.n_trees)
+        return contributions
+
+
+def _normalized_value(tree):
+    value = tree.value[:, 0, :].astype(np.float64)
+    totals = value.sum(axis=1, keepdims=True)
+    return np.divide(value, totals, out=np.zeros_like(value), where=totals > 0)
+
+
+def _subtree_spread(tree, value):
+    """Largest per-class probability spread among the leaves under each node."""
+    left, right = tree.children_left, tree.children_right
+    lo, hi = value.copy(), value.copy()
+    # sklearn numbers children after their parent, so one reverse pass sees children first.
+    for node in range(tree.node_count - 1, -1, -1):
+        if left[node] >= 0:
+            lo[node] = np.minimum(lo[left[node]], lo[right[node]])
+            hi[node] = np.maximum(hi[left[node]], hi[right[node]])
+    return (hi - lo).max(axis=1)
+
+
+def _flatten_tree(tree, offset, max_depth, tolerance):
+    value = _normalized_value(tree)
+    spread = _subtree_spread(tree, value) if tolerance is not None else None
+    feature, threshold, right, values = [], [], [], []
+    depth = 0
+    # (source node, depth, index of the parent slot to patch with our new index)
+    stack = [(0, 0, None)]
+    while stack:
+        node, node_depth, parent = stack.pop()
+        index = offset + len(feature)
+        if parent is not None:
+            right[parent - offset] = index
+        is_leaf = (
+            tree.children_left[node] < 0
+            or (max_depth is not None and node_depth >= max_depth)
+            or (spread is not None and spread[node] <= tolerance)
+        )
+        values.append(value[node])
+        if is_leaf:
+            feature.append(0)
+            threshold.append(-np.inf)
+            right.append(index)
+            continue
+        depth = max(depth, node_depth + 1)
+        feature.append(tree.feature[node])
+        threshold.append(tree.threshold[node])
+        # Preorder: the left child is always the next node; the right child patches its slot when popped.
+        right.append(-1)
+        stack.append((tree.children_right[node], node_depth + 1, index))
+        stack.append((tree.children_left[node], node_depth + 1, None))
+    return feature, threshold, right, values, depth
+
+
+def compact_forest(classifier, max_trees=None, max_depth=None, tolerance=None, value_dtype=np.float32):
+    """Flatten a fitted RandomForestClassifier into a CompactForest.
+
+    max_trees keeps the first N trees, max_depth turns deeper splits into
+    leaves holding the node's class mix, and tolerance collapses subtrees
+    whose leaves differ by at most that much in class probability (0 keeps
+    predictions identical while dropping redundant splits).
+    """
+    estimators = classifier.estimators_[:max_trees]
+    feature, threshold, right, values, roots = [], [], [], [], []
+    depth = 0
+    for estimator in estimators:
+        roots.append(len(feature))
+        tree = _flatten_tree(estimator.tree_, len(feature), max_depth, tolerance)
+        for column, part in zip((feature, threshold, right, values), tree):
+            column.extend(part)
+        depth = max(depth, tree[4])
+    n_features = classifier.n_features_in_
+    index_dtype = np.int32 if len(feature) < 2 ** 31 else np.int64
+    return CompactForest(
+        feature=np.asarray(feature, dtype=np.min_scalar_type(max(0, n_features - 1))),
+        threshold=np.asarray(threshold, dtype=np.float32),
+        right=np.asarray(right, dtype=index_dtype),
+        value=np.asarray(values, dtype=value_dtype).reshape(len(values), -1),
+        roots=np.asarray(roots, dtype=index_dtype),
+        depth=depth,
+        classes=np.asarray(classifier.classes_),
+        n_features=n_features,
+    )
+
+
+def compact_pipeline(pipeline, **options):
+    compacted = VulnerabilityPipeline(encoder=pipeline.encoder, classifier=compact_forest(pipeline.classifier, **options))
+    # The compact forest explains itself; no separate sparse explainer to keep in memory.
+    compacted.explainer_ = compacted.classifier
+    return compacted
+
+
+# Rows per timed "request": about one host's ports, the common serving case.
+REQUEST_ROWS = 16
+
+
+def _timed(predict, X, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = predict(X)
+    return result, (time.perf_counter() - start) / repeat * 1000
+
+
+def _model_stats(name, classifier, X, y, reference):
+    predictions, batch_ms = _timed(classifier.predict, X, 5)
+    _, request_ms = _timed(classifier.predict, X[:REQUEST_ROWS], 50)
+    if isinstance(classifier, CompactForest):
+        trees, nodes, depth = classifier.n_trees, classifier.n_nodes, classifier.depth
+    else:
+        trees = len(classifier.estimators_)
+        nodes = sum(e.tree_.node_count for e in classifier.estimators_)
+        depth = max(e.tree_.max_depth for e in classifier.estimators_)
+    return {
+        'model': name,
+        'trees': trees,
+        'nodes': int(nodes),
+        'depth': int(depth),
+        'bytes': len(pickle.dumps(classifier, protocol=pickle.HIGHEST_PROTOCOL)),
+        'accuracy': float(np.mean(predictions == y)),
+        'agreement': float(np.mean(predictions == reference)),
+        'batch_ms': batch_ms,
+        'request_ms': request_ms,
+        'rows': len(X),
+    }
+
+
+def size_report(pipeline, compacted, scan_results, labels):
+    """Accuracy, agreement with the full forest, pickled size and predict time for both models."""
+    X, _ = pipeline.transform(scan_results)
+    y = np.asarray(labels)
+    reference = pipeline.classifier.predict(X)
+    return [
+        _model_stats('full', pipeline.classifier, X, y, reference),
+        _model_stats('compact', compacted.classifier, X, y, reference),
+    ]
+
+
+def format_report(report):
+    full, compact = report
+    request, batch = f'{REQUEST_ROWS} rows', f"{compact['rows']} rows"
+    lines = [
+        f"{'model':<8} {'trees':>5} {'nodes':>9} {'depth':>5} {'size':>10} {'accuracy':>8} {'agree':>7} "
+        f"{request:>10} {batch:>10}"
+    ]
+    for row in report:
+        lines.append(
+            f"{row['model']:<8} {row['trees']:>5} {row['nodes']:>9} {row['depth']:>5} "
+            f"{row['bytes'] / 1024:>8.1f}KB {row['accuracy']:>8.4f} {row['agreement']:>7.4f} "
+            f"{row['request_ms']:>8.2f}ms {row['batch_ms']:>8.2f}ms"
+        )
+    lines.append(
+        f"{full['bytes'] / compact['bytes']:.1f}x smaller; predict {full['request_ms'] / compact['request_ms']:.1f}x "
+        f"faster per request, {full['batch_ms'] / compact['batch_ms']:.1f}x on the full set"
+    )
+    return '\n'.join(lines)
+
+
+def main():
+    from ml_model.synthetic import generate_corpus
+    from ml_model.train import load_training_set
+    import joblib
+
+    parser = argparse.ArgumentParser(description='Compact a trained forest into a flat-array artifact.')
+    parser.add_argument('--artifact-dir', default=ARTIFACT_DIR)
+    parser.add_argument('--version', type=int, default=None, help='artifact to compact; defaults to the latest')
+    parser.add_argument('--max-trees', type=int, default=None)
+    parser.add_argument('--max-depth', type=int, default=None)
+    parser.add_argument('--tolerance', type=float, default=0.0,
+                        help='collapse subtrees whose leaf probabilities differ by at most this (default 0: lossless)')
+    parser.add_argument('--float16', action='store_true', help='store node probabilities as float16')
+    parser.add_argument('--eval-data', default=None, help='labelled JSON lines for the report; defaults to held-out synthetic hosts')
+    parser.add_argument('--dry-run', action='store_true', help='print the report without writing an artifact')
+    args = parser.parse_args()
+
+    version = args.version or latest_version(args.artifact_dir)
+    if version is None:
+        parser.error(f'No model artifact in {args.artifact_dir}; train one with `python -m ml_model.train`')
+    artifact = joblib.load(artifact_path(version, args.artifact_dir))
+    pipeline = artifact['model']
+    if isinstance(pipeline.classifier, CompactForest):
+        parser.error(f"Model v{version} is already compacted from v{artifact['compacted']['from_version']}; "
+                     'pass --version to pick a full model')
+
+    options = {
+        'max_trees': args.max_trees,
+        'max_depth': args.max_depth,
+        'tolerance': args.tolerance,
+        'value_dtype': np.float16 if args.float16 else np.float32,
+    }
+    compacted = compact_pipeline(pipeline, **options)
+    scan_results, labels = load_training_set(args.eval_data) if args.eval_data else generate_corpus(seed=1)
+    report = size_report(pipeline, compacted, scan_results, labels)
+    print(format_report(report))
+    if args.dry_run:
+        return
+
+    options['value_dtype'] = np.dtype(options['value_dtype']).name
+    new_version, path = save_artifact(dict(
+        artifact,
+        model=compacted,
+        trained_at=artifact.get('trained_at'),
+        compacted={'from_version': version, 'at': datetime.now(timezone.utc).isoformat(),
+                   'options': options, 'report': report},
+    ), args.artifact_dir)
+    print(f'Wrote compact model v{new_version} to {path}')
+
+
+if __name__ == '__main__':
+    # Run through the importable module so pickled CompactForests reference
+    # ml_model.compact rather than __main__.
+    from ml_model.compact import main as compact_main
+    compact_main()
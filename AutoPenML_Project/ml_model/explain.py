@@ -0,0 +1,57 @@
+import numpy as np
+
+
+def positive_column(classes):
+    """Index of the vulnerable class (label 1) in classes_, or None if it was never seen."""
+    hits = np.flatnonzero(np.asarray(classes) == 1)
+    return int(hits[0]) if len(hits) else None
+
+
+def positive_value(value, column):
+    """Fraction of samples in class 1 per node, from a tree_.value array (counts or fractions)."""
+    value = value[:, 0, :]
+    totals = value.sum(axis=1)
+    positive = value[:, column] if column is not None else np.zeros(len(value))
+    return np.divide(positive, totals, out=np.zeros(len(value)), where=totals > 0)
+
+
+class TreePathExplainer:
+    """Per-feature contributions to the class-1 probability via tree-path attribution.
+
+    Each split moves the node's class-1 fraction from parent to child; that
+    delta is credited to the feature the parent split on. The deltas are
+    precomputed into one sparse (nodes x features) matrix across the forest,
+    so explaining a batch is one decision_path call and one sparse product:
+    bias + contributions.sum(axis=1) equals the forest's class-1 probability.
+    """
+
+    def __init__(self, classifier, n_features):
+        from scipy import sparse
+
+        self.classifier = classifier
+        rows, cols, deltas, roots = [], [], [], []
+        column = positive_column(classifier.classes_)
+        offset = 0
+        for estimator in classifier.estimators_:
+            tree = estimator.tree_
+            value = positive_value(tree.value, column)
+            for children in (tree.children_left, tree.children_right):
+                parents = np.flatnonzero(children >= 0)
+                rows.append(children[parents] + offset)
+                cols.append(tree.feature[parents])
+                deltas.append(value[children[parents]] - value[parents])
+            roots.append(value[0])
+            offset += tree.node_count
+        n_trees = len(roots)
+        self.bias = float(np.mean(roots)) if n_trees else 0.0
+        self.deltas = sparse.csr_matrix(
+            (np.concatenate(deltas) / n_trees, (np.concatenate(rows), np.concatenate(cols))),
+            shape=(offset, n_features)
+        ) if n_trees else sparse.csr_matrix((0, n_features))
+
+    def explain(self, X):
+        """Return an (n_rows, n_features) contribution matrix."""
+        if not len(X) or not self.deltas.shape[0]:
+            return np.zeros((len(X), self.deltas.shape[1]))
+        paths, _ = self.classifier.decision_path(X)
+        return np.asarray((paths @ self.deltas).todense())
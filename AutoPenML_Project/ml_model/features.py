@@ -0,0 +1,107 @@
+import numpy as np
+
+PROTOCOLS = ('tcp', 'udp', 'sctp')
+CATEGORICAL_COLUMNS = ('protocol', 'state', 'service', 'product', 'version', 'os', 'cpe_vendor')
+NUMERIC_COLUMNS = ('port', 'port_class', 'os_accuracy')
+FEATURE_NAMES = NUMERIC_COLUMNS + CATEGORICAL_COLUMNS
+
+# well-known < 1024 <= registered < 49152 <= dynamic
+PORT_CLASS_BOUNDS = np.array([1024, 49152])
+
+
+def _host_os(scan_result):
+    matches = scan_result.get('osmatch') or []
+    if not matches:
+        return '', 0
+    best = matches[0]
+    classes = best.get('osclass') or [{}]
+    return classes[0].get('osfamily') or best.get('name', ''), int(best.get('accuracy') or 0)
+
+
+def flatten_scan_results(scan_results):
+    """Flatten scan_result dicts into column arrays, one row per port.
+
+    Ports come out in the same order the predictor reports them: per host,
+    per protocol in PROTOCOLS order, then in the scan_result's port order.
+    Returns (columns, counts) where counts[i] is the row count of host i.
+    """
+    rows = []
+    counts = []
+    for scan_result in scan_results:
+        os_name, os_accuracy = _host_os(scan_result)
+        before = len(rows)
+        rows.extend(
+            (port, protocol, info.get('state', ''), info.get('name', ''), info.get('product', ''),
+             info.get('version', ''), os_name, os_accuracy, info.get('cpe', ''))
+            for protocol in PROTOCOLS
+            for port, info in scan_result.get(protocol, {}).items()
+        )
+        counts.append(len(rows) - before)
+
+    if rows:
+        port, protocol, state, service, product, version, os_name, os_accuracy, cpe = zip(*rows)
+    else:
+        port = protocol = state = service = product = version = os_name = os_accuracy = cpe = ()
+    columns = {
+        'port': np.asarray(port, dtype=np.int64),
+        'os_accuracy': np.asarray(os_accuracy, dtype=np.float64),
+        'protocol': np.asarray(protocol, dtype=str),
+        'state': np.asarray(state, dtype=str),
+        'service': np.char.lower(np.asarray(service, dtype=str)),
+        'product': np.char.lower(_head(np.asarray(product, dtype=str), ' ')),
+        'version': _head(np.asarray(version, dtype=str), '.'),
+        'os': np.char.lower(np.asarray(os_name, dtype=str)),
+        'cpe_vendor': _cpe_vendor(np.asarray(cpe, dtype=str)),
+    }
+    columns['port_class'] = np.searchsorted(PORT_CLASS_BOUNDS, columns['port'], side='right')
+    return columns, counts
+
+
+def _head(values, sep):
+    return np.char.partition(values, sep)[..., 0] if len(values) else values
+
+
+def _tail(values, sep):
+    return np.char.partition(values, sep)[..., 2] if len(values) else values
+
+
+def _cpe_vendor(cpe):
+    # cpe:/a:openbsd:openssh:8.2 -> openbsd
+    return _head(_tail(_tail(cpe, ':/'), ':'), ':')
+
+
+class CategoryEncoder:
+    """Map strings to integer codes with a sorted vocabulary; unseen values map to 0."""
+
+    def fit(self, values):
+        self.classes_ = np.unique(values)
+        return self
+
+    def transform(self, values):
+        if not len(self.classes_) or not len(values):
+            return np.zeros(len(values), dtype=np.int64)
+        index = np.searchsorted(self.classes_, values)
+        index = np.minimum(index, len(self.classes_) - 1)
+        return np.where(self.classes_[index] == values, index + 1, 0)
+
+
+class ScanFeatureEncoder:
+    feature_names = FEATURE_NAMES
+
+    def fit(self, scan_results):
+        columns, _ = flatten_scan_results(scan_results)
+        self.encoders_ = {name: CategoryEncoder().fit(columns[name]) for name in CATEGORICAL_COLUMNS}
+        return self
+
+    def transform_columns(self, columns):
+        matrix = np.empty((len(columns['port']), len(FEATURE_NAMES)), dtype=np.float64)
+        for i, name in enumerate(NUMERIC_COLUMNS):
+            matrix[:, i] = columns[name]
+        for i, name in enumerate(CATEGORICAL_COLUMNS, start=len(NUMERIC_COLUMNS)):
+            matrix[:, i] = self.encoders_[name].transform(columns[name])
+        return matrix
+
+    def transform(self, scan_results):
+        """Return (X, counts) for a list of scan_result dicts."""
+        columns, counts = flatten_scan_results(scan_results)
+        return self.transform_columns(columns), counts
@@ -0,0 +1,142 @@
+import glob
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+
+from service.process_local import lazy_singleton
+
+ARTIFACT_DIR = os.environ.get(
+    'AUTOPENML_MODEL_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'artifacts'),
+)
+# Bump when the artifact layout changes so stale artifacts are not served.
+ARTIFACT_SCHEMA = 2
+RELOAD_INTERVAL = float(os.environ.get('AUTOPENML_MODEL_RELOAD_INTERVAL', '30'))
+
+_ARTIFACT_RE = re.compile(r'^vulnerability_model-v(\d+)\.joblib$')
+
+logger = logging.getLogger(__name__)
+
+
+def artifact_path(version, artifact_dir=ARTIFACT_DIR):
+    return os.path.join(artifact_dir, f'vulnerability_model-v{version}.joblib')
+
+
+def list_versions(artifact_dir=ARTIFACT_DIR):
+    versions = []
+    for path in glob.glob(os.path.join(artifact_dir, 'vulnerability_model-v*.joblib')):
+        match = _ARTIFACT_RE.match(os.path.basename(path))
+        if match:
+            versions.append(int(match.group(1)))
+    return sorted(versions)
+
+
+def latest_version(artifact_dir=ARTIFACT_DIR):
+    versions = list_versions(artifact_dir)
+    return versions[-1] if versions else None
+
+
+def save_artifact(artifact, artifact_dir=ARTIFACT_DIR):
+    import joblib
+    os.makedirs(artifact_dir, exist_ok=True)
+    # Several training runs may publish at once. Each writes its own temp file, so
+    # a reloading worker never sees a partial artifact, and publishes it with a
+    # hard link, which fails instead of overwriting when another writer took the
+    # version first.
+    while True:
+        version = (latest_version(artifact_dir) or 0) + 1
+        path = artifact_path(version, artifact_dir)
+        fd, tmp_path = tempfile.mkstemp(prefix='.vulnerability_model-', suffix='.tmp', dir=artifact_dir)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                joblib.dump(dict(artifact, version=version), f)
+            try:
+                os.link(tmp_path, path)
+            except FileExistsError:
+                continue
+        finally:
+            os.unlink(tmp_path)
+        return version, path
+
+
+class ModelStore:
+    def __init__(self, artifact_dir=ARTIFACT_DIR, reload_interval=RELOAD_INTERVAL):
+        self.artifact_dir = artifact_dir
+        self.reload_interval = reload_interval
+        self._artifact = None
+        self._checked_at = 0.0
+        self._rejected_version = None
+        self._lock = threading.Lock()
+
+    @property
+    def ready(self):
+        return self._artifact is not None
+
+    @property
+    def version(self):
+        artifact = self._artifact
+        return artifact['version'] if artifact else None
+
+    def load(self):
+        with self._lock:
+            self._load_latest()
+        return self._artifact
+
+    def preload_async(self):
+        """Load in a background thread so the process can serve (e.g. health checks) meanwhile."""
+        thread = threading.Thread(target=self.load, name='model-preload', daemon=True)
+        thread.start()
+        return thread
+
+    def artifact(self):
+        if self._artifact is None:
+            return self.load()
+        if self.reload_interval >= 0 and time.monotonic() - self._checked_at >= self.reload_interval:
+            with self._lock:
+                if time.monotonic() - self._checked_at >= self.reload_interval:
+                    self._load_latest()
+        return self._artifact
+
+    def get(self):
+        return self.artifact()['model']
+
+    def _load_latest(self):
+        self._checked_at = time.monotonic()
+        version = latest_version(self.artifact_dir)
+        if version is None:
+            if self._artifact is not None:
+                return
+            # Training belongs to the build (render.yaml runs it), never to a request or worker boot.
+            raise RuntimeError(
+                f'No model artifact in {self.artifact_dir}; train one with `python -m ml_model.train`'
+            )
+        if self._artifact is not None and (version <= self._artifact['version'] or version == self._rejected_version):
+            return
+        # joblib (and sklearn through the pickle) are only imported once a model is needed.
+        import joblib
+        try:
+            artifact = joblib.load(artifact_path(version, self.artifact_dir))
+        except Exception as exc:
+            # Truncated file, or pickled with an incompatible scikit-learn/joblib.
+            self._reject(version, f'Could not load model artifact v{version}: {exc!r}')
+            return
+        if artifact.get('schema') != ARTIFACT_SCHEMA:
+            self._reject(version, (
+                f'Model artifact v{version} has schema {artifact.get("schema")}, expected {ARTIFACT_SCHEMA}; '
+                'retrain with `python -m ml_model.train`'
+            ))
+            return
+        self._artifact = artifact
+
+    def _reject(self, version, message):
+        if self._artifact is None:
+            raise RuntimeError(message)
+        # A reload must not fail requests: keep serving the loaded model and skip this version from now on.
+        logger.error('%s (still serving v%s)', message, self._artifact['version'])
+        self._rejected_version = version
+
+
+default_store = lazy_singleton(ModelStore)
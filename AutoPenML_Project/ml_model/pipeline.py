@@ -0,0 +1,93 @@
+import numpy as np
+
+from ml_model.explain import TreePathExplainer, positive_column
+from ml_model.features import FEATURE_NAMES, ScanFeatureEncoder, flatten_scan_results
+from service.metrics import default_metrics
+
+TOP_FEATURES = 3
+
+
+class VulnerabilityPipeline:
+    """Feature encoder and classifier trained and saved together."""
+
+    def __init__(self, encoder=None, classifier=None):
+        self.encoder = ScanFeatureEncoder() if encoder is None else encoder
+        if classifier is None:
+            from sklearn.ensemble import RandomForestClassifier
+            classifier = RandomForestClassifier()
+        self.classifier = classifier
+
+    def fit(self, scan_results, labels):
+        self.encoder.fit(scan_results)
+        X, _ = self.encoder.transform(scan_results)
+        self.classifier.fit(X, np.asarray(labels))
+        # Precomputed with the model so explaining stays a sparse product at request time.
+        self.explainer_ = TreePathExplainer(self.classifier, len(FEATURE_NAMES))
+        return self
+
+    def explainer(self):
+        # Artifacts written before explanations existed build it on first use.
+        if getattr(self, 'explainer_', None) is None:
+            self.explainer_ = TreePathExplainer(self.classifier, len(FEATURE_NAMES))
+        return self.explainer_
+
+    def transform(self, scan_results):
+        return self.encoder.transform(scan_results)
+
+    def predict_matrix(self, X):
+        if not len(X):
+            return np.zeros(0, dtype=np.int64)
+        return self.classifier.predict(X)
+
+    def predict_proba_matrix(self, X):
+        if not len(X):
+            return np.zeros((0, len(self.classifier.classes_)))
+        return self.classifier.predict_proba(X)
+
+    def labels_from_proba(self, proba):
+        return self.classifier.classes_[np.argmax(proba, axis=1)] if len(proba) else np.zeros(0, dtype=np.int64)
+
+    def risks_from_proba(self, proba):
+        column = positive_column(self.classifier.classes_)
+        return proba[:, column] if column is not None else np.zeros(len(proba))
+
+    def assess(self, scan_results, explain=False, top=TOP_FEATURES, predict_proba=None):
+        """Return (labels, port_risks) per scan_result.
+
+        port_risks has one {'protocol', 'port', 'risk', 'label'} dict per port,
+        in label order; with explain=True each also lists the `top` features
+        that pushed its risk furthest from the forest's base rate.
+        """
+        metrics = default_metrics()
+        with metrics.stage('features'):
+            columns, counts = flatten_scan_results(scan_results)
+            X = self.encoder.transform_columns(columns)
+        with metrics.stage('predict'):
+            proba = (predict_proba or self.predict_proba_matrix)(X)
+        labels = self.labels_from_proba(proba).tolist()
+        risks = np.round(self.risks_from_proba(proba), 4).tolist()
+        protocols = columns['protocol'].tolist()
+        ports = columns['port'].tolist()
+        port_risks = [
+            {'protocol': protocol, 'port': port, 'risk': risk, 'label': label}
+            for protocol, port, risk, label in zip(protocols, ports, risks, labels)
+        ]
+        if explain and port_risks:
+            with metrics.stage('explain'):
+                contributions = self.explainer().explain(X)
+            order = np.argsort(-np.abs(contributions), axis=1)[:, :top]
+            values = {name: columns[name].tolist() for name in FEATURE_NAMES}
+            for i, record in enumerate(port_risks):
+                record['top_features'] = [
+                    {'feature': FEATURE_NAMES[j], 'value': values[FEATURE_NAMES[j]][i],
+                     'contribution': round(float(contributions[i, j]), 4)}
+                    for j in order[i]
+                ]
+        bounds = np.cumsum([0] + list(counts)).tolist()
+        return [(labels[start:end], port_risks[start:end]) for start, end in zip(bounds, bounds[1:])]
+
+    def predict(self, scan_results):
+        """Return one label array per scan_result, in port order."""
+        X, counts = self.transform(scan_results)
+        predictions = self.predict_matrix(X)
+        return np.split(predictions, np.cumsum(counts)[:-1])
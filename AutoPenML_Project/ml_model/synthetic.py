@@ -0,0 +1,77 @@
+import numpy as np
+
+# (port, service, product, versions, cpe vendor:product)
+SERVICE_CATALOG = (
+    (21, 'ftp', 'vsftpd', ('2.3.4', '3.0.3'), 'beasts:vsftpd'),
+    (22, 'ssh', 'OpenSSH', ('7.4', '8.2p1', '9.6p1'), 'openbsd:openssh'),
+    (23, 'telnet', 'Linux telnetd', ('',), 'linux:telnetd'),
+    (25, 'smtp', 'Postfix smtpd', ('',), 'postfix:postfix'),
+    (53, 'domain', 'ISC BIND', ('9.11.4', '9.18.1'), 'isc:bind'),
+    (80, 'http', 'Apache httpd', ('2.2.15', '2.4.29', '2.4.58'), 'apache:http_server'),
+    (110, 'pop3', 'Dovecot pop3d', ('',), 'dovecot:dovecot'),
+    (139, 'netbios-ssn', 'Samba smbd', ('3.X - 4.X',), 'samba:samba'),
+    (143, 'imap', 'Dovecot imapd', ('',), 'dovecot:dovecot'),
+    (443, 'https', 'nginx', ('1.14.0', '1.24.0'), 'igor_sysoev:nginx'),
+    (445, 'microsoft-ds', 'Microsoft Windows SMB', ('',), 'microsoft:windows'),
+    (3306, 'mysql', 'MySQL', ('5.5.62', '8.0.36'), 'mysql:mysql'),
+    (3389, 'ms-wbt-server', 'Microsoft Terminal Services', ('',), 'microsoft:terminal_services'),
+    (5432, 'postgresql', 'PostgreSQL DB', ('9.6.0', '16.2'), 'postgresql:postgresql'),
+    (5900, 'vnc', 'VNC', ('3.3', '3.8'), 'realvnc:vnc'),
+    (6379, 'redis', 'Redis key-value store', ('4.0.9', '7.2.4'), 'redislabs:redis'),
+    (8080, 'http-proxy', 'Apache Tomcat', ('7.0.88', '10.1.19'), 'apache:tomcat'),
+    (27017, 'mongodb', 'MongoDB', ('3.6.3', '7.0.5'), 'mongodb:mongodb'),
+)
+
+OS_FAMILIES = (('Linux', 'Linux 5.4'), ('Windows', 'Microsoft Windows Server 2019'), ('FreeBSD', 'FreeBSD 13.2'))
+
+RISKY_SERVICES = frozenset(('ftp', 'telnet', 'netbios-ssn', 'microsoft-ds', 'ms-wbt-server', 'vnc', 'redis', 'mongodb'))
+
+
+def generate_scan_result(rng, n_ports=8, with_os=True):
+    """Build a python-nmap style scan_result dict with realistic services."""
+    picks = rng.choice(len(SERVICE_CATALOG), size=min(n_ports, len(SERVICE_CATALOG)), replace=False)
+    tcp = {}
+    for index in sorted(picks):
+        port, name, product, versions, cpe = SERVICE_CATALOG[index]
+        tcp[port] = {
+            'state': 'open' if rng.random() < 0.9 else 'filtered',
+            'reason': 'syn-ack',
+            'name': name,
+            'product': product,
+            'version': versions[rng.integers(len(versions))],
+            'extrainfo': '',
+            'conf': '10',
+            'cpe': f'cpe:/a:{cpe}',
+        }
+    scan_result = {
+        'hostnames': [{'name': '', 'type': ''}],
+        'addresses': {},
+        'vendor': {},
+        'status': {'state': 'up', 'reason': 'syn-ack'},
+        'tcp': tcp,
+    }
+    if with_os:
+        family, name = OS_FAMILIES[rng.integers(len(OS_FAMILIES))]
+        scan_result['osmatch'] = [{
+            'name': name,
+            'accuracy': str(rng.integers(85, 101)),
+            'osclass': [{'osfamily': family}],
+        }]
+    return scan_result
+
+
+def label_scan_result(scan_result):
+    """Demo labels: risky services, or an old major version of a known product."""
+    labels = []
+    for info in scan_result.get('tcp', {}).values():
+        major = info.get('version', '').split('.')[0]
+        old = major.isdigit() and int(major) < 5 and info.get('name') not in ('vnc',)
+        labels.append(int(info.get('state') == 'open' and (info.get('name') in RISKY_SERVICES or old)))
+    return labels
+
+
+def generate_corpus(n_hosts=500, seed=0):
+    rng = np.random.default_rng(seed)
+    scan_results = [generate_scan_result(rng, int(rng.integers(1, 12))) for _ in range(n_hosts)]
+    labels = [label for scan_result in scan_results for label in label_scan_result(scan_result)]
+    return scan_results, labels
@@ -0,0 +1,67 @@
+import argparse
+import json
+from datetime import datetime, timezone
+
+from sklearn.ensemble import RandomForestClassifier
+
+from ml_model.model_store import ARTIFACT_DIR, ARTIFACT_SCHEMA, save_artifact
+from ml_model.pipeline import VulnerabilityPipeline
+from ml_model.synthetic import generate_corpus
+
+
+def load_training_set(path):
+    """Read JSON lines of {"scan_result": {...}, "labels": [0, 1, ...]}, labels in port order."""
+    scan_results, labels = [], []
+    with open(path) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            scan_result = record['scan_result']
+            for protocol in ('tcp', 'udp', 'sctp'):
+                if protocol in scan_result:
+                    scan_result[protocol] = {int(port): info for port, info in scan_result[protocol].items()}
+            scan_results.append(scan_result)
+            labels.extend(record['labels'])
+    return scan_results, labels
+
+
+def build_training_set(data_path=None):
+    if data_path:
+        return load_training_set(data_path)
+    # Demo dataset: synthetic hosts labelled by a simple risk heuristic.
+    return generate_corpus()
+
+
+def train_model(n_estimators=100, random_state=None, data_path=None):
+    scan_results, labels = build_training_set(data_path)
+    pipeline = VulnerabilityPipeline(
+        classifier=RandomForestClassifier(n_estimators=n_estimators, random_state=random_state)
+    )
+    return pipeline.fit(scan_results, labels)
+
+
+def train_and_save(artifact_dir=ARTIFACT_DIR, n_estimators=100, random_state=None, data_path=None):
+    model = train_model(n_estimators=n_estimators, random_state=random_state, data_path=data_path)
+    return save_artifact({
+        'schema': ARTIFACT_SCHEMA,
+        'model': model,
+        'features': list(model.encoder.feature_names),
+        'trained_at': datetime.now(timezone.utc).isoformat(),
+    }, artifact_dir)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Train the vulnerability model and write a versioned artifact.')
+    parser.add_argument('--artifact-dir', default=ARTIFACT_DIR)
+    parser.add_argument('--data', default=None, help='labelled JSON lines; defaults to the synthetic demo set')
+    parser.add_argument('--n-estimators', type=int, default=100)
+    parser.add_argument('--random-state', type=int, default=None)
+    args = parser.parse_args()
+
+    version, path = train_and_save(args.artifact_dir, args.n_estimators, args.random_state, args.data)
+    print(f'Wrote model v{version} to {path}')
+
+
+if __name__ == '__main__':
+    main()
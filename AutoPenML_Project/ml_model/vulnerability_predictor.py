@@ -1,10 +1,32 @@
-from sklearn.ensemble import RandomForestClassifier
-import pandas as pd
-
-def predict_vulnerabilities(scan_data):
-    ports = scan_data.get('tcp', {}).keys()
-    data = pd.DataFrame({'port': list(ports)})
-    model = RandomForestClassifier()
-    model.fit([[0], [1]], [0, 1])
-    predictions = model.predict([[port % 2] for port in data['port']])
-    return predictions.tolist()
\ No newline at end of file
+from ml_model.model_store import default_store
+
+
+def predict_vulnerabilities(scan_data, model=None):
+    if model is None:
+        model = default_store().get()
+    return model.predict([scan_data])[0].tolist()
+
+
+def predict_vulnerabilities_batch(scan_results, model=None):
+    """Predict for many hosts with a single model call; returns {host: [labels]}."""
+    if model is None:
+        model = default_store().get()
+    hosts = list(scan_results)
+    predictions = model.predict([scan_results[host] for host in hosts])
+    return {host: labels.tolist() for host, labels in zip(hosts, predictions)}
+
+
+def assess_vulnerabilities(scan_data, model=None, explain=False):
+    """Return (labels, port_risks) for one scan_result; explain=True adds top contributing features."""
+    if model is None:
+        model = default_store().get()
+    return model.assess([scan_data], explain=explain)[0]
+
+
+def assess_vulnerabilities_batch(scan_results, model=None, explain=False):
+    """Like predict_vulnerabilities_batch, but returns {host: (labels, port_risks)}."""
+    if model is None:
+        model = default_store().get()
+    hosts = list(scan_results)
+    assessed = model.assess([scan_results[host] for host in hosts], explain=explain)
+    return dict(zip(hosts, assessed))
@@ -0,0 +1,203 @@
+import glob
+import ipaddress
+import math
+import os
+import threading
+import zlib
+
+from scanner.executor import HOST_GROUP, ScanCancelled, default_executor
+from scanner.nmap_xml import HostRecord, parse_nmap_xml
+from service.process_local import lazy_singleton
+
+SCAN_BACKEND = os.environ.get('AUTOPENML_SCAN_BACKEND', 'nmap')
+
+
+class ScanBackend:
+    """Runs one scan invocation over a list of hosts.
+
+    scan() returns {host: scan_result} for the hosts that were up, using
+    python-nmap's scan_result layout; iter_scan() yields (host, HostRecord)
+    instead, as hosts finish. assign()/cancel()/release() mirror ScanExecutor.
+    """
+
+    name = None
+
+    def scan(self, hosts, arguments, scan_id=None):
+        raise NotImplementedError
+
+    def iter_scan(self, hosts, arguments, scan_id=None):
+        for host, scan_result in self.scan(hosts, arguments, scan_id=scan_id).items():
+            yield host, HostRecord.from_scan_result(host, scan_result)
+
+    def assign(self, scan_id, client):
+        pass
+
+    def cancel(self, scan_id):
+        return False
+
+    def release(self, scan_id):
+        pass
+
+    @property
+    def active(self):
+        return 0
+
+
+class NmapBackend(ScanBackend):
+    name = 'nmap'
+
+    def __init__(self, executor=None):
+        self.executor = executor or default_executor()
+
+    def scan(self, hosts, arguments, scan_id=None):
+        return self.executor.run(hosts, arguments, scan_id=scan_id)
+
+    def iter_scan(self, hosts, arguments, scan_id=None):
+        return self.executor.iter_run(hosts, arguments, scan_id=scan_id)
+
+    def assign(self, scan_id, client):
+        self.executor.assign(scan_id, client)
+
+    def cancel(self, scan_id):
+        return self.executor.cancel(scan_id)
+
+    def release(self, scan_id):
+        self.executor.release(scan_id)
+
+    @property
+    def active(self):
+        return self.executor.active
+
+
+class _SimulatedBackend(ScanBackend):
+    """Shared latency simulation and cancellation for the offline backends."""
+
+    def __init__(self, latency_ms=200.0, latency_sigma=0.5, seed=0):
+        self.latency_ms = latency_ms
+        self.latency_sigma = latency_sigma
+        self.seed = seed
+        self._lock = threading.Lock()
+        self._events = {}
+        self._active = 0
+
+    def _rng(self, host):
+        import numpy as np
+        return np.random.default_rng([self.seed, zlib.crc32(host.encode())])
+
+    def _latency(self, hosts):
+        if not hosts or self.latency_ms <= 0:
+            return 0.0
+        # Hosts in one invocation are scanned in parallel groups, like nmap.
+        mu = math.log(self.latency_ms / 1000)
+        per_host = [self._rng(host).lognormal(mu, self.latency_sigma) for host in hosts]
+        return max(per_host) * math.ceil(len(hosts) / HOST_GROUP)
+
+    def _wait(self, seconds, scan_id):
+        with self._lock:
+            event = self._events.setdefault(scan_id, threading.Event())
+            self._active += 1
+        try:
+            if event.wait(seconds):
+                raise ScanCancelled(f'Scan {scan_id} was cancelled')
+        finally:
+            with self._lock:
+                self._active -= 1
+
+    def cancel(self, scan_id):
+        with self._lock:
+            self._events.setdefault(scan_id, threading.Event()).set()
+        return True
+
+    def release(self, scan_id):
+        with self._lock:
+            self._events.pop(scan_id, None)
+
+    @property
+    def active(self):
+        return self._active
+
+
+class SyntheticBackend(_SimulatedBackend):
+    """Deterministic fake scans: the same host always yields the same result."""
+
+    name = 'synthetic'
+
+    def __init__(self, up_ratio=0.8, ports_per_host=6.0, latency_ms=200.0, latency_sigma=0.5, seed=0):
+        super().__init__(latency_ms, latency_sigma, seed)
+        self.up_ratio = up_ratio
+        self.ports_per_host = ports_per_host
+
+    def scan(self, hosts, arguments, scan_id=None):
+        # Imported here so the nmap path never loads the training helpers.
+        from ml_model.synthetic import generate_scan_result
+
+        self._wait(self._latency(hosts), scan_id)
+        results = {}
+        for host in hosts:
+            rng = self._rng(host)
+            if rng.random() >= self.up_ratio:
+                continue
+            scan_result = generate_scan_result(rng, max(1, int(rng.poisson(self.ports_per_host))))
+            try:
+                version = ipaddress.ip_address(host).version
+                scan_result['addresses'] = {f'ipv{version}': host}
+            except ValueError:
+                scan_result['hostnames'] = [{'name': host, 'type': 'user'}]
+            results[host] = scan_result
+        return results
+
+
+class ReplayBackend(_SimulatedBackend):
+    """Serve recorded nmap -oX output.
+
+    `path` is an XML file or a directory of them. Hosts that were not recorded
+    are answered with a recorded host picked by hash, so any target list can
+    be replayed; set `strict=True` to report them as down instead.
+    """
+
+    name = 'replay'
+
+    def __init__(self, path, strict=False, latency_ms=0.0, latency_sigma=0.5, seed=0):
+        super().__init__(latency_ms, latency_sigma, seed)
+        self.strict = strict
+        paths = sorted(glob.glob(os.path.join(path, '*.xml'))) if os.path.isdir(path) else [path]
+        self.recorded = {}
+        for xml_path in paths:
+            with open(xml_path, 'rb') as f:
+                self.recorded.update(parse_nmap_xml(f.read()))
+        if not self.recorded:
+            raise ValueError(f'No recorded hosts found in {path}')
+        self._hosts = sorted(self.recorded)
+
+    def scan(self, hosts, arguments, scan_id=None):
+        self._wait(self._latency(hosts), scan_id)
+        results = {}
+        for host in hosts:
+            if host in self.recorded:
+                results[host] = self.recorded[host]
+            elif not self.strict:
+                results[host] = self.recorded[self._hosts[zlib.crc32(host.encode()) % len(self._hosts)]]
+        return results
+
+
+def backend_from_env():
+    if SCAN_BACKEND == 'nmap':
+        return NmapBackend()
+    if SCAN_BACKEND == 'synthetic':
+        return SyntheticBackend(
+            up_ratio=float(os.environ.get('AUTOPENML_SYNTHETIC_UP_RATIO', '0.8')),
+            ports_per_host=float(os.environ.get('AUTOPENML_SYNTHETIC_PORTS', '6')),
+            latency_ms=float(os.environ.get('AUTOPENML_SYNTHETIC_LATENCY_MS', '200')),
+            latency_sigma=float(os.environ.get('AUTOPENML_SYNTHETIC_LATENCY_SIGMA', '0.5')),
+            seed=int(os.environ.get('AUTOPENML_SYNTHETIC_SEED', '0')),
+        )
+    if SCAN_BACKEND == 'replay':
+        return ReplayBackend(
+            os.environ['AUTOPENML_REPLAY_PATH'],
+            strict=os.environ.get('AUTOPENML_REPLAY_STRICT') == '1',
+            latency_ms=float(os.environ.get('AUTOPENML_SYNTHETIC_LATENCY_MS', '0')),
+        )
+    raise ValueError(f'Unknown AUTOPENML_SCAN_BACKEND: {SCAN_BACKEND}')
+
+
+default_backend = lazy_singleton(backend_from_env)
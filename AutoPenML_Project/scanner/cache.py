@@ -0,0 +1,178 @@
+import ipaddress
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+from service.process_local import sqlite_connector
+
+CACHE_BACKEND = os.environ.get('AUTOPENML_CACHE_BACKEND', 'memory')
+CACHE_TTL = float(os.environ.get('AUTOPENML_CACHE_TTL', '900'))
+CACHE_SIZE = int(os.environ.get('AUTOPENML_CACHE_SIZE', '1024'))
+CACHE_PATH = os.environ.get('AUTOPENML_CACHE_PATH', 'scan_cache.sqlite3')
+
+
+def normalize_target(target):
+    target = target.strip()
+    try:
+        return str(ipaddress.ip_address(target))
+    except ValueError:
+        return target.lower().rstrip('.')
+
+
+def normalize_arguments(arguments):
+    return ' '.join(arguments.split())
+
+
+def make_key(target, arguments):
+    return f'{normalize_target(target)}|{normalize_arguments(arguments)}'
+
+
+class MemoryBackend:
+    name = 'memory'
+
+    def __init__(self, max_entries=CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key, value, stored_at):
+        with self._lock:
+            self._entries[key] = (stored_at, value)
+            self._entries.move_to_end(key)
+            evicted = 0
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                evicted += 1
+            return evicted
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SQLiteBackend:
+    name = 'sqlite'
+
+    def __init__(self, path=CACHE_PATH, max_entries=CACHE_SIZE):
+        self.path = path
+        self.max_entries = max_entries
+        self._connect = sqlite_connector(path)
+        with self._connect() as conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS scan_cache ('
+                'key TEXT PRIMARY KEY, value BLOB NOT NULL, stored_at REAL NOT NULL, accessed_at REAL NOT NULL)'
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS scan_cache_accessed ON scan_cache (accessed_at)')
+
+    def get(self, key):
+        conn = self._connect()
+        row = conn.execute('SELECT stored_at, value FROM scan_cache WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            return None
+        with conn:
+            conn.execute('UPDATE scan_cache SET accessed_at = ? WHERE key = ?', (time.time(), key))
+        return row[0], pickle.loads(row[1])
+
+    def set(self, key, value, stored_at):
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO scan_cache (key, value, stored_at, accessed_at) VALUES (?, ?, ?, ?)',
+                (key, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), stored_at, time.time()),
+            )
+            evicted = conn.execute(
+                'DELETE FROM scan_cache WHERE key IN ('
+                'SELECT key FROM scan_cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)',
+                (self.max_entries,),
+            ).rowcount
+        return evicted
+
+    def delete(self, key):
+        conn = self._connect()
+        with conn:
+            conn.execute('DELETE FROM scan_cache WHERE key = ?', (key,))
+
+    def __len__(self):
+        return self._connect().execute('SELECT COUNT(*) FROM scan_cache').fetchone()[0]
+
+
+class ScanCache:
+    def __init__(self, backend, ttl=CACHE_TTL):
+        self.backend = backend
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+    def _count(self, **counts):
+        with self._lock:
+            for name, value in counts.items():
+                setattr(self, name, getattr(self, name) + value)
+
+    def get(self, target, arguments):
+        key = make_key(target, arguments)
+        entry = self.backend.get(key)
+        if entry is not None and time.time() - entry[0] > self.ttl:
+            self.backend.delete(key)
+            self._count(expired=1)
+            entry = None
+        if entry is None:
+            self._count(misses=1)
+            return None
+        self._count(hits=1)
+        return entry[1]
+
+    def set(self, target, arguments, value):
+        evicted = self.backend.set(make_key(target, arguments), value, time.time())
+        if evicted:
+            self._count(evictions=evicted)
+
+    def get_or_scan(self, target, arguments, scan, force_refresh=False):
+        """Return (scan_result, cached) using scan(target, arguments) on a miss."""
+        if not force_refresh:
+            value = self.get(target, arguments)
+            if value is not None:
+                return value, True
+        else:
+            self._count(misses=1)
+        value = scan(target, arguments)
+        self.set(target, arguments, value)
+        return value, False
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'backend': self.backend.name,
+            'ttl': self.ttl,
+            'max_entries': self.backend.max_entries,
+            'entries': len(self.backend),
+            'hits': self.hits,
+            'misses': self.misses,
+            'expired': self.expired,
+            'evictions': self.evictions,
+            'hit_ratio': self.hits / lookups if lookups else 0.0,
+        }
+
+
+def cache_from_env():
+    if CACHE_BACKEND == 'sqlite':
+        backend = SQLiteBackend(CACHE_PATH, CACHE_SIZE)
+    elif CACHE_BACKEND == 'memory':
+        backend = MemoryBackend(CACHE_SIZE)
+    else:
+        raise ValueError(f'Unknown AUTOPENML_CACHE_BACKEND: {CACHE_BACKEND}')
+    return ScanCache(backend, CACHE_TTL)
@@ -0,0 +1,253 @@
+import math
+import os
+import shlex
+import signal
+import subprocess
+import tempfile
+import threading
+import time
+
+from scanner.nmap_xml import NmapXMLError, iter_nmap_xml
+from scanner.subnets import SUBNET_CAP, SubnetLeases
+from service.fair_queue import FairSlots
+from service.process_local import alive, lazy_singleton
+
+MAX_PROCESSES = int(os.environ.get('AUTOPENML_NMAP_PROCESSES', str(os.cpu_count() or 2)))
+SCAN_TIMEOUT = float(os.environ.get('AUTOPENML_SCAN_TIMEOUT', '300'))
+PID_DIR = os.environ.get('AUTOPENML_NMAP_PID_DIR', os.path.join(tempfile.gettempdir(), 'autopenml-nmap'))
+REAP_INTERVAL = 60
+# nmap scans hosts in parallel groups; a chunk's hard deadline allows one
+# host timeout per group of this many hosts.
+HOST_GROUP = 16
+KILL_GRACE = 10
+
+
+class ScanError(Exception):
+    pass
+
+
+class ScanTimeout(ScanError):
+    pass
+
+
+class ScanCancelled(ScanError):
+    pass
+
+
+def _is_nmap(pid):
+    try:
+        with open(f'/proc/{pid}/comm') as f:
+            return f.read().strip() == 'nmap'
+    except OSError:
+        # No procfs (macOS): trust the pid file.
+        return not os.path.isdir('/proc')
+
+
+def _kill_group(pgid):
+    try:
+        os.killpg(pgid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+class ScanExecutor:
+    """Run nmap in its own process group with a bounded number of live processes.
+
+    Each scan gets a hard deadline, can be cancelled by scan_id, and leaves a
+    pid file behind while it runs so a later process can reap nmap children
+    orphaned by a crashed worker. Free process slots go to waiting scans in
+    weighted-fair order by the client assign()ed to their scan_id, and with
+    `leases` (SubnetLeases) a scan first waits until each target subnet is
+    under its cap across all workers.
+    """
+
+    def __init__(self, max_processes=MAX_PROCESSES, timeout=SCAN_TIMEOUT, pid_dir=PID_DIR, weights=None,
+                 leases=None):
+        self.max_processes = max_processes
+        self.timeout = timeout
+        self.pid_dir = pid_dir
+        self.leases = leases
+        self._slots = FairSlots(max_processes, weights)
+        self._lock = threading.Lock()
+        self._running = {}
+        self._cancelled = set()
+        self._clients = {}
+        self._reaper = None
+        os.makedirs(pid_dir, exist_ok=True)
+
+    @property
+    def active(self):
+        with self._lock:
+            return sum(len(procs) for procs in self._running.values())
+
+    def run(self, hosts, arguments, scan_id=None, timeout=None):
+        """Scan `hosts` (list of targets) and return the python-nmap style result dict."""
+        return {
+            host: record.to_scan_result()
+            for host, record in self.iter_run(hosts, arguments, scan_id=scan_id, timeout=timeout)
+        }
+
+    def iter_run(self, hosts, arguments, scan_id=None, timeout=None):
+        """Scan `hosts` and yield (host, HostRecord) as nmap finishes each one.
+
+        nmap's XML is parsed while it streams out of the pipe, so neither the
+        document nor a tree of it is ever held whole. Errors (timeout,
+        cancellation, a failing nmap) are raised after the hosts already
+        reported.
+        """
+        self._start_reaper()
+        timeout = self.timeout if timeout is None else timeout
+        deadline = timeout * math.ceil(len(hosts) / HOST_GROUP) + KILL_GRACE
+        # '--' ends option parsing, so no target can be read as an nmap option.
+        command = (
+            ['nmap', '-oX', '-', '--host-timeout', f'{int(timeout)}s'] + shlex.split(arguments)
+            + ['--'] + list(hosts)
+        )
+
+        def check():
+            self._check_cancelled(scan_id)
+
+        check()
+        lease = self.leases.acquire(hosts, deadline, check) if self.leases is not None else None
+        try:
+            self._slots.acquire(self._clients.get(scan_id), len(hosts), check)
+        except BaseException:
+            if lease is not None:
+                self.leases.release(lease)
+            raise
+        try:
+            check()
+            if lease is not None:
+                # The wait for a slot must not eat into the lease's deadline.
+                self.leases.renew(lease, deadline)
+            # stderr goes to a file so a chatty nmap cannot block on a pipe nobody reads yet.
+            with tempfile.TemporaryFile() as err:
+                proc = subprocess.Popen(
+                    command, stdout=subprocess.PIPE, stderr=err, start_new_session=True
+                )
+                self._register(scan_id, proc)
+                expired = threading.Event()
+                timer = threading.Timer(deadline, self._expire, (proc, expired))
+                timer.daemon = True
+                timer.start()
+                parse_error = None
+                finished = False
+                try:
+                    for record in iter_nmap_xml(proc.stdout):
+                        yield record.host, record
+                    finished = True
+                except NmapXMLError as e:
+                    parse_error = e
+                finally:
+                    if not finished:
+                        # Bad output or a caller that stopped iterating: the rest is of no use.
+                        _kill_group(proc.pid)
+                    proc.stdout.close()
+                    proc.wait()
+                    timer.cancel()
+                    self._unregister(scan_id, proc)
+                err.seek(0)
+                message = err.read().decode(errors='replace').strip()
+        finally:
+            self._slots.release()
+            if lease is not None:
+                self.leases.release(lease)
+
+        if expired.is_set():
+            raise ScanTimeout(f'nmap did not finish within {deadline:.0f}s for {len(hosts)} host(s)')
+        self._check_cancelled(scan_id)
+        if proc.returncode != 0:
+            raise ScanError(message or f'nmap exited with {proc.returncode}')
+        if parse_error is not None:
+            raise ScanError(message or 'nmap produced no XML output')
+
+    def cancel(self, scan_id):
+        """Stop every nmap process started for scan_id and refuse new ones."""
+        with self._lock:
+            self._cancelled.add(scan_id)
+            procs = list(self._running.get(scan_id, ()))
+        for proc in procs:
+            _kill_group(proc.pid)
+        return bool(procs)
+
+    def assign(self, scan_id, client):
+        """Schedule scan_id's nmap processes as `client`'s for fair slot sharing."""
+        with self._lock:
+            self._clients[scan_id] = client
+
+    def release(self, scan_id):
+        with self._lock:
+            self._cancelled.discard(scan_id)
+            self._clients.pop(scan_id, None)
+
+    def shutdown(self):
+        with self._lock:
+            procs = [proc for group in self._running.values() for proc in group]
+        for proc in procs:
+            _kill_group(proc.pid)
+
+    def reap_orphans(self):
+        """Kill nmap process groups whose owning worker process no longer exists."""
+        reaped = 0
+        for name in os.listdir(self.pid_dir):
+            path = os.path.join(self.pid_dir, name)
+            try:
+                with open(path) as f:
+                    owner, pgid = (int(value) for value in f.read().split())
+            except (OSError, ValueError):
+                continue
+            if alive(owner):
+                continue
+            if alive(pgid) and _is_nmap(pgid):
+                _kill_group(pgid)
+                reaped += 1
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        return reaped
+
+    def _check_cancelled(self, scan_id):
+        if scan_id is not None and scan_id in self._cancelled:
+            raise ScanCancelled(f'Scan {scan_id} was cancelled')
+
+    def _register(self, scan_id, proc):
+        with self._lock:
+            self._running.setdefault(scan_id, set()).add(proc)
+        with open(os.path.join(self.pid_dir, f'{proc.pid}.pid'), 'w') as f:
+            f.write(f'{os.getpid()} {proc.pid}')
+
+    def _unregister(self, scan_id, proc):
+        with self._lock:
+            procs = self._running.get(scan_id)
+            if procs is not None:
+                procs.discard(proc)
+                if not procs:
+                    del self._running[scan_id]
+        try:
+            os.remove(os.path.join(self.pid_dir, f'{proc.pid}.pid'))
+        except OSError:
+            pass
+
+    def _start_reaper(self):
+        # Started lazily so the thread belongs to the process that scans
+        # (not a parent that forks workers afterwards).
+        if self._reaper is not None and self._reaper.is_alive():
+            return
+        with self._lock:
+            if self._reaper is not None and self._reaper.is_alive():
+                return
+            self._reaper = threading.Thread(target=self._reap_forever, name='nmap-reaper', daemon=True)
+            self._reaper.start()
+
+    def _reap_forever(self):
+        while True:
+            self.reap_orphans()
+            time.sleep(REAP_INTERVAL)
+
+    def _expire(self, proc, expired):
+        expired.set()
+        _kill_group(proc.pid)
+
+
+default_executor = lazy_singleton(lambda: ScanExecutor(leases=SubnetLeases() if SUBNET_CAP > 0 else None))
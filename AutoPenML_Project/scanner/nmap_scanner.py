@@ -1,7 +1,280 @@
-import nmap
+import ipaddress
+import itertools
+import re
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 
-def run_nmap_scan(target_ip):
-    nm = nmap.PortScanner()
-    nm.scan(hosts=target_ip, arguments='-T4 -F')
-    scan_result = nm[target_ip]
-    return scan_result
\ No newline at end of file
+from scanner.backends import default_backend
+from service.metrics import default_metrics
+
+DEFAULT_ARGUMENTS = '-T4 -F'
+BATCH_CHUNK_SIZE = 64
+STREAM_CHUNK_SIZE = 8
+STREAM_PARALLELISM = 2
+
+def _scan(hosts, arguments, scan_id=None):
+    with default_metrics().stage('nmap'):
+        return default_backend().scan(hosts, arguments, scan_id=scan_id)
+
+def down_result():
+    return {'status': {'state': 'down'}, 'tcp': {}}
+
+def run_nmap_scan(target_ip, arguments=DEFAULT_ARGUMENTS, scan_id=None):
+    results = _scan([target_ip], arguments, scan_id)
+    if target_ip in results:
+        return results[target_ip]
+    if len(results) == 1:
+        # Hostname targets come back keyed by their resolved address.
+        return next(iter(results.values()))
+    # nmap leaves hosts that are down (or don't resolve) out of its results.
+    return down_result()
+
+# One DNS label: letters, digits and inner hyphens (RFC 1123).
+_HOSTNAME_LABEL = re.compile(r'^(?!-)[A-Za-z0-9-]{1,63}(?<!-)$')
+
+def _is_range(spec):
+    # "10.0.0.1-20" or "10.0.0.1-10.0.0.20"; a dash after anything but an address is a hostname.
+    start, dash, _ = spec.partition('-')
+    if not dash:
+        return False
+    try:
+        ipaddress.ip_address(start.strip())
+    except ValueError:
+        return False
+    return True
+
+def check_target(spec):
+    """Raise ValueError unless spec is an IP address, CIDR block, address range or hostname.
+
+    Targets end up on nmap's command line, so anything else (options such as
+    -iL or --script in particular) is refused here.
+    """
+    if not isinstance(spec, str) or not spec.strip():
+        raise ValueError('Empty target')
+    spec = spec.strip()
+    if spec.startswith('-'):
+        raise ValueError(f'Invalid target: {spec}')
+    if '/' in spec:
+        ipaddress.ip_network(spec, strict=False)
+        return
+    if _is_range(spec):
+        _parse_range(spec)
+        return
+    try:
+        ipaddress.ip_address(spec)
+        return
+    except ValueError:
+        pass
+    labels = spec[:-1].split('.') if spec.endswith('.') else spec.split('.')
+    if len(spec) > 253 or not all(_HOSTNAME_LABEL.match(label) for label in labels):
+        raise ValueError(f'Invalid target: {spec}')
+
+def _parse_range(spec):
+    start, end = (part.strip() for part in spec.split('-', 1))
+    first = ipaddress.ip_address(start)
+    if '.' in end or ':' in end:
+        last = ipaddress.ip_address(end)
+    else:
+        # Short form "10.0.0.1-20": the end replaces the last octet.
+        last = ipaddress.ip_address(start.rsplit('.', 1)[0] + '.' + end)
+    if last.version != first.version or last < first:
+        raise ValueError(f'Invalid address range: {spec}')
+    return first, last
+
+def count_targets(specs):
+    total = 0
+    for spec in specs:
+        check_target(spec)
+        spec = spec.strip()
+        if '/' in spec:
+            network = ipaddress.ip_network(spec, strict=False)
+            total += network.num_addresses - 2 if network.num_addresses > 2 else network.num_addresses
+        elif _is_range(spec):
+            first, last = _parse_range(spec)
+            total += int(last) - int(first) + 1
+        else:
+            total += 1
+    return total
+
+def iter_targets(specs):
+    """Expand IPs, ranges and CIDR blocks lazily, one host at a time."""
+    for spec in specs:
+        check_target(spec)
+        spec = spec.strip()
+        if '/' in spec:
+            network = ipaddress.ip_network(spec, strict=False)
+            hosts = network.hosts() if network.num_addresses > 2 else iter(network)
+            for host in hosts:
+                yield str(host)
+        elif _is_range(spec):
+            first, last = _parse_range(spec)
+            for value in range(int(first), int(last) + 1):
+                yield str(ipaddress.ip_address(value))
+        else:
+            yield spec
+
+def chunk_targets(targets, chunk_size=BATCH_CHUNK_SIZE):
+    targets = iter(targets)
+    while True:
+        chunk = list(itertools.islice(targets, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+def _group_by_arguments(chunk, arguments):
+    # arguments is a string, or a host -> arguments callable (per-host scan profiles);
+    # one nmap invocation runs per distinct argument string.
+    if not callable(arguments):
+        return [(arguments, chunk)]
+    groups = {}
+    for host in chunk:
+        groups.setdefault(arguments(host), []).append(host)
+    return list(groups.items())
+
+def _scan_chunk(chunk, arguments, scan_id=None):
+    # Finished chunks wait for the consumer as compact HostRecords, not dicts.
+    with default_metrics().stage('nmap'):
+        return [
+            item
+            for group_arguments, hosts in _group_by_arguments(chunk, arguments)
+            for item in default_backend().iter_scan(hosts, group_arguments, scan_id=scan_id)
+        ]
+
+def _by_target(hosts, results):
+    # nmap keys a hostname target by its resolved address; key it by the name that
+    # was asked for instead, which nmap reports back as the 'user' hostname.
+    requested = set(hosts)
+    names = {host.lower().rstrip('.'): host for host in hosts}
+    keyed = {}
+    for host, scan_result in results.items():
+        if host not in requested:
+            for hostname in scan_result.get('hostnames') or ():
+                name = (hostname.get('name') or '').lower().rstrip('.')
+                if hostname.get('type') == 'user' and name in names:
+                    host = names[name]
+                    break
+        keyed[host] = scan_result
+    return keyed
+
+def run_nmap_batch(targets, chunk_size=BATCH_CHUNK_SIZE, arguments=DEFAULT_ARGUMENTS, scan_id=None):
+    """Scan targets in chunks; results are keyed by target as given, hostnames included."""
+    results = {}
+    for chunk in chunk_targets(iter_targets(targets), chunk_size):
+        for group_arguments, hosts in _group_by_arguments(chunk, arguments):
+            results.update(_by_target(hosts, _scan(hosts, group_arguments, scan_id)))
+    return results
+
+def iter_nmap_batch(targets, chunk_size=STREAM_CHUNK_SIZE, arguments=DEFAULT_ARGUMENTS,
+                    parallelism=STREAM_PARALLELISM, scan_id=None):
+    """Yield (host, scan_result) as each small chunk finishes.
+
+    At most `parallelism` chunks are in flight, so memory stays bounded by
+    chunk_size * parallelism hosts regardless of how many targets are given.
+    """
+    chunks = chunk_targets(iter_targets(targets), chunk_size)
+    with ThreadPoolExecutor(max_workers=parallelism) as pool:
+        pending = set()
+        try:
+            for chunk in itertools.islice(chunks, parallelism):
+                pending.add(pool.submit(_scan_chunk, chunk, arguments, scan_id))
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    chunk = next(chunks, None)
+                    if chunk is not None:
+                        pending.add(pool.submit(_scan_chunk, chunk, arguments, scan_id))
+                    for host, record in future.result():
+                        yield host, record.to_scan_result()
+        finally:
+            for future in pending:
+                future.cancel()
+
+PROBE_ARGUMENTS = '-T4 -F'
+DEEP_ARGUMENTS = '-T4 -sV'
+SERVICE_FIELDS = ('name', 'product', 'version', 'extrainfo', 'cpe')
+
+def _scan_host(target_ip, arguments, scan_id=None):
+    results = _scan([target_ip], arguments, scan_id)
+    return next(iter(results.values()), None)
+
+def _open_ports(scan_result):
+    return {port for port, info in scan_result.get('tcp', {}).items() if info.get('state') == 'open'}
+
+def _port_list(ports):
+    return ','.join(str(port) for port in sorted(ports))
+
+def _service(info):
+    return {field: info.get(field, '') for field in SERVICE_FIELDS}
+
+def diff_scans(previous, current, deep_scanned=None):
+    """Opened and closed ports; with deep_scanned, also services that changed on those ports."""
+    previous_open = _open_ports(previous)
+    current_open = _open_ports(current)
+    diff = {
+        'opened': sorted(current_open - previous_open),
+        'closed': sorted(previous_open - current_open),
+    }
+    if deep_scanned is not None:
+        diff['changed_service'] = []
+        for port in sorted(set(deep_scanned) & previous_open & current_open):
+            before = _service(previous['tcp'][port])
+            after = _service(current['tcp'][port])
+            if before != after:
+                diff['changed_service'].append({'port': port, 'before': before, 'after': after})
+    return diff
+
+def run_incremental_scan(target_ip, previous=None, full=False, scan_id=None):
+    """Rescan a host, probing cheaply first and fingerprinting only what changed.
+
+    Returns (current, diff) where current is the merged scan_result and diff
+    lists opened and closed ports against `previous`. With no previous result
+    (or full=True) every port gets version detection and diff also lists
+    changed_service. Incremental mode leaves it out: ports that stayed open
+    are not fingerprinted again, so a changed service can't be seen.
+    """
+    if previous is None or full:
+        previous = previous or {}
+        current = _scan_host(target_ip, f'{DEFAULT_ARGUMENTS} -sV', scan_id)
+        if current is None:
+            current = down_result()
+        deep_scanned = sorted(_open_ports(current))
+        diff = diff_scans(previous, current, deep_scanned=deep_scanned)
+        diff.update(mode='full', deep_scanned=deep_scanned)
+        return current, diff
+
+    probe = _scan_host(target_ip, PROBE_ARGUMENTS, scan_id)
+    if probe is None:
+        current = down_result()
+        diff = diff_scans(previous, current)
+        diff.update(mode='incremental', deep_scanned=[])
+        return current, diff
+
+    ports = dict(probe.get('tcp', {}))
+    # Ports outside the fast probe's port set get their own cheap state check.
+    unprobed = _open_ports(previous) - set(ports)
+    if unprobed:
+        recheck = _scan_host(target_ip, f'-T4 -p {_port_list(unprobed)}', scan_id)
+        if recheck is not None:
+            ports.update(recheck.get('tcp', {}))
+
+    previous_ports = previous.get('tcp', {})
+    changed = {
+        port for port, info in ports.items()
+        if info.get('state') == 'open' and previous_ports.get(port, {}).get('state') != 'open'
+    }
+    deep = _scan_host(target_ip, f'{DEEP_ARGUMENTS} -p {_port_list(changed)}', scan_id) if changed else None
+    deep_ports = deep.get('tcp', {}) if deep is not None else {}
+
+    merged = {}
+    for port, info in ports.items():
+        if port in deep_ports:
+            merged[port] = deep_ports[port]
+        elif port not in changed and info.get('state') == previous_ports.get(port, {}).get('state'):
+            merged[port] = previous_ports[port]
+        else:
+            merged[port] = info
+
+    current = dict(probe)
+    current['tcp'] = merged
+    diff = diff_scans(previous, current)
+    diff.update(mode='incremental', deep_scanned=sorted(deep_ports))
+    return current, diff
@@ -0,0 +1,252 @@
+import io
+import sys
+import threading
+import xml.etree.ElementTree as ET
+from array import array
+
+READ_SIZE = 64 * 1024
+
+PORT_FIELDS = ('name', 'product', 'version', 'extrainfo', 'conf', 'cpe')
+# Code tables for the per-port arrays; unexpected values are appended.
+PORT_PROTOCOLS = ['tcp', 'udp', 'sctp', 'ip']
+PORT_STATES = ['open', 'closed', 'filtered', 'unfiltered', 'open|filtered', 'closed|filtered']
+_NO_SERVICE = ('',) * len(PORT_FIELDS)
+_codes = {id(table): {value: i for i, value in enumerate(table)} for table in (PORT_PROTOCOLS, PORT_STATES)}
+_codes_lock = threading.Lock()
+
+
+class NmapXMLError(Exception):
+    pass
+
+
+def _encode(table, value):
+    code = _codes[id(table)].get(value)
+    if code is None:
+        with _codes_lock:
+            code = _codes[id(table)].get(value)
+            if code is None:
+                code = len(table)
+                table.append(value)
+                _codes[id(table)][value] = code
+    return code
+
+
+# Frozen dicts and lists are tuples led by a tag, so {} and [] never compare equal.
+_DICT = '\0dict'
+_LIST = '\0list'
+# Identical frozen values (status, empty hostnames, common services) share one object.
+_shared = {}
+SHARED_LIMIT = 65536
+
+
+def _share(value):
+    if len(_shared) > SHARED_LIMIT:
+        _shared.clear()
+    return _shared.setdefault(value, value)
+
+
+def _freeze(value):
+    if isinstance(value, dict):
+        return _share((_DICT,) + tuple((sys.intern(key), _freeze(item)) for key, item in value.items()))
+    if isinstance(value, list):
+        return _share((_LIST,) + tuple(_freeze(item) for item in value))
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+def _thaw(value):
+    if isinstance(value, tuple) and value:
+        if value[0] == _DICT:
+            return {key: _thaw(item) for key, item in value[1:]}
+        if value[0] == _LIST:
+            return [_thaw(item) for item in value[1:]]
+    return value
+
+
+class HostRecord:
+    """One scanned host, kept compact until a caller needs the dict layout.
+
+    Each port is one packed uint32 (port, protocol code, state code) plus a
+    shared (reason, service fields) tuple; host-level fields are frozen into
+    tuples that are shared between hosts where they repeat. to_scan_result()
+    rebuilds python-nmap's scan_result dict with fresh objects.
+    """
+
+    __slots__ = ('host', 'head', 'tail', 'ports', 'details', 'port_extra')
+
+    def __init__(self, host, head, tail=None):
+        self.host = host
+        self.head = _freeze(head)
+        self.tail = _freeze(tail or {})
+        self.ports = array('I')
+        self.details = []
+        self.port_extra = None
+
+    def __len__(self):
+        return len(self.ports)
+
+    def add_port(self, protocol, port, state, reason, service=_NO_SERVICE, extra=None):
+        if extra:
+            if self.port_extra is None:
+                self.port_extra = {}
+            self.port_extra[len(self.ports)] = _freeze(extra)
+        self.ports.append(port | _encode(PORT_PROTOCOLS, protocol) << 16 | _encode(PORT_STATES, state) << 24)
+        self.details.append(_share((sys.intern(reason or ''), service)))
+
+    def to_scan_result(self):
+        scan_result = _thaw(self.head)
+        extras = self.port_extra or {}
+        for i, (packed, (reason, service)) in enumerate(zip(self.ports, self.details)):
+            info = {'state': PORT_STATES[packed >> 24], 'reason': reason}
+            info.update(zip(PORT_FIELDS, service))
+            if i in extras:
+                info.update(_thaw(extras[i]))
+            scan_result.setdefault(PORT_PROTOCOLS[packed >> 16 & 0xFF], {})[packed & 0xFFFF] = info
+        scan_result.update(_thaw(self.tail))
+        return scan_result
+
+    @classmethod
+    def from_scan_result(cls, host, scan_result):
+        """Compact a scan_result dict; missing service fields come back as ''."""
+        head, tail = {}, {}
+        ports = []
+        target = head
+        for key, value in scan_result.items():
+            # An empty port table ({'tcp': {}}) has no ports to pack; it is kept as a plain field.
+            if key in PORT_PROTOCOLS and isinstance(value, dict) and value:
+                target = tail
+                ports.extend((key, port, info) for port, info in value.items())
+            else:
+                target[key] = value
+        record = cls(host, head, tail)
+        for protocol, port, info in ports:
+            extra = {k: v for k, v in info.items() if k not in PORT_FIELDS and k not in ('state', 'reason')}
+            service = tuple(sys.intern(info.get(field) or '') for field in PORT_FIELDS)
+            record.add_port(protocol, int(port), info.get('state', ''), info.get('reason', ''), service, extra)
+        return record
+
+
+def parse_host_record(dhost):
+    """Convert one <host> element into a HostRecord."""
+    host = None
+    addresses = {}
+    vendor = {}
+    for address in dhost.findall('address'):
+        addrtype = address.get('addrtype')
+        addresses[addrtype] = address.get('addr')
+        if addrtype == 'ipv4':
+            host = addresses[addrtype]
+        elif addrtype == 'mac' and address.get('vendor') is not None:
+            vendor[addresses[addrtype]] = address.get('vendor')
+    if host is None:
+        host = dhost.find('address').get('addr')
+
+    hostnames = [
+        {'name': dhostname.get('name'), 'type': dhostname.get('type')}
+        for dhostname in dhost.findall('hostnames/hostname')
+    ] or [{'name': '', 'type': ''}]
+
+    head = {'hostnames': hostnames, 'addresses': addresses, 'vendor': vendor}
+    dstatus = dhost.find('status')
+    if dstatus is not None:
+        head['status'] = {'state': dstatus.get('state'), 'reason': dstatus.get('reason')}
+    duptime = dhost.find('uptime')
+    if duptime is not None:
+        head['uptime'] = {'seconds': duptime.get('seconds'), 'lastboot': duptime.get('lastboot')}
+    dtimes = dhost.find('times')
+    if dtimes is not None:
+        # Round-trip estimates in microseconds; scan profiles pick timing from srtt.
+        head['times'] = {'srtt': dtimes.get('srtt'), 'rttvar': dtimes.get('rttvar'), 'to': dtimes.get('to')}
+
+    record = HostRecord(host, head)
+    for dport in dhost.findall('ports/port'):
+        dstate = dport.find('state')
+        service = _NO_SERVICE
+        dservice = dport.find('service')
+        if dservice is not None:
+            cpe = ''
+            for dcpe in dservice.findall('cpe'):
+                cpe = dcpe.text
+            service = tuple(sys.intern(dservice.get(field) or '') for field in PORT_FIELDS[:-1]) + (cpe or '',)
+        scripts = {dscript.get('id'): dscript.get('output') for dscript in dport.findall('script')}
+        record.add_port(
+            dport.get('protocol'), int(dport.get('portid')), dstate.get('state'), dstate.get('reason'),
+            service, {'script': scripts} if scripts else None
+        )
+
+    tail = {}
+    hostscripts = [
+        {'id': dscript.get('id'), 'output': dscript.get('output')}
+        for dscript in dhost.findall('hostscript/script')
+    ]
+    if hostscripts:
+        tail['hostscript'] = hostscripts
+
+    dos = dhost.find('os')
+    if dos is not None:
+        tail['portused'] = [
+            {'state': used.get('state'), 'proto': used.get('proto'), 'portid': used.get('portid')}
+            for used in dos.findall('portused')
+        ]
+        tail['osmatch'] = [
+            {
+                'name': dosmatch.get('name'),
+                'accuracy': dosmatch.get('accuracy'),
+                'line': dosmatch.get('line'),
+                'osclass': [
+                    {
+                        'type': dosclass.get('type'),
+                        'vendor': dosclass.get('vendor'),
+                        'osfamily': dosclass.get('osfamily'),
+                        'osgen': dosclass.get('osgen'),
+                        'accuracy': dosclass.get('accuracy'),
+                        'cpe': [dcpe.text for dcpe in dosclass.findall('cpe')],
+                    }
+                    for dosclass in dosmatch.findall('osclass')
+                ],
+            }
+            for dosmatch in dos.findall('osmatch')
+        ]
+    record.tail = _freeze(tail)
+    return record
+
+
+def parse_host(dhost):
+    """Convert one <host> element into (host, scan_result) in python-nmap's layout."""
+    record = parse_host_record(dhost)
+    return record.host, record.to_scan_result()
+
+
+def iter_nmap_xml(stream, read_size=READ_SIZE):
+    """Yield a HostRecord per <host> as soon as nmap closes it.
+
+    `stream` is a binary file object (e.g. nmap's stdout with -oX -). Only
+    the host being parsed is kept as a tree, so memory stays flat however
+    many hosts the document holds.
+    """
+    parser = ET.XMLPullParser(events=('start', 'end'))
+    root = None
+    try:
+        while True:
+            data = stream.read(read_size)
+            if data:
+                parser.feed(data)
+            else:
+                parser.close()
+            for event, elem in parser.read_events():
+                if root is None:
+                    root = elem
+                elif event == 'end' and elem.tag == 'host':
+                    yield parse_host_record(elem)
+                    # Finished hosts (and hosthints, runstats...) hang off the root.
+                    root.clear()
+            if not data:
+                return
+    except ET.ParseError as e:
+        raise NmapXMLError(f'Invalid nmap XML output: {e}') from e
+
+
+def parse_nmap_xml(xml):
+    """Parse a complete nmap -oX document into {host: scan_result}."""
+    if isinstance(xml, str):
+        xml = xml.encode()
+    return {record.host: record.to_scan_result() for record in iter_nmap_xml(io.BytesIO(xml))}
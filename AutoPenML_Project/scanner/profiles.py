@@ -0,0 +1,142 @@
+import math
+import os
+import shlex
+import time
+
+from scanner.nmap_scanner import DEFAULT_ARGUMENTS
+
+SCAN_PROFILE = os.environ.get('AUTOPENML_SCAN_PROFILE', 'auto')
+# How far back a host's open ports and RTT are considered.
+PROFILE_WINDOW = float(os.environ.get('AUTOPENML_PROFILE_WINDOW', str(30 * 86400)))
+# Known hosts still get a broad scan this often so new services are found.
+PROFILE_REFRESH = float(os.environ.get('AUTOPENML_PROFILE_REFRESH', str(7 * 86400)))
+
+# srtt upper bounds (ms) for the timing bands.
+LAN_RTT_MS = 5.0
+WAN_RTT_MS = 100.0
+
+TIMINGS = {
+    'lan': '-T5 --min-rate 1000 --max-retries 1',
+    'default': '-T4',
+    'wan': '-T3 --max-retries 3',
+}
+# Probed on top of a known host's ports so a new common service still shows up between refreshes.
+SENTINEL_PORTS = (21, 22, 23, 25, 53, 80, 110, 139, 143, 443, 445, 3306, 3389, 5432, 5900, 6379, 8080, 8443)
+
+# Fixed profiles selectable per request; 'auto' builds one from the host's history.
+PROFILES = {
+    'broad': DEFAULT_ARGUMENTS,
+    'lan': f"{TIMINGS['lan']} -F",
+    'wan': f"{TIMINGS['wan']} -F",
+    'thorough': '-T4 --top-ports 1000',
+}
+
+
+class ScanProfile:
+    __slots__ = ('name', 'arguments', 'reason')
+
+    def __init__(self, name, arguments, reason):
+        self.name = name
+        self.arguments = arguments
+        self.reason = reason
+
+    def to_dict(self):
+        return {'name': self.name, 'arguments': self.arguments, 'reason': self.reason}
+
+
+def is_targeted(arguments):
+    """True for scans limited to an explicit port list (their results can't reveal new ports)."""
+    return '-p' in shlex.split(arguments or '')
+
+
+def timing_for(rtt_ms):
+    if rtt_ms is None:
+        return 'default'
+    if rtt_ms < LAN_RTT_MS:
+        return 'lan'
+    if rtt_ms < WAN_RTT_MS:
+        return 'default'
+    return 'wan'
+
+
+def _rtt_options(band, rtt_ms):
+    if band != 'wan':
+        return ''
+    # Start nmap's retransmit timer near the measured RTT rather than its 1s default. The RTT
+    # is rounded up to a power of two so jitter between scans doesn't change the arguments.
+    rtt_ms = 2 ** math.ceil(math.log2(rtt_ms))
+    return f' --initial-rtt-timeout {rtt_ms * 3}ms --max-rtt-timeout {rtt_ms * 10}ms'
+
+
+def check_profile(requested):
+    if requested not in (None, 'auto') and requested not in PROFILES:
+        raise ValueError(f"Unknown scan profile: {requested} (choose from auto, {', '.join(PROFILES)})")
+
+
+def cache_arguments(requested=None):
+    """What results are cached under: a fixed profile's arguments, or 'profile:auto'.
+
+    The arguments auto picks change from scan to scan (a broad sweep, then the
+    known ports), so the cache is keyed on the profile name instead and looked
+    up before a profile is chosen.
+    """
+    requested = requested or SCAN_PROFILE
+    return PROFILES.get(requested, f'profile:{requested}')
+
+
+def cached_profile(requested=None):
+    # Only the scan result is cached, so a hit can't say which auto profile produced it.
+    requested = requested or SCAN_PROFILE
+    return ScanProfile(requested, PROFILES.get(requested), 'cached result')
+
+
+class ProfileEngine:
+    """Pick nmap arguments per host from its scan history.
+
+    `history` provides host_summary(host, since) -> {'rtt_ms', 'open_ports',
+    'scans'} (see ScanHistory); 'scans' lists only scans that found the host
+    up. Hosts never seen up, or not broadly scanned within `refresh` seconds,
+    get the broad -F port set; known hosts get their previously open ports
+    plus SENTINEL_PORTS. Timing follows the measured round-trip time either
+    way.
+    """
+
+    def __init__(self, history, window=PROFILE_WINDOW, refresh=PROFILE_REFRESH):
+        self.history = history
+        self.window = window
+        self.refresh = refresh
+
+    def choose(self, host, requested=None, now=None):
+        requested = requested or SCAN_PROFILE
+        check_profile(requested)
+        if requested in PROFILES:
+            return ScanProfile(requested, PROFILES[requested], 'requested')
+
+        now = now or time.time()
+        summary = self.history.host_summary(host, since=now - self.window)
+        rtt_ms = summary['rtt_ms']
+        band = timing_for(rtt_ms)
+        timing = TIMINGS[band] + _rtt_options(band, rtt_ms)
+        rtt_note = f'srtt {rtt_ms:.1f}ms' if rtt_ms is not None else 'no RTT yet'
+        broad = [scanned_at for scanned_at, arguments in summary['scans'] if not is_targeted(arguments)]
+        if not broad:
+            return ScanProfile(f'auto-{band}-broad', f'{timing} -F', f'unknown host, {rtt_note}')
+        if now - broad[0] > self.refresh:
+            return ScanProfile(f'auto-{band}-broad', f'{timing} -F', f'broad refresh due, {rtt_note}')
+        known = sorted(port for protocol, port in summary['open_ports'] if protocol == 'tcp')
+        ports = sorted(set(known) | set(SENTINEL_PORTS))
+        return ScanProfile(
+            f'auto-{band}-known',
+            f"{timing} -p {','.join(map(str, ports))}",
+            f'{len(known)} known open port(s), {rtt_note}'
+        )
+
+    def arguments_for(self, requested=None):
+        """host -> arguments for batch scans, memoized so history records what ran."""
+        chosen = {}
+
+        def arguments(host):
+            if host not in chosen:
+                chosen[host] = self.choose(host, requested).arguments
+            return chosen[host]
+        return arguments
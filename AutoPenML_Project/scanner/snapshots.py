@@ -0,0 +1,34 @@
+import os
+import pickle
+import time
+
+from service.process_local import sqlite_connector
+
+SNAPSHOT_PATH = os.environ.get('AUTOPENML_SNAPSHOT_PATH', 'scan_snapshots.sqlite3')
+
+
+class SnapshotStore:
+    """Latest merged scan_result per host, used as the baseline for incremental rescans."""
+
+    def __init__(self, path=SNAPSHOT_PATH):
+        self.path = path
+        self._connect = sqlite_connector(path)
+        with self._connect() as conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS snapshots ('
+                'host TEXT PRIMARY KEY, value BLOB NOT NULL, scanned_at REAL NOT NULL)'
+            )
+
+    def get(self, host):
+        row = self._connect().execute('SELECT scanned_at, value FROM snapshots WHERE host = ?', (host,)).fetchone()
+        if row is None:
+            return None
+        return row[0], pickle.loads(row[1])
+
+    def set(self, host, scan_result):
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO snapshots (host, value, scanned_at) VALUES (?, ?, ?)',
+                (host, pickle.dumps(scan_result, protocol=pickle.HIGHEST_PROTOCOL), time.time()),
+            )
@@ -0,0 +1,100 @@
+import ipaddress
+import os
+import time
+import uuid
+
+from service.process_local import sqlite_connector
+
+# Concurrent nmap processes allowed per target subnet across all workers; 0 disables the cap.
+SUBNET_CAP = int(os.environ.get('AUTOPENML_SUBNET_CAP', '4'))
+SUBNET_PREFIX_V4 = int(os.environ.get('AUTOPENML_SUBNET_PREFIX', '24'))
+SUBNET_PREFIX_V6 = int(os.environ.get('AUTOPENML_SUBNET_PREFIX_V6', '64'))
+LEASE_PATH = os.environ.get('AUTOPENML_SUBNET_LEASE_PATH', 'scan_leases.sqlite3')
+
+
+def subnet_of(host, prefix_v4=SUBNET_PREFIX_V4, prefix_v6=SUBNET_PREFIX_V6):
+    """The subnet a target falls in; hostnames count as their own subnet."""
+    try:
+        network = ipaddress.ip_network(host.strip(), strict=False)
+    except ValueError:
+        return host.strip().lower().rstrip('.')
+    prefix = prefix_v4 if network.version == 4 else prefix_v6
+    if network.prefixlen > prefix:
+        network = network.supernet(new_prefix=prefix)
+    return str(network)
+
+
+class SubnetLeases:
+    """Cap concurrent scans per target subnet, shared by every worker through SQLite.
+
+    A scan takes one lease per subnet its hosts fall in, all or none in one
+    IMMEDIATE transaction, and holds them until its nmap process exits.
+    Leases carry an expiry (the scan's hard deadline), so those left behind
+    by a crashed worker stop counting on their own.
+    """
+
+    def __init__(self, path=LEASE_PATH, cap=SUBNET_CAP, prefix_v4=SUBNET_PREFIX_V4, prefix_v6=SUBNET_PREFIX_V6):
+        self.path = path
+        self.cap = cap
+        self.prefix_v4 = prefix_v4
+        self.prefix_v6 = prefix_v6
+        # Autocommit, so try_acquire can open its own IMMEDIATE transaction.
+        self._connect = sqlite_connector(path, isolation_level=None)
+        conn = self._connect()
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS subnet_leases ('
+            'token TEXT NOT NULL, subnet TEXT NOT NULL, expires_at REAL NOT NULL)'
+        )
+        conn.execute('CREATE INDEX IF NOT EXISTS subnet_leases_subnet ON subnet_leases (subnet, expires_at)')
+        conn.execute('CREATE INDEX IF NOT EXISTS subnet_leases_token ON subnet_leases (token)')
+
+    def subnets(self, hosts):
+        return sorted({subnet_of(host, self.prefix_v4, self.prefix_v6) for host in hosts})
+
+    def try_acquire(self, hosts, ttl, now=None):
+        """Lease every subnet of `hosts` if all are under the cap; returns a token or None."""
+        now = time.time() if now is None else now
+        subnets = self.subnets(hosts)
+        token = uuid.uuid4().hex
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.execute('DELETE FROM subnet_leases WHERE expires_at < ?', (now,))
+            for subnet in subnets:
+                held = conn.execute('SELECT COUNT(*) FROM subnet_leases WHERE subnet = ?', (subnet,)).fetchone()[0]
+                if held >= self.cap:
+                    conn.execute('ROLLBACK')
+                    return None
+            conn.executemany(
+                'INSERT INTO subnet_leases (token, subnet, expires_at) VALUES (?, ?, ?)',
+                [(token, subnet, now + ttl) for subnet in subnets]
+            )
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        return token
+
+    def acquire(self, hosts, ttl, check=None, poll=0.25):
+        """Wait for leases on every subnet of `hosts`; check() may raise to give up."""
+        while True:
+            token = self.try_acquire(hosts, ttl)
+            if token is not None:
+                return token
+            if check is not None:
+                check()
+            time.sleep(poll)
+
+    def renew(self, token, ttl):
+        self._connect().execute(
+            'UPDATE subnet_leases SET expires_at = ? WHERE token = ?', (time.time() + ttl, token)
+        )
+
+    def release(self, token):
+        self._connect().execute('DELETE FROM subnet_leases WHERE token = ?', (token,))
+
+    def held(self):
+        rows = self._connect().execute(
+            'SELECT subnet, COUNT(*) FROM subnet_leases WHERE expires_at >= ? GROUP BY subnet', (time.time(),)
+        )
+        return dict(rows.fetchall())
@@ -0,0 +1,156 @@
+import itertools
+import os
+import queue
+import threading
+from collections import deque
+
+
+def parse_weights(value):
+    """'alice=4,bob=0.5' -> {'alice': 4.0, 'bob': 0.5}."""
+    weights = {}
+    for part in (value or '').split(','):
+        name, _, weight = part.strip().rpartition('=')
+        if name:
+            weights[name.strip()] = float(weight)
+    return weights
+
+
+# Relative share of scan capacity per client; clients not listed get 1.
+CLIENT_WEIGHTS = parse_weights(os.environ.get('AUTOPENML_CLIENT_WEIGHTS', ''))
+
+
+class FairQueue:
+    """Weighted fair queue over per-flow FIFOs (start-time fair queuing).
+
+    Each item is tagged start = max(virtual time, its flow's last finish)
+    and finish = start + cost / weight; get() returns the flow head with
+    the smallest finish tag and advances virtual time to its start. A flow
+    with a deep backlog therefore cannot hold back a newcomer, whose first
+    item is tagged from the current virtual time rather than behind the
+    backlog, and over time each busy flow gets capacity in proportion to
+    its weight. Put/get mirror queue.Queue (queue.Full, queue.Empty).
+    """
+
+    def __init__(self, maxsize=0, weights=None):
+        self.maxsize = maxsize
+        self.weights = CLIENT_WEIGHTS if weights is None else weights
+        self._flows = {}
+        self._last_finish = {}
+        self._virtual = 0.0
+        self._size = 0
+        self._closed = False
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+
+    def qsize(self):
+        return self._size
+
+    def full(self):
+        return 0 < self.maxsize <= self._size
+
+    def put(self, item, flow=None, cost=1):
+        with self._cond:
+            if self.full():
+                raise queue.Full
+            start, finish = self._tag(flow, cost)
+            self._flows.setdefault(flow, deque()).append((finish, next(self._seq), start, item))
+            self._size += 1
+            self._cond.notify()
+
+    def charge(self, flow=None, cost=1):
+        """Account for work `flow` got without queueing, as if put() and served at once."""
+        with self._cond:
+            start, _ = self._tag(flow, cost)
+            self._virtual = max(self._virtual, start)
+
+    def get(self, timeout=None):
+        """Next item in fair order; None once close() was called and the queue is drained."""
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._size or self._closed, timeout):
+                raise queue.Empty
+            if not self._size:
+                return None
+            return self._pop()
+
+    def get_nowait(self):
+        with self._cond:
+            if not self._size:
+                raise queue.Empty
+            return self._pop()
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def _tag(self, flow, cost):
+        start = max(self._virtual, self._last_finish.get(flow, 0.0))
+        finish = start + max(cost, 1) / self.weights.get(flow, 1.0)
+        self._last_finish[flow] = finish
+        return start, finish
+
+    def _pop(self):
+        # Ties on the finish tag go to the earlier put.
+        flow = min(self._flows, key=lambda name: self._flows[name][0][:2])
+        items = self._flows[flow]
+        _, _, start, item = items.popleft()
+        if not items:
+            del self._flows[flow]
+        self._size -= 1
+        self._virtual = max(self._virtual, start)
+        # Idle flows whose last finish is behind virtual time would be tagged from it anyway.
+        for name in [name for name, finish in self._last_finish.items()
+                     if finish <= self._virtual and name not in self._flows]:
+            del self._last_finish[name]
+        return item
+
+
+class _Waiter:
+    __slots__ = ('granted', 'abandoned')
+
+    def __init__(self):
+        self.granted = threading.Event()
+        self.abandoned = False
+
+
+class FairSlots:
+    """A counting semaphore that hands freed slots to waiters in weighted-fair order."""
+
+    def __init__(self, slots, weights=None):
+        self.slots = slots
+        self._free = slots
+        self._waiting = FairQueue(weights=weights)
+        self._lock = threading.Lock()
+
+    def acquire(self, flow=None, cost=1, check=None, poll=0.5):
+        """Block until a slot is granted; check() runs every `poll` seconds and may raise to give up."""
+        with self._lock:
+            if self._free > 0 and not self._waiting.qsize():
+                self._free -= 1
+                self._waiting.charge(flow, cost)
+                return
+            waiter = _Waiter()
+            self._waiting.put(waiter, flow, cost)
+        try:
+            while not waiter.granted.wait(poll):
+                if check is not None:
+                    check()
+        except BaseException:
+            with self._lock:
+                if waiter.granted.is_set():
+                    self._release_locked()
+                else:
+                    waiter.abandoned = True
+            raise
+
+    def release(self):
+        with self._lock:
+            self._release_locked()
+
+    def _release_locked(self):
+        while self._waiting.qsize():
+            waiter = self._waiting.get_nowait()
+            if not waiter.abandoned:
+                waiter.granted.set()
+                return
+        self._free += 1
@@ -0,0 +1,175 @@
+import os
+import re
+import time
+from datetime import datetime
+
+from service.process_local import sqlite_connector
+
+HISTORY_PATH = os.environ.get('AUTOPENML_HISTORY_PATH', 'scan_history.sqlite3')
+QUERY_LIMIT = 1000
+MAX_QUERY_LIMIT = 10000
+
+_RELATIVE_RE = re.compile(r'^(\d+)([smhdw])$')
+_UNIT_SECONDS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400, 'w': 604800}
+
+_SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS scans ('
+    'id INTEGER PRIMARY KEY, host TEXT NOT NULL, scanned_at INTEGER NOT NULL, state TEXT, '
+    'arguments TEXT, model_version INTEGER, job_id TEXT)',
+    'CREATE TABLE IF NOT EXISTS ports ('
+    'scan_id INTEGER NOT NULL, host TEXT NOT NULL, scanned_at INTEGER NOT NULL, port INTEGER NOT NULL, '
+    'protocol TEXT NOT NULL, state TEXT, service TEXT, product TEXT, version TEXT, prediction INTEGER)',
+    'CREATE INDEX IF NOT EXISTS scans_host_time ON scans (host, scanned_at)',
+    'CREATE INDEX IF NOT EXISTS ports_port_time ON ports (port, scanned_at)',
+    'CREATE INDEX IF NOT EXISTS ports_host_time ON ports (host, scanned_at)',
+    'CREATE INDEX IF NOT EXISTS ports_service_time ON ports (service, scanned_at)',
+    'CREATE INDEX IF NOT EXISTS ports_time ON ports (scanned_at)',
+)
+# Columns added after the first release: (table, column, type).
+_MIGRATIONS = (
+    ('scans', 'rtt_ms', 'REAL'),
+)
+SUMMARY_SCANS = 50
+
+
+def parse_time(value, now=None):
+    """Accept epoch seconds, an ISO 8601 timestamp or a relative age like '7d'."""
+    if value is None or value == '':
+        return None
+    value = str(value).strip()
+    match = _RELATIVE_RE.match(value)
+    if match:
+        return int((now or time.time()) - int(match.group(1)) * _UNIT_SECONDS[match.group(2)])
+    try:
+        return int(float(value))
+    except ValueError:
+        return int(datetime.fromisoformat(value).timestamp())
+
+
+def parse_port(value):
+    """A TCP/UDP port number (1-65535), or None when absent."""
+    if value is None or value == '':
+        return None
+    port = int(value)
+    if not 1 <= port <= 65535:
+        raise ValueError(f'port out of range: {port}')
+    return port
+
+
+class ScanHistory:
+    """Append-only scan and prediction history with indexed lookups."""
+
+    def __init__(self, path=HISTORY_PATH):
+        self.path = path
+        self._connect = sqlite_connector(path, pragmas=('synchronous=NORMAL',))
+        conn = self._connect()
+        with conn:
+            for statement in _SCHEMA:
+                conn.execute(statement)
+            for table, column, kind in _MIGRATIONS:
+                columns = {row[1] for row in conn.execute(f'PRAGMA table_info({table})')}
+                if column not in columns:
+                    conn.execute(f'ALTER TABLE {table} ADD COLUMN {column} {kind}')
+
+    def record(self, results, arguments=None, model_version=None, job_id=None, scanned_at=None):
+        """Write {host: (scan_result, predictions)} in one transaction.
+
+        predictions are in the predictor's port order (per protocol in
+        PROTOCOLS order), as returned by predict_vulnerabilities. arguments
+        may also be a {host: arguments} dict when hosts used different scans.
+        """
+        from ml_model.features import PROTOCOLS
+
+        scanned_at = int(scanned_at or time.time())
+        conn = self._connect()
+        with conn:
+            for host, (scan_result, predictions) in results.items():
+                cursor = conn.execute(
+                    'INSERT INTO scans (host, scanned_at, state, arguments, model_version, job_id, rtt_ms) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                    (host, scanned_at, scan_result.get('status', {}).get('state'),
+                     arguments.get(host) if isinstance(arguments, dict) else arguments,
+                     model_version, job_id, _rtt_ms(scan_result)),
+                )
+                scan_id = cursor.lastrowid
+                ports = (
+                    (scan_id, host, scanned_at, port, protocol, info.get('state'), info.get('name'),
+                     info.get('product'), info.get('version'))
+                    for protocol in PROTOCOLS
+                    for port, info in scan_result.get(protocol, {}).items()
+                )
+                conn.executemany(
+                    'INSERT INTO ports (scan_id, host, scanned_at, port, protocol, state, service, product, '
+                    'version, prediction) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                    (row + (prediction,) for row, prediction in zip(ports, _padded(predictions))),
+                )
+
+    def query(self, host=None, port=None, service=None, protocol=None, state=None, since=None, until=None,
+              distinct_hosts=False, limit=QUERY_LIMIT):
+        clauses, params = [], []
+        for column, value in (('host', host), ('port', port), ('service', service),
+                              ('protocol', protocol), ('state', state)):
+            if value is not None:
+                clauses.append(f'{column} = ?')
+                params.append(value)
+        if since is not None:
+            clauses.append('scanned_at >= ?')
+            params.append(since)
+        if until is not None:
+            clauses.append('scanned_at < ?')
+            params.append(until)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+        limit = max(1, min(int(limit), MAX_QUERY_LIMIT))
+        conn = self._connect()
+        if distinct_hosts:
+            rows = conn.execute(
+                f'SELECT host, MAX(scanned_at), COUNT(*) FROM ports {where} GROUP BY host '
+                f'ORDER BY MAX(scanned_at) DESC LIMIT ?', params + [limit],
+            ).fetchall()
+            return [{'host': h, 'last_seen': last_seen, 'observations': n} for h, last_seen, n in rows]
+        rows = conn.execute(
+            f'SELECT host, scanned_at, port, protocol, state, service, product, version, prediction '
+            f'FROM ports {where} ORDER BY scanned_at DESC LIMIT ?', params + [limit],
+        ).fetchall()
+        fields = ('host', 'scanned_at', 'port', 'protocol', 'state', 'service', 'product', 'version', 'prediction')
+        return [dict(zip(fields, row)) for row in rows]
+
+    def host_summary(self, host, since=None):
+        """What scan profiles need about one host: median recent srtt, ports seen open, recent scans.
+
+        Only scans that found the host up are listed; one that found it down or
+        unreachable says nothing about its ports.
+        """
+        since = since or 0
+        conn = self._connect()
+        rtts = sorted(row[0] for row in conn.execute(
+            'SELECT rtt_ms FROM scans WHERE host = ? AND scanned_at >= ? AND rtt_ms IS NOT NULL '
+            'ORDER BY scanned_at DESC LIMIT 5', (host, since),
+        ))
+        scans = conn.execute(
+            "SELECT scanned_at, arguments FROM scans WHERE host = ? AND scanned_at >= ? AND state = 'up' "
+            'ORDER BY scanned_at DESC LIMIT ?', (host, since, SUMMARY_SCANS),
+        ).fetchall()
+        open_ports = conn.execute(
+            "SELECT DISTINCT protocol, port FROM ports WHERE host = ? AND scanned_at >= ? AND state = 'open'",
+            (host, since),
+        ).fetchall()
+        return {
+            'rtt_ms': rtts[len(rtts) // 2] if rtts else None,
+            'open_ports': [tuple(row) for row in open_ports],
+            'scans': [tuple(row) for row in scans],
+        }
+
+
+def _rtt_ms(scan_result):
+    srtt = (scan_result.get('times') or {}).get('srtt')
+    try:
+        return int(srtt) / 1000 if srtt else None
+    except ValueError:
+        return None
+
+
+def _padded(predictions):
+    yield from predictions
+    while True:
+        yield None
@@ -0,0 +1,199 @@
+import threading
+import time
+import uuid
+
+from service.fair_queue import FairQueue
+
+
+class QueueFull(Exception):
+    pass
+
+
+class Job:
+    def __init__(self, func, params, client=None, cost=1):
+        self.id = uuid.uuid4().hex
+        self.func = func
+        self.params = params
+        self.client = client
+        self.cost = cost
+        self.status = 'queued'
+        self.cancel_requested = False
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+
+    @property
+    def done(self):
+        return self.status in ('finished', 'failed', 'cancelled')
+
+    def to_dict(self):
+        job = {
+            'job_id': self.id,
+            'status': self.status,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+        }
+        if self.status == 'finished':
+            job['result'] = self.result
+        elif self.status == 'failed':
+            job['error'] = self.error
+        return job
+
+
+class JobQueue:
+    """Bounded in-process job queue.
+
+    Queued jobs are dispatched in weighted-fair order across clients (see
+    FairQueue), with each job's cost its host count, so one client's large
+    backlog does not delay another client's next job. With a `store` (service.job_store.JobStore) job state is mirrored to a
+    database so any worker process can answer status and cancel requests;
+    a watcher thread applies cancels that arrive through other workers.
+    """
+
+    def __init__(self, workers=4, max_pending=64, retention=3600, on_cancel=None, on_finish=None,
+                 store=None, watch_interval=1.0, on_start=None, weights=None):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.retention = retention
+        # on_start(job_id, client) runs before a job; on_cancel(job_id) stops a running
+        # job's work; on_finish(job_id) runs after every job.
+        self.on_start = on_start
+        self.on_cancel = on_cancel
+        self.on_finish = on_finish
+        self.store = store
+        self.watch_interval = watch_interval
+        self._queue = FairQueue(maxsize=max_pending, weights=weights)
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._threads = []
+        self._stopping = threading.Event()
+
+    @property
+    def depth(self):
+        return self._queue.qsize()
+
+    @property
+    def running(self):
+        with self._lock:
+            return sum(1 for job in self._jobs.values() if job.status == 'running')
+
+    def start(self):
+        # Threads start on first use so they belong to the process that
+        # serves requests, not to a parent that forks workers afterwards.
+        with self._lock:
+            if self._threads:
+                return
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._work, name=f'scan-worker-{i}', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+            if self.store is not None:
+                threading.Thread(target=self._watch_cancels, name='scan-cancel-watcher', daemon=True).start()
+
+    def submit(self, func, params, client=None, cost=1):
+        if self._stopping.is_set():
+            raise QueueFull('Server is shutting down')
+        self.start()
+        self._prune()
+        job = Job(func, params, client=client, cost=cost)
+        with self._lock:
+            # Only submit() adds jobs and it holds the lock, so a free slot
+            # seen here is still free at put time. The queued state is saved
+            # first so a fast worker's 'running' update is never overwritten.
+            if self._queue.full():
+                raise QueueFull(f'Scan queue is full ({self.max_pending} pending jobs)')
+            self._jobs[job.id] = job
+            self._save(job)
+            self._queue.put(job, client, cost)
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def status(self, job_id):
+        """Job status as a dict, from this process or the shared store."""
+        job = self.get(job_id)
+        if job is not None:
+            return job.to_dict()
+        if self.store is not None:
+            return self.store.load(job_id)
+        return None
+
+    def cancel(self, job_id):
+        """Cancel a queued or running job; returns its status dict, or None if unknown."""
+        job = self.get(job_id)
+        if job is None:
+            if self.store is not None:
+                self.store.request_cancel(job_id)
+            return self.status(job_id)
+        if not job.done:
+            job.cancel_requested = True
+            if job.status == 'queued':
+                job.status = 'cancelled'
+                job.finished_at = time.time()
+                self._save(job)
+            elif self.on_cancel is not None:
+                self.on_cancel(job.id)
+        return job.to_dict()
+
+    def shutdown(self, timeout=None):
+        """Stop accepting jobs, drain queued and running ones, cancel what is left at the deadline."""
+        self._stopping.set()
+        # Workers drain what is queued, then get None and exit.
+        self._queue.close()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for thread in self._threads:
+            thread.join(None if deadline is None else max(0, deadline - time.monotonic()))
+        with self._lock:
+            leftover = [job for job in self._jobs.values() if not job.done]
+        for job in leftover:
+            self.cancel(job.id)
+
+    def _save(self, job):
+        if self.store is not None:
+            self.store.save(job)
+
+    def _work(self):
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            if job.cancel_requested:
+                continue
+            job.status = 'running'
+            job.started_at = time.time()
+            self._save(job)
+            try:
+                if self.on_start is not None:
+                    self.on_start(job.id, job.client)
+                job.result = job.func(job)
+                job.status = 'finished'
+            except Exception as e:
+                job.error = str(e)
+                job.status = 'cancelled' if job.cancel_requested else 'failed'
+            finally:
+                job.finished_at = time.time()
+                job.func = None
+                if self.on_finish is not None:
+                    self.on_finish(job.id)
+                self._save(job)
+
+    def _watch_cancels(self):
+        while not self._stopping.wait(self.watch_interval):
+            with self._lock:
+                active = [job.id for job in self._jobs.values() if not job.done]
+            for job_id in self.store.cancel_requests(active):
+                self.cancel(job_id)
+
+    def _prune(self):
+        cutoff = time.time() - self.retention
+        with self._lock:
+            expired = [job_id for job_id, job in self._jobs.items() if job.done and job.finished_at < cutoff]
+            for job_id in expired:
+                del self._jobs[job_id]
+        if self.store is not None:
+            self.store.prune(cutoff)
@@ -0,0 +1,53 @@
+from service.process_local import sqlite_connector
+from service.serialization import dumps, loads
+
+
+class JobStore:
+    """Job status shared by every worker process through one SQLite file."""
+
+    def __init__(self, path):
+        self.path = path
+        self._connect = sqlite_connector(path)
+        with self._connect() as conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS jobs ('
+                'id TEXT PRIMARY KEY, status TEXT NOT NULL, finished_at REAL, '
+                'cancel_requested INTEGER NOT NULL DEFAULT 0, body TEXT NOT NULL)'
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS jobs_finished ON jobs (finished_at)')
+
+    def save(self, job):
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                'INSERT INTO jobs (id, status, finished_at, body) VALUES (?, ?, ?, ?) '
+                'ON CONFLICT (id) DO UPDATE SET status = excluded.status, '
+                'finished_at = excluded.finished_at, body = excluded.body',
+                (job.id, job.status, job.finished_at, dumps(job.to_dict()).decode()),
+            )
+
+    def load(self, job_id):
+        row = self._connect().execute('SELECT body FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        return loads(row[0]) if row else None
+
+    def request_cancel(self, job_id):
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                "UPDATE jobs SET cancel_requested = 1 WHERE id = ? AND status IN ('queued', 'running')",
+                (job_id,),
+            )
+
+    def cancel_requests(self, job_ids):
+        if not job_ids:
+            return set()
+        placeholders = ','.join('?' * len(job_ids))
+        rows = self._connect().execute(
+            f'SELECT id FROM jobs WHERE cancel_requested = 1 AND id IN ({placeholders})', list(job_ids)
+        ).fetchall()
+        return {row[0] for row in rows}
+
+    def prune(self, cutoff):
+        conn = self._connect()
+        with conn:
+            conn.execute('DELETE FROM jobs WHERE finished_at < ?', (cutoff,))
@@ -0,0 +1,222 @@
+import bisect
+import json
+import os
+import threading
+import time
+
+from service.process_local import alive, lazy_singleton
+
+# Shared directory for multi-process servers (gunicorn sets it); unset keeps metrics in this process only.
+METRICS_DIR = os.environ.get('AUTOPENML_METRICS_DIR')
+FLUSH_INTERVAL = float(os.environ.get('AUTOPENML_METRICS_FLUSH_INTERVAL', '5'))
+# Seconds, from a sub-millisecond feature build to a multi-minute nmap chunk.
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+STAGE_METRIC = 'autopenml_stage_seconds'
+
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return '{' + ','.join(f'{key}="{value}"' for (key, _), value in zip(pairs, escaped)) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Timer:
+    # A plain class rather than @contextmanager: stage timers wrap every request.
+    __slots__ = ('metrics', 'name', 'labels', 'start')
+
+    def __init__(self, metrics, name, labels):
+        self.metrics = metrics
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.metrics.observe(self.name, time.perf_counter() - self.start, **self.labels)
+
+
+class Metrics:
+    """Prometheus-style histograms, counters and gauges with no dependencies.
+
+    observe() is one lock, one bisect and two additions, so stage timers can
+    stay on in production. Counters and gauges owned elsewhere (queue depth,
+    cache hits) are registered as callbacks and only read when scraped or
+    flushed. With `directory` set, each process writes its values to
+    <directory>/<pid>.json every `flush_interval` seconds and render() merges
+    all of them, so a scrape answered by any gunicorn worker covers the whole
+    server. Exited workers keep contributing their counters and histograms;
+    their gauges are dropped.
+    """
+
+    def __init__(self, directory=METRICS_DIR, flush_interval=FLUSH_INTERVAL, buckets=BUCKETS):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self.buckets = tuple(buckets)
+        self._help = {}
+        self._histograms = {}
+        self._callbacks = {}
+        self._lock = threading.Lock()
+        self._flusher_pid = None
+        self.describe(STAGE_METRIC, 'Time spent in each stage of the scan pipeline.')
+
+    def describe(self, name, help):
+        self._help[name] = help
+
+    def observe(self, name, value, **labels):
+        index = bisect.bisect_left(self.buckets, value)
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            histogram[0][index] += 1
+            histogram[1] += value
+        if self.directory and self._flusher_pid != os.getpid():
+            self._start_flusher()
+
+    def timer(self, name, **labels):
+        return _Timer(self, name, labels)
+
+    def stage(self, stage):
+        return self.timer(STAGE_METRIC, stage=stage)
+
+    def counter(self, name, fn, help=''):
+        """Register a running total kept by another object; fn() is read at scrape time."""
+        self._callbacks[name] = ('counter', 'sum', fn)
+        self.describe(name, help)
+
+    def gauge(self, name, fn, help='', aggregate='sum'):
+        """Register a current value; across processes it is summed, or use aggregate='max'/'min'."""
+        self._callbacks[name] = ('gauge', aggregate, fn)
+        self.describe(name, help)
+
+    def snapshot(self):
+        with self._lock:
+            histograms = [
+                [name, list(labels), list(counts), total]
+                for (name, labels), (counts, total) in self._histograms.items()
+            ]
+        values = []
+        for name, (kind, aggregate, fn) in list(self._callbacks.items()):
+            try:
+                value = fn()
+            except Exception:
+                continue
+            if value is not None:
+                values.append([name, kind, aggregate, value])
+        return {'pid': os.getpid(), 'buckets': list(self.buckets), 'histograms': histograms, 'values': values}
+
+    def flush(self):
+        if not self.directory:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f'{os.getpid()}.json')
+        tmp = f'{path}.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(self.snapshot(), f)
+        os.replace(tmp, path)
+
+    def render(self):
+        """Return every metric in the Prometheus text exposition format."""
+        if self.directory and self._flusher_pid != os.getpid():
+            self._start_flusher()
+        histograms = {}
+        values = {}
+        for snapshot, live in self._snapshots():
+            if snapshot.get('buckets') != list(self.buckets):
+                continue
+            for name, labels, counts, total in snapshot['histograms']:
+                key = (name, tuple(tuple(pair) for pair in labels))
+                merged = histograms.setdefault(key, [[0] * len(counts), 0.0])
+                merged[0] = [a + b for a, b in zip(merged[0], counts)]
+                merged[1] += total
+            for name, kind, aggregate, value in snapshot['values']:
+                if kind == 'gauge' and not live:
+                    continue
+                if name not in values:
+                    values[name] = (kind, value)
+                elif aggregate == 'max':
+                    values[name] = (kind, max(values[name][1], value))
+                elif aggregate == 'min':
+                    values[name] = (kind, min(values[name][1], value))
+                else:
+                    values[name] = (kind, values[name][1] + value)
+
+        lines = []
+        described = set()
+
+        def header(name, kind):
+            if name not in described:
+                described.add(name)
+                if self._help.get(name):
+                    lines.append(f'# HELP {name} {self._help[name]}')
+                lines.append(f'# TYPE {name} {kind}')
+
+        for (name, labels), (counts, total) in sorted(histograms.items()):
+            header(name, 'histogram')
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                lines.append(f"{name}_bucket{_format_labels(labels, [('le', _format_value(bound))])} {cumulative}")
+            lines.append(f'{name}_sum{_format_labels(labels)} {_format_value(total)}')
+            lines.append(f'{name}_count{_format_labels(labels)} {cumulative}')
+        for name, (kind, value) in sorted(values.items()):
+            header(name, kind)
+            lines.append(f'{name} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+    def _snapshots(self):
+        yield self.snapshot(), True
+        if not self.directory or not os.path.isdir(self.directory):
+            return
+        own = f'{os.getpid()}.json'
+        for name in os.listdir(self.directory):
+            if not name.endswith('.json') or name == own:
+                continue
+            try:
+                with open(os.path.join(self.directory, name)) as f:
+                    snapshot = json.load(f)
+            except (OSError, ValueError):
+                continue
+            yield snapshot, alive(snapshot.get('pid', 0))
+
+    def _start_flusher(self):
+        # One flusher per process, started on first use so it runs in the forked worker.
+        with self._lock:
+            if self._flusher_pid == os.getpid():
+                return
+            self._flusher_pid = os.getpid()
+        threading.Thread(target=self._flush_forever, name='metrics-flusher', daemon=True).start()
+
+    def _flush_forever(self):
+        while True:
+            try:
+                self.flush()
+            except OSError:
+                pass
+            time.sleep(self.flush_interval)
+
+
+def clear_directory(directory=METRICS_DIR):
+    """Drop snapshots left by a previous server run (call before workers start)."""
+    if not directory or not os.path.isdir(directory):
+        return
+    for name in os.listdir(directory):
+        if name.endswith(('.json', '.tmp')):
+            try:
+                os.remove(os.path.join(directory, name))
+            except OSError:
+                pass
+
+
+default_metrics = lazy_singleton(Metrics)
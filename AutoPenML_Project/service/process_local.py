@@ -0,0 +1,48 @@
+"""Per-process plumbing shared by the scanner, service and model modules."""
+import os
+import sqlite3
+import threading
+
+
+def sqlite_connector(path, pragmas=(), **connect_args):
+    """Return a connect() that gives each process and thread its own WAL-mode connection.
+
+    Connections must not cross a fork, so one opened before a fork is replaced
+    in the child on first use. `pragmas` are extra PRAGMA statements run on
+    every new connection; `connect_args` go to sqlite3.connect.
+    """
+    local = threading.local()
+
+    def connect():
+        if getattr(local, 'pid', None) != os.getpid():
+            local.conn = sqlite3.connect(path, timeout=30, **connect_args)
+            local.conn.execute('PRAGMA journal_mode=WAL')
+            for pragma in pragmas:
+                local.conn.execute(f'PRAGMA {pragma}')
+            local.pid = os.getpid()
+        return local.conn
+    return connect
+
+
+def alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def lazy_singleton(factory):
+    """Return a function that calls factory() once, on first use, and then returns its result."""
+    lock = threading.Lock()
+    instance = []
+
+    def get():
+        if not instance:
+            with lock:
+                if not instance:
+                    instance.append(factory())
+        return instance[0]
+    return get
@@ -0,0 +1,67 @@
+import os
+import time
+
+from service.process_local import sqlite_connector
+
+RATE_LIMIT_PATH = os.environ.get('AUTOPENML_RATE_LIMIT_PATH', 'scan_ratelimit.sqlite3')
+# Hosts per second each client's bucket refills by; 0 disables rate limiting.
+RATE_LIMIT = float(os.environ.get('AUTOPENML_RATE_LIMIT', '10'))
+RATE_BURST = float(os.environ.get('AUTOPENML_RATE_BURST', '1024'))
+
+
+class RateLimiter:
+    """Per-client token buckets in SQLite, so limits hold across worker processes.
+
+    Requests cost one token per host. A request is admitted once the bucket
+    holds min(cost, burst) tokens and then takes its full cost, possibly
+    going into debt: a batch larger than the burst is not refused forever,
+    but its client waits for the debt to refill before scanning again.
+    """
+
+    def __init__(self, path=RATE_LIMIT_PATH, rate=RATE_LIMIT, burst=RATE_BURST):
+        self.path = path
+        self.rate = rate
+        self.burst = burst
+        self.rejected = 0
+        # Autocommit, so take() can open its own IMMEDIATE transaction.
+        self._connect = sqlite_connector(path, pragmas=('synchronous=NORMAL',), isolation_level=None)
+        self._connect().execute(
+            'CREATE TABLE IF NOT EXISTS rate_buckets ('
+            'client TEXT PRIMARY KEY, tokens REAL NOT NULL, updated_at REAL NOT NULL)'
+        )
+
+    def take(self, client, cost=1, now=None):
+        """Charge `cost` tokens to `client`; returns (allowed, retry_after_seconds)."""
+        if self.rate <= 0:
+            return True, 0.0
+        now = time.time() if now is None else now
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute('SELECT tokens, updated_at FROM rate_buckets WHERE client = ?', (client,)).fetchone()
+            tokens = self.burst if row is None else min(self.burst, row[0] + (now - row[1]) * self.rate)
+            needed = min(cost, self.burst)
+            allowed = tokens >= needed
+            if allowed:
+                tokens -= cost
+            conn.execute(
+                'INSERT INTO rate_buckets (client, tokens, updated_at) VALUES (?, ?, ?) '
+                'ON CONFLICT (client) DO UPDATE SET tokens = excluded.tokens, updated_at = excluded.updated_at',
+                (client, tokens, now)
+            )
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        if allowed:
+            return True, 0.0
+        self.rejected += 1
+        return False, (needed - tokens) / self.rate
+
+    def refund(self, client, cost=1):
+        """Give back tokens charged for a request that was not carried out after all."""
+        if self.rate <= 0:
+            return
+        self._connect().execute(
+            'UPDATE rate_buckets SET tokens = MIN(?, tokens + ?) WHERE client = ?', (self.burst, cost, client)
+        )
@@ -0,0 +1,195 @@
+import gzip
+import json
+import os
+import zlib
+
+from scanner.nmap_xml import PORT_PROTOCOLS
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Bodies smaller than this go out uncompressed; the headers would eat the saving.
+COMPRESS_MIN_BYTES = int(os.environ.get('AUTOPENML_COMPRESS_MIN_BYTES', '1024'))
+GZIP_LEVEL = 6
+# Quality 4 compresses better than gzip -6 at similar speed; 11 is far too slow per request.
+BROTLI_QUALITY = 4
+
+# One row per port in compact results, in this column order.
+PORT_COLUMNS = ('protocol', 'port', 'state', 'name', 'product', 'version', 'risk', 'label')
+# Per-host fields ?fields= can select; compact names, with the verbose key they map to
+# (None: compact only, verbose results carry these inside scan_data).
+HOST_FIELDS = {
+    'state': None,
+    'addresses': None,
+    'hostnames': None,
+    'os': None,
+    'ports': 'scan_data',
+    'predictions': 'vulnerability_predictions',
+    'port_risks': 'port_risks',
+    'cached': 'cached',
+    'diff': 'diff',
+    'profile': 'profile',
+}
+# Identify the host or the run; kept whatever ?fields= says.
+ALWAYS_KEPT = ('host', 'target', 'targets', 'port_columns', 'model_version')
+
+
+def dumps(obj):
+    """Encode obj as compact JSON bytes, with orjson when it is installed."""
+    if orjson is not None:
+        # Non-str keys: python-nmap results key ports by int.
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(obj, separators=(',', ':')).encode()
+
+
+def loads(data):
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+
+def parse_fields(value, compact=False):
+    """'ports,predictions' -> ('ports', 'predictions'); None or '' selects everything."""
+    if not value:
+        return None
+    fields = tuple(field.strip() for field in value.split(',') if field.strip())
+    unknown = [field for field in fields if field not in HOST_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown field(s): {', '.join(unknown)} (choose from {', '.join(HOST_FIELDS)})")
+    compact_only = [field for field in fields if HOST_FIELDS[field] is None]
+    if compact_only and not compact:
+        raise ValueError(f"Field(s) {', '.join(compact_only)} need compact=1 (verbose results keep them in scan_data)")
+    return fields
+
+
+def _port_table(scan_data, port_risks):
+    risks = {(risk['protocol'], int(risk['port'])): risk for risk in port_risks or ()}
+    rows = []
+    for protocol in PORT_PROTOCOLS:
+        for port, info in (scan_data.get(protocol) or {}).items():
+            port = int(port)
+            risk = risks.get((protocol, port), {})
+            rows.append([
+                protocol, port, info.get('state'), info.get('name'), info.get('product'), info.get('version'),
+                risk.get('risk'), risk.get('label')
+            ])
+    return rows
+
+
+def compact_host(record):
+    """Rewrite one host's verbose result as a compact one.
+
+    The python-nmap dict becomes a `ports` table (PORT_COLUMNS), with each
+    port's risk and label folded in; nmap script output, CPEs and reason
+    fields are dropped. port_risks is kept only when it carries explanations.
+    """
+    compact = {key: value for key, value in record.items()
+               if key not in ('scan_data', 'vulnerability_predictions', 'port_risks')}
+    scan_data = record.get('scan_data')
+    port_risks = record.get('port_risks')
+    if scan_data is not None:
+        compact['state'] = (scan_data.get('status') or {}).get('state')
+        compact['addresses'] = scan_data.get('addresses') or {}
+        compact['hostnames'] = [entry['name'] for entry in scan_data.get('hostnames') or () if entry.get('name')]
+        osmatch = scan_data.get('osmatch') or ()
+        if osmatch:
+            compact['os'] = osmatch[0].get('name')
+        compact['ports'] = _port_table(scan_data, port_risks)
+    if 'vulnerability_predictions' in record:
+        compact['predictions'] = record['vulnerability_predictions']
+    if port_risks and 'top_features' in port_risks[0]:
+        compact['port_risks'] = port_risks
+    return compact
+
+
+def project(record, fields, compact):
+    if fields is None:
+        return record
+    keys = set(ALWAYS_KEPT)
+    keys.update(fields if compact else (HOST_FIELDS[field] for field in fields))
+    return {key: value for key, value in record.items() if key in keys}
+
+
+def shape_host(record, compact=False, fields=None):
+    """Apply the compact format and field projection to one host record."""
+    if compact:
+        record = compact_host(record)
+    return project(record, fields, compact)
+
+
+def shape_result(result, compact=False, fields=None):
+    """Shape a job result: a single host, or a batch with a 'hosts' mapping."""
+    if result is None or (not compact and fields is None):
+        return result
+    if 'hosts' in result:
+        shaped = dict(result, hosts={
+            host: shape_host(record, compact, fields) for host, record in result['hosts'].items()
+        })
+    else:
+        shaped = shape_host(result, compact, fields)
+    if compact:
+        shaped['port_columns'] = PORT_COLUMNS
+    return shaped
+
+
+def negotiate_encoding(accept_encoding):
+    """Pick 'br' or 'gzip' from an Accept-Encoding header, or None for identity."""
+    offered = {}
+    for part in (accept_encoding or '').split(','):
+        name, _, params = part.strip().partition(';')
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if name:
+            offered[name.strip().lower()] = quality
+    candidates = (['br'] if brotli is not None else []) + ['gzip']
+    accepted = [name for name in candidates if offered.get(name, offered.get('*', 0)) > 0]
+    return max(accepted, key=lambda name: offered.get(name, offered.get('*', 0)), default=None)
+
+
+def compress(body, encoding):
+    if encoding == 'br':
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    if encoding == 'gzip':
+        return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+    return body
+
+
+class StreamCompressor:
+    """Compress a streamed response chunk by chunk, flushing after each one.
+
+    Flushing keeps every NDJSON line or SSE event decodable as soon as it
+    arrives, at a small cost in ratio compared with one-shot compression.
+    """
+
+    def __init__(self, encoding):
+        self.encoding = encoding
+        if encoding == 'br':
+            self._compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+        elif encoding == 'gzip':
+            self._compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+        else:
+            self._compressor = None
+
+    def compress(self, chunk):
+        if self._compressor is None:
+            return chunk
+        if self.encoding == 'br':
+            return self._compressor.process(chunk) + self._compressor.flush()
+        return self._compressor.compress(chunk) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        if self._compressor is None:
+            return b''
+        if self.encoding == 'br':
+            return self._compressor.finish()
+        return self._compressor.flush()
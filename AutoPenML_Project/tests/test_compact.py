@@ -0,0 +1,110 @@
+import pickle
+
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+from ml_model import compact
+from ml_model.compact import compact_forest
+from ml_model.explain import TreePathExplainer
+
+N_FEATURES = 6
+
+
+def make_data(rng, rows, n_classes=2):
+    # Small integer features like the encoder's (ports, flags, version parts); exact in float32.
+    X = rng.integers(0, 50, size=(rows, N_FEATURES)).astype(np.float64)
+    score = X[:, 0] + 2 * X[:, 1] - X[:, 2] + rng.normal(0, 5, rows)
+    y = np.digitize(score, np.quantile(score, np.linspace(0, 1, n_classes + 1)[1:-1]))
+    return X, y
+
+
+@pytest.fixture(scope='module')
+def forest():
+    rng = np.random.default_rng(0)
+    X, y = make_data(rng, 600)
+    classifier = RandomForestClassifier(n_estimators=25, max_depth=8, random_state=0).fit(X, y)
+    return classifier, make_data(rng, 400)[0]
+
+
+def test_matches_sklearn(forest):
+    classifier, X = forest
+    compacted = compact_forest(classifier)
+    np.testing.assert_allclose(compacted.predict_proba(X), classifier.predict_proba(X), atol=1e-6)
+    np.testing.assert_array_equal(compacted.predict(X), classifier.predict(X))
+    assert compacted.n_trees == 25
+    assert compacted.n_nodes == sum(e.tree_.node_count for e in classifier.estimators_)
+
+
+def test_matches_sklearn_multiclass():
+    rng = np.random.default_rng(1)
+    X, y = make_data(rng, 600, n_classes=3)
+    classifier = RandomForestClassifier(n_estimators=10, random_state=1).fit(X, y)
+    compacted = compact_forest(classifier)
+    X_test = make_data(rng, 200, n_classes=3)[0]
+    np.testing.assert_allclose(compacted.predict_proba(X_test), classifier.predict_proba(X_test), atol=1e-6)
+
+
+def test_apply_reaches_the_same_leaves(forest):
+    classifier, X = forest
+    compacted = compact_forest(classifier)
+    leaves = compacted.apply(X)
+    # Leaf values are the sklearn leaf's class mix, so per-tree probabilities must agree.
+    for tree_index, estimator in enumerate(classifier.estimators_):
+        np.testing.assert_allclose(
+            compacted.value[leaves[:, tree_index]], estimator.predict_proba(X), atol=1e-6
+        )
+
+
+def test_evaluates_in_chunks(forest, monkeypatch):
+    classifier, X = forest
+    compacted = compact_forest(classifier)
+    expected = compacted.predict_proba(X)
+    monkeypatch.setattr(compact, 'EVAL_CHUNK_ROWS', 7)
+    np.testing.assert_allclose(compacted.predict_proba(X), expected)
+
+
+def test_zero_tolerance_prunes_without_changing_predictions(forest):
+    classifier, X = forest
+    full = compact_forest(classifier)
+    pruned = compact_forest(classifier, tolerance=0)
+    assert pruned.n_nodes <= full.n_nodes
+    np.testing.assert_allclose(pruned.predict_proba(X), full.predict_proba(X), atol=1e-6)
+
+
+def test_max_trees_and_depth(forest):
+    classifier, X = forest
+    limited = compact_forest(classifier, max_trees=5, max_depth=3)
+    assert limited.n_trees == 5
+    assert limited.depth <= 3
+    proba = limited.predict_proba(X)
+    np.testing.assert_allclose(proba.sum(axis=1), 1.0)
+
+
+def test_explain_matches_tree_path_explainer(forest):
+    classifier, X = forest
+    compacted = compact_forest(classifier)
+    contributions = compacted.explain(X)
+    expected = TreePathExplainer(classifier, N_FEATURES)
+    np.testing.assert_allclose(contributions, expected.explain(X), atol=1e-5)
+    assert compacted.bias == pytest.approx(expected.bias, abs=1e-6)
+    np.testing.assert_allclose(
+        compacted.bias + contributions.sum(axis=1), classifier.predict_proba(X)[:, 1], atol=1e-5
+    )
+
+
+def test_pickle_round_trip(forest):
+    classifier, X = forest
+    compacted = compact_forest(classifier)
+    restored = pickle.loads(pickle.dumps(compacted))
+    np.testing.assert_array_equal(restored.predict_proba(X), compacted.predict_proba(X))
+    assert restored.bias == compacted.bias
+
+
+def test_empty_input(forest):
+    classifier, _ = forest
+    compacted = compact_forest(classifier)
+    empty = np.zeros((0, N_FEATURES))
+    assert compacted.predict_proba(empty).shape == (0, 2)
+    assert compacted.apply(empty).shape == (0, 25)
+    assert compacted.explain(empty).shape == (0, N_FEATURES)
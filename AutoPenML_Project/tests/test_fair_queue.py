@@ -0,0 +1,118 @@
+import queue
+import threading
+from collections import Counter
+
+import pytest
+
+from service.fair_queue import FairQueue, FairSlots, parse_weights
+
+
+def drain(fair_queue, count):
+    return [fair_queue.get_nowait() for _ in range(count)]
+
+
+def test_parse_weights():
+    assert parse_weights('alice=4, bob=0.5') == {'alice': 4.0, 'bob': 0.5}
+    assert parse_weights('') == {}
+
+
+def test_backlogged_flows_share_by_weight():
+    fair_queue = FairQueue(weights={'a': 3.0, 'b': 1.0})
+    for i in range(60):
+        fair_queue.put(('a', i), flow='a')
+        fair_queue.put(('b', i), flow='b')
+    served = Counter(flow for flow, _ in drain(fair_queue, 40))
+    assert served == {'a': 30, 'b': 10}
+
+
+def test_cost_counts_against_the_flow():
+    fair_queue = FairQueue()
+    for i in range(20):
+        fair_queue.put(('big', i), flow='big', cost=4)
+        fair_queue.put(('small', i), flow='small', cost=1)
+    served = Counter(flow for flow, _ in drain(fair_queue, 15))
+    assert served == {'big': 3, 'small': 12}
+
+
+def test_items_within_a_flow_stay_fifo():
+    fair_queue = FairQueue(weights={'a': 2.0})
+    for i in range(10):
+        fair_queue.put(('a', i), flow='a')
+        fair_queue.put(('b', i), flow='b')
+    items = drain(fair_queue, 20)
+    for flow in ('a', 'b'):
+        assert [i for name, i in items if name == flow] == list(range(10))
+
+
+def test_newcomer_is_not_queued_behind_a_backlog():
+    fair_queue = FairQueue()
+    for i in range(100):
+        fair_queue.put(('a', i), flow='a')
+    drain(fair_queue, 10)
+    fair_queue.put(('b', 0), flow='b')
+    assert ('b', 0) in drain(fair_queue, 2)
+
+
+def test_charge_accounts_unqueued_work():
+    fair_queue = FairQueue()
+    for _ in range(5):
+        fair_queue.charge('a')
+    fair_queue.put('a', flow='a')
+    fair_queue.put('b', flow='b')
+    assert fair_queue.get_nowait() == 'b'
+
+
+def test_maxsize_empty_and_close():
+    fair_queue = FairQueue(maxsize=1)
+    fair_queue.put('x')
+    with pytest.raises(queue.Full):
+        fair_queue.put('y')
+    assert fair_queue.get(timeout=0.1) == 'x'
+    with pytest.raises(queue.Empty):
+        fair_queue.get(timeout=0.01)
+    fair_queue.close()
+    assert fair_queue.get() is None
+
+
+def test_slots_are_handed_out_by_weight():
+    slots = FairSlots(1, weights={'a': 3.0, 'b': 1.0})
+    slots.acquire('warmup')
+    granted = []
+    lock = threading.Lock()
+
+    def waiter(flow):
+        slots.acquire(flow, poll=0.01)
+        with lock:
+            granted.append(flow)
+
+    threads = [threading.Thread(target=waiter, args=(flow,)) for flow in ['a', 'b'] * 12]
+    for thread in threads:
+        thread.start()
+    while slots._waiting.qsize() < len(threads):
+        threading.Event().wait(0.01)
+
+    for count in range(1, 17):
+        slots.release()
+        while len(granted) < count:
+            threading.Event().wait(0.001)
+    assert Counter(granted) == {'a': 12, 'b': 4}
+
+    for _ in range(8):
+        slots.release()
+    for thread in threads:
+        thread.join(timeout=5)
+    assert Counter(granted) == {'a': 12, 'b': 12}
+
+
+def test_abandoned_waiter_does_not_keep_a_slot():
+    slots = FairSlots(1)
+    slots.acquire()
+
+    def give_up():
+        raise TimeoutError
+
+    with pytest.raises(TimeoutError):
+        slots.acquire('gone', check=give_up, poll=0.01)
+    slots.release()
+    # The freed slot skipped the abandoned waiter and is free again.
+    slots.acquire('next', check=give_up, poll=0.01)
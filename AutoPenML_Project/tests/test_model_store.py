@@ -0,0 +1,42 @@
+import pytest
+
+from ml_model.model_store import ARTIFACT_SCHEMA, ModelStore, artifact_path, save_artifact
+
+
+def test_missing_artifact_fails_without_training(tmp_path):
+    store = ModelStore(str(tmp_path))
+    with pytest.raises(RuntimeError, match='python -m ml_model.train'):
+        store.load()
+    assert not store.ready
+    assert not list(tmp_path.iterdir())
+
+
+def test_unloadable_reload_keeps_serving(tmp_path):
+    save_artifact({'schema': ARTIFACT_SCHEMA, 'model': 'first'}, str(tmp_path))
+    store = ModelStore(str(tmp_path), reload_interval=0)
+    assert store.get() == 'first'
+    # A truncated pickle, as left by a copy that was cut short.
+    with open(artifact_path(2, str(tmp_path)), 'wb') as f:
+        f.write(b'\x80\x04\x95')
+    assert store.get() == 'first'
+    assert store._rejected_version == 2
+    # A newer good artifact is still picked up.
+    save_artifact({'schema': ARTIFACT_SCHEMA, 'model': 'third'}, str(tmp_path))
+    assert store.get() == 'third'
+    assert store.version == 3
+
+
+def test_old_schema_reload_keeps_serving(tmp_path):
+    save_artifact({'schema': ARTIFACT_SCHEMA, 'model': 'first'}, str(tmp_path))
+    store = ModelStore(str(tmp_path), reload_interval=0)
+    store.load()
+    save_artifact({'schema': ARTIFACT_SCHEMA - 1, 'model': 'old'}, str(tmp_path))
+    assert store.get() == 'first'
+    assert store._rejected_version == 2
+
+
+def test_unloadable_first_load_raises(tmp_path):
+    with open(artifact_path(1, str(tmp_path)), 'wb') as f:
+        f.write(b'not a pickle')
+    with pytest.raises(RuntimeError, match='Could not load model artifact v1'):
+        ModelStore(str(tmp_path)).load()
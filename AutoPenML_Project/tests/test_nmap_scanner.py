@@ -0,0 +1,36 @@
+from scanner import nmap_scanner
+from scanner.nmap_scanner import run_nmap_batch
+
+
+def nmap_like_scan(addresses):
+    # Like nmap: hostname targets come back under their address, echoed as a 'user' hostname.
+    def scan(hosts, arguments, scan_id=None):
+        results = {}
+        for host in hosts:
+            address = addresses.get(host.lower().rstrip('.'), host)
+            hostnames = [{'name': host, 'type': 'user'}] if address != host else []
+            results[address] = {'status': {'state': 'up'}, 'addresses': {'ipv4': address}, 'hostnames': hostnames}
+        return results
+    return scan
+
+
+def test_batch_results_are_keyed_by_requested_target(monkeypatch):
+    monkeypatch.setattr(nmap_scanner, '_scan', nmap_like_scan({'web.example.com': '192.0.2.10'}))
+    results = run_nmap_batch(['Web.Example.com.', '192.0.2.20'])
+    assert set(results) == {'Web.Example.com.', '192.0.2.20'}
+    assert results['Web.Example.com.']['addresses'] == {'ipv4': '192.0.2.10'}
+
+
+def test_batch_groups_by_per_target_arguments(monkeypatch):
+    calls = []
+
+    def scan(hosts, arguments, scan_id=None):
+        calls.append((arguments, list(hosts)))
+        return nmap_like_scan({'db.example.com': '192.0.2.30'})(hosts, arguments)
+
+    monkeypatch.setattr(nmap_scanner, '_scan', scan)
+    arguments = {'db.example.com': '-T4 -p 5432', '192.0.2.1': '-T4 -F'}
+    results = run_nmap_batch(list(arguments), arguments=arguments.get)
+    assert set(results) == set(arguments)
+    assert sorted(calls) == [('-T4 -F', ['192.0.2.1']), ('-T4 -p 5432', ['db.example.com'])]
+
@@ -0,0 +1,118 @@
+import io
+import json
+import os
+
+import numpy as np
+import pytest
+
+from ml_model.synthetic import generate_scan_result
+from scanner.nmap_xml import HostRecord, NmapXMLError, iter_nmap_xml, parse_nmap_xml
+
+SAMPLE = os.path.join(os.path.dirname(__file__), 'data', 'nmap_sample.xml')
+# python-nmap's parse of SAMPLE, so parity is checked without python-nmap installed.
+EXPECTED = os.path.join(os.path.dirname(__file__), 'data', 'nmap_sample_expected.json')
+
+
+@pytest.fixture(scope='module')
+def sample_xml():
+    with open(SAMPLE, 'rb') as f:
+        return f.read()
+
+
+@pytest.fixture(scope='module')
+def expected():
+    with open(EXPECTED) as f:
+        scan = json.load(f)
+    for result in scan.values():
+        for protocol in ('tcp', 'udp', 'sctp', 'ip'):
+            if protocol in result:
+                result[protocol] = {int(port): info for port, info in result[protocol].items()}
+    return scan
+
+
+def python_nmap_scan(xml):
+    nmap = pytest.importorskip('nmap')
+    # PortScanner() looks for an nmap binary; parsing a saved document doesn't need one.
+    scanner = nmap.PortScanner.__new__(nmap.PortScanner)
+    return {host: dict(result) for host, result in scanner.analyse_nmap_xml_scan(xml.decode())['scan'].items()}
+
+
+def test_expected_output_is_python_nmaps(sample_xml, expected):
+    # Regenerate nmap_sample_expected.json if this fails after changing the sample.
+    assert python_nmap_scan(sample_xml) == expected
+
+
+def test_matches_python_nmap(sample_xml, expected):
+    results = parse_nmap_xml(sample_xml)
+    assert set(results) == set(expected) == {'10.0.0.1', '10.0.0.2'}
+    for host, result in results.items():
+        # times (round-trip estimates) is ours on top of python-nmap's layout.
+        assert result.pop('times')['srtt']
+        assert result == expected[host]
+
+
+def test_streaming_matches_whole_document(sample_xml):
+    records = list(iter_nmap_xml(io.BytesIO(sample_xml), read_size=37))
+    assert {record.host: record.to_scan_result() for record in records} == parse_nmap_xml(sample_xml)
+
+
+def test_sample_fields(sample_xml):
+    result = parse_nmap_xml(sample_xml)['10.0.0.1']
+    ssh = result['tcp'][22]
+    assert ssh['product'] == 'OpenSSH'
+    # python-nmap keeps the last <cpe> of a service.
+    assert ssh['cpe'] == 'cpe:/o:linux:linux_kernel'
+    assert ssh['script'] == {'ssh-hostkey': '256 aa:bb (ED25519)'}
+    assert result['udp'][53]['state'] == 'open|filtered'
+    assert result['vendor'] == {'AA:BB:CC:DD:EE:FF': 'Acme'}
+    assert result['osmatch'][0]['osclass'][0]['cpe'] == ['cpe:/o:linux:linux_kernel:5']
+    assert parse_nmap_xml(sample_xml)['10.0.0.2']['hostnames'] == [{'name': '', 'type': ''}]
+
+
+def test_truncated_output_yields_finished_hosts_then_fails(sample_xml):
+    cut = sample_xml.index(b'<address addr="10.0.0.2"')
+    hosts = []
+    with pytest.raises(NmapXMLError):
+        for record in iter_nmap_xml(io.BytesIO(sample_xml[:cut] + b'<<<')):
+            hosts.append(record.host)
+    assert hosts == ['10.0.0.1']
+
+
+def test_host_record_round_trip(sample_xml):
+    for host, result in parse_nmap_xml(sample_xml).items():
+        assert HostRecord.from_scan_result(host, result).to_scan_result() == result
+
+
+def test_host_record_round_trip_synthetic():
+    rng = np.random.default_rng(7)
+    for i in range(50):
+        result = generate_scan_result(rng, int(rng.integers(0, 20)))
+        record = HostRecord.from_scan_result(f'10.0.0.{i}', result)
+        assert len(record) == len(result.get('tcp', {}))
+        assert record.to_scan_result() == result
+
+
+def test_host_record_keeps_empty_containers_and_unknown_states():
+    result = {
+        'hostnames': [], 'addresses': {}, 'status': {'state': 'up', 'reason': 'user-set'},
+        'tcp': {
+            1: {'state': 'weird-state', 'reason': 'x', 'name': 'a', 'product': '', 'version': '', 'extrainfo': '',
+                'conf': '3', 'cpe': '', 'script': {}},
+            65535: {'state': 'open', 'reason': 'syn-ack', 'name': 'b', 'product': 'p', 'version': 'v',
+                    'extrainfo': 'e', 'conf': '10', 'cpe': 'cpe:/a:b'},
+        },
+        'sctp': {7: {'state': 'closed', 'reason': 'abort', 'name': '', 'product': '', 'version': '',
+                     'extrainfo': '', 'conf': '', 'cpe': ''}},
+        'osmatch': [],
+    }
+    assert HostRecord.from_scan_result('h', result).to_scan_result() == result
+
+
+def test_to_scan_result_returns_fresh_objects(sample_xml):
+    record = next(iter_nmap_xml(io.BytesIO(sample_xml)))
+    first = record.to_scan_result()
+    first['tcp'][22]['state'] = 'closed'
+    first['hostnames'].append({'name': 'x', 'type': 'user'})
+    second = record.to_scan_result()
+    assert second['tcp'][22]['state'] == 'open'
+    assert second['hostnames'] == [{'name': 'router.lan', 'type': 'PTR'}]
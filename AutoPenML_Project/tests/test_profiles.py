@@ -0,0 +1,55 @@
+import pytest
+
+from scanner.nmap_scanner import down_result
+from scanner.profiles import SENTINEL_PORTS, ProfileEngine
+from service.history import ScanHistory
+
+NOW = 1_700_000_000
+
+
+def up_result(*ports):
+    return {
+        'status': {'state': 'up', 'reason': 'syn-ack'},
+        'times': {'srtt': '20000'},
+        'tcp': {port: {'state': 'open', 'name': '', 'product': '', 'version': ''} for port in ports},
+    }
+
+
+@pytest.fixture
+def history(tmp_path):
+    return ScanHistory(str(tmp_path / 'history.sqlite3'))
+
+
+def test_unknown_host_gets_broad_scan(history):
+    profile = ProfileEngine(history).choose('10.0.0.5', now=NOW)
+    assert profile.name == 'auto-default-broad'
+    assert profile.arguments.endswith('-F')
+
+
+def test_down_host_keeps_broad_coverage(history):
+    history.record({'10.0.0.5': (down_result(), [])}, arguments='-T4 -F', scanned_at=NOW - 60)
+    profile = ProfileEngine(history).choose('10.0.0.5', now=NOW)
+    assert profile.name == 'auto-default-broad'
+    assert profile.reason.startswith('unknown host')
+
+
+def test_host_seen_up_gets_known_ports(history):
+    history.record({'10.0.0.5': (up_result(8000), [0])}, arguments='-T4 -F', scanned_at=NOW - 60)
+    profile = ProfileEngine(history).choose('10.0.0.5', now=NOW)
+    assert profile.name == 'auto-default-known'
+    ports = profile.arguments.split('-p ')[1].split(',')
+    assert sorted(map(int, ports)) == sorted({8000, *SENTINEL_PORTS})
+
+
+def test_targeted_scans_do_not_count_as_broad(history):
+    history.record({'10.0.0.5': (up_result(22), [0])}, arguments='-T4 -p 22', scanned_at=NOW - 60)
+    assert ProfileEngine(history).choose('10.0.0.5', now=NOW).name == 'auto-default-broad'
+
+
+def test_broad_refresh_after_down_scans(history):
+    engine = ProfileEngine(history, refresh=3600)
+    history.record({'10.0.0.5': (up_result(22), [0])}, arguments='-T4 -F', scanned_at=NOW - 7200)
+    history.record({'10.0.0.5': (down_result(), [])}, arguments='-T4 -F', scanned_at=NOW - 60)
+    profile = engine.choose('10.0.0.5', now=NOW)
+    assert profile.name == 'auto-default-broad'
+    assert profile.reason.startswith('broad refresh due')
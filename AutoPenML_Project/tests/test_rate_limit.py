@@ -0,0 +1,62 @@
+import pytest
+
+from service.rate_limit import RateLimiter
+
+
+@pytest.fixture
+def limiter(tmp_path):
+    return RateLimiter(str(tmp_path / 'rate.sqlite3'), rate=2.0, burst=10.0)
+
+
+def test_burst_then_rejected_with_retry_after(limiter):
+    assert limiter.take('a', 10, now=100.0) == (True, 0.0)
+    allowed, retry_after = limiter.take('a', 4, now=100.0)
+    assert not allowed
+    assert retry_after == pytest.approx(2.0)
+    assert limiter.rejected == 1
+
+
+def test_tokens_refill_at_rate(limiter):
+    limiter.take('a', 10, now=100.0)
+    assert not limiter.take('a', 3, now=101.0)[0]
+    assert limiter.take('a', 3, now=101.5) == (True, 0.0)
+
+
+def test_refill_is_capped_at_burst(limiter):
+    limiter.take('a', 1, now=100.0)
+    assert limiter.take('a', 10, now=10000.0)[0]
+    assert not limiter.take('a', 1, now=10000.0)[0]
+
+
+def test_clients_have_separate_buckets(limiter):
+    limiter.take('a', 10, now=100.0)
+    assert limiter.take('b', 10, now=100.0)[0]
+
+
+def test_cost_above_burst_goes_into_debt(limiter):
+    # Admitted with a full bucket, then the client waits for the debt to refill.
+    assert limiter.take('a', 30, now=100.0)[0]
+    allowed, retry_after = limiter.take('a', 1, now=100.0)
+    assert not allowed
+    assert retry_after == pytest.approx(10.5)
+    assert limiter.take('a', 1, now=110.5)[0]
+
+
+def test_refund_returns_tokens_up_to_burst(limiter):
+    limiter.take('a', 8, now=100.0)
+    limiter.refund('a', 8)
+    assert limiter.take('a', 10, now=100.0)[0]
+    limiter.refund('a', 50)
+    assert limiter.take('a', 10, now=100.0)[0]
+    assert not limiter.take('a', 1, now=100.0)[0]
+
+
+def test_shared_across_instances(tmp_path):
+    path = str(tmp_path / 'rate.sqlite3')
+    RateLimiter(path, rate=1.0, burst=5.0).take('a', 5, now=100.0)
+    assert not RateLimiter(path, rate=1.0, burst=5.0).take('a', 1, now=100.0)[0]
+
+
+def test_zero_rate_disables_limiting(tmp_path):
+    limiter = RateLimiter(str(tmp_path / 'rate.sqlite3'), rate=0, burst=1.0)
+    assert all(limiter.take('a', 100)[0] for _ in range(5))
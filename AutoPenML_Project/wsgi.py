@@ -0,0 +1,16 @@
+import gc
+import os
+
+from api import app, job_queue, model_store
+
+# 'master' loads the model before gunicorn forks so workers share it;
+# 'background' lets each worker answer /health at once and load after fork.
+MODEL_PRELOAD = os.environ.get('AUTOPENML_MODEL_PRELOAD', 'master')
+if MODEL_PRELOAD == 'master':
+    model_store.load()
+
+# Everything imported so far (model artifact included) is shared with forked
+# workers copy-on-write; keep the collector from touching those pages.
+gc.freeze()
+
+__all__ = ['app', 'job_queue', 'model_store']
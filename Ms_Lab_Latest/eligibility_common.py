@@ -0,0 +1,1080 @@
+"""Helpers shared by All.py and Noridian_bot.py
+
+Condition-based waits with per-step timings, parsing the eligibility results
+page text, the results journal and checkpoint that let an interrupted run be
+resumed, the portal login, navigation and form filling, and the pool of
+browser workers that runs each script's per-patient step.
+"""
+import os
+import re
+import json
+import time
+import queue
+import hashlib
+import threading
+import pandas as pd
+from selenium import webdriver
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import (
+    JavascriptException, NoSuchElementException, StaleElementReferenceException, TimeoutException
+)
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.chrome.service import Service
+from webdriver_manager.chrome import ChromeDriverManager
+from datetime import datetime
+
+# Times a patient is tried, within a run and across resumed runs, before it is given up
+MAX_RECORD_ATTEMPTS = int(os.environ.get("NORIDIAN_MAX_ATTEMPTS", "3"))
+
+# =============================================================================
+# WAIT STRATEGY - CONDITION-BASED WAITS WITH TIMING
+# =============================================================================
+
+# Timeouts in seconds; each wait returns as soon as its condition holds
+WAIT_TIMEOUT = float(os.environ.get("NORIDIAN_WAIT_TIMEOUT", "30"))
+LOGIN_TIMEOUT = float(os.environ.get("NORIDIAN_LOGIN_TIMEOUT", "240"))
+NAVIGATION_TIMEOUT = float(os.environ.get("NORIDIAN_NAVIGATION_TIMEOUT", "120"))
+WAIT_POLL_SECONDS = float(os.environ.get("NORIDIAN_WAIT_POLL", "0.25"))
+# The network counts as idle once no request has finished for this long
+NETWORK_QUIET_MS = int(os.environ.get("NORIDIAN_NETWORK_QUIET_MS", "500"))
+
+# Document loaded, no jQuery AJAX in flight and no resource finished within the quiet window.
+# The latest finish time is kept on window so clearing the resource buffer does not lose it.
+NETWORK_IDLE_SCRIPT = """
+if (document.readyState !== 'complete') return false;
+if (window.jQuery && window.jQuery.active) return false;
+var last = window.__lastResponseEnd || 0;
+var entries = performance.getEntriesByType('resource');
+for (var i = 0; i < entries.length; i++) {
+    if (entries[i].responseEnd > last) last = entries[i].responseEnd;
+}
+window.__lastResponseEnd = last;
+if (entries.length > 200) performance.clearResourceTimings();
+return performance.now() - last >= arguments[0];
+"""
+
+# Step name -> {"count", "total", "max", "timeouts"} for every wait taken
+wait_timings = {}
+wait_timings_lock = threading.Lock()
+
+def record_wait(step, seconds, timed_out=False):
+    """Record how long a wait step took"""
+    with wait_timings_lock:
+        stats = wait_timings.setdefault(step, {"count": 0, "total": 0.0, "max": 0.0, "timeouts": 0})
+        stats["count"] += 1
+        stats["total"] += seconds
+        stats["max"] = max(stats["max"], seconds)
+        if timed_out:
+            stats["timeouts"] += 1
+
+def wait_for(driver, condition, step, timeout=None):
+    """Wait until condition(driver) is truthy and return its value, or None on timeout"""
+    timeout = WAIT_TIMEOUT if timeout is None else timeout
+    start = time.perf_counter()
+    try:
+        result = WebDriverWait(
+            driver, timeout, poll_frequency=WAIT_POLL_SECONDS,
+            ignored_exceptions=(NoSuchElementException, StaleElementReferenceException, JavascriptException)
+        ).until(condition)
+        timed_out = False
+    except TimeoutException:
+        result = None
+        timed_out = True
+    record_wait(step, time.perf_counter() - start, timed_out)
+    return result
+
+def network_idle(quiet_ms=None):
+    """Condition: page loaded and no network activity for quiet_ms"""
+    quiet_ms = NETWORK_QUIET_MS if quiet_ms is None else quiet_ms
+    def condition(driver):
+        return driver.execute_script(NETWORK_IDLE_SCRIPT, quiet_ms)
+    return condition
+
+def all_of(*conditions):
+    """Condition: every condition holds; returns the last one's value"""
+    def condition(driver):
+        result = False
+        for check in conditions:
+            result = check(driver)
+            if not result:
+                return False
+        return result
+    return condition
+
+def element_present(xpath):
+    """Condition: at least one element matches xpath"""
+    def condition(driver):
+        return bool(driver.find_elements(By.XPATH, xpath))
+    return condition
+
+def tab_pane_loaded(pane_id):
+    """Condition: the tab pane is shown and has content; returns the pane"""
+    def condition(driver):
+        pane = driver.find_element(By.ID, pane_id)
+        return pane if pane.is_displayed() and pane.text.strip() else False
+    return condition
+
+def print_wait_summary():
+    """Print how long each wait step took across the run, slowest first"""
+    with wait_timings_lock:
+        steps = sorted(wait_timings.items(), key=lambda item: item[1]["total"], reverse=True)
+    if not steps:
+        return
+    print(f"\n{'='*60}")
+    print("WAIT TIMINGS (seconds)")
+    print(f"{'='*60}")
+    print(f"{'Step':<24}{'Count':>7}{'Avg':>9}{'Max':>9}{'Total':>10}{'Timeouts':>10}")
+    for step, stats in steps:
+        print(f"{step:<24}{stats['count']:>7}{stats['total'] / stats['count']:>9.2f}"
+              f"{stats['max']:>9.2f}{stats['total']:>10.1f}{stats['timeouts']:>10}")
+    print(f"{'='*60}")
+
+# =============================================================================
+# RESULTS PAGE PARSING
+# =============================================================================
+
+# Results page label(s) for each basic field, in the order the columns are saved
+RESULT_FIELD_LABELS = {
+    'Beneficiary': ['Beneficiary:'],
+    'Sex': ['Sex:', 'Gender:'],
+    'DOB': ['DOB:', 'Date of Birth:'],
+    'Date of Death': ['Date of Death:'],
+    'Medicare Number': ['Medicare Number:'],
+    'Transaction ID': ['Transaction ID:'],
+    'Provider/Supplier': ['Provider/Supplier:'],
+    'NPI': ['NPI:'],
+    'PTAN': ['PTAN:'],
+    'TIN or SSN': ['TIN or SSN:'],
+    'From Date of Service': ['From Date of Service:'],
+    'To Date of Service': ['To Date of Service:']
+}
+RESULT_LABEL_FIELDS = {label: field for field, labels in RESULT_FIELD_LABELS.items() for label in labels}
+# Every label in one pattern, longest first so a label never matches inside a longer one
+RESULT_LABEL_PATTERN = re.compile("|".join(
+    re.escape(label) for label in sorted(RESULT_LABEL_FIELDS, key=len, reverse=True)
+))
+# Rendered text only, so hidden tab panes are left out
+RESULTS_TEXT_SCRIPT = "return document.body.innerText;"
+
+def parse_results_text(text, label_fields=RESULT_LABEL_FIELDS, label_pattern=RESULT_LABEL_PATTERN):
+    """Parse every label/value pair out of the results page text in one pass
+    
+    A value runs from its label to the next label; its first non-empty line is
+    kept, so values on the label's line or the line below are both found and an
+    empty value is not mistaken for the next label. The first occurrence of a
+    field on the page wins.
+    """
+    data = {field: '' for field in dict.fromkeys(label_fields.values())}
+    matches = list(label_pattern.finditer(text or ''))
+    for i, match in enumerate(matches):
+        field = label_fields[match.group(0)]
+        if data[field]:
+            continue
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(text)
+        for line in text[match.end():end].split('\n'):
+            if line.strip():
+                data[field] = ' '.join(line.split())
+                break
+    return data
+
+# =============================================================================
+# RESULTS JOURNAL AND CHECKPOINT
+# =============================================================================
+
+# Journal entries carry their patient's row in the input sheet, so the workbook keeps input order
+INPUT_ROW_FIELD = "Input Row"
+
+def start_journal(journal_file):
+    """Start a fresh journal, archiving the previous run's journal"""
+    if os.path.exists(journal_file) and os.path.getsize(journal_file) > 0:
+        base, ext = os.path.splitext(journal_file)
+        archived = f"{base}_{datetime.now().strftime('%Y%m%d_%H%M%S')}{ext}"
+        os.replace(journal_file, archived)
+        print(f"✓ Previous {journal_file} archived to {archived}")
+
+def append_to_journal(extracted_data, journal_file):
+    """Append one extracted record to the JSONL journal and flush it to disk
+    
+    Each patient costs one line write however many came before it, and a
+    crash can at most cut off the line being written.
+    """
+    with open(journal_file, "a", encoding="utf-8") as f:
+        f.write(json.dumps(extracted_data, default=str) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+def load_journal(journal_file):
+    """Read every record from the JSONL journal, skipping a partly written last line"""
+    records = []
+    if not os.path.exists(journal_file):
+        return records
+    with open(journal_file, encoding="utf-8") as f:
+        for line in f:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                print("⚠ Skipping incomplete journal line")
+    return records
+
+def export_journal_to_excel(journal_file, output_file, save_to_excel):
+    """Build the Excel workbook from everything recorded in the journal with the script's save_to_excel"""
+    # A patient journaled twice (re-run after a crash before its checkpoint) keeps its latest result
+    records = {}
+    for extracted_data in load_journal(journal_file):
+        records[result_key(extracted_data)] = extracted_data
+    if not records:
+        print(f"✗ No journaled results found in {journal_file}")
+        return False
+    # Workers finish in any order; write rows in input order (entries without a row last, as journaled)
+    ordered = sorted(records.values(), key=lambda extracted_data: (
+        extracted_data.get(INPUT_ROW_FIELD) is None, extracted_data.get(INPUT_ROW_FIELD) or 0
+    ))
+    return save_to_excel([{field: value for field, value in extracted_data.items() if field != INPUT_ROW_FIELD}
+                          for extracted_data in ordered], output_file)
+
+def repair_journal(journal_file):
+    """Cut a partly written last line off a journal so new lines start cleanly"""
+    if not os.path.exists(journal_file):
+        return
+    with open(journal_file, "rb+") as f:
+        data = f.read()
+        if data and not data.endswith(b"\n"):
+            f.truncate(data.rfind(b"\n") + 1)
+            print(f"⚠ Dropped an incomplete last line from {journal_file}")
+
+def record_key(record):
+    """Stable hash of patient name, insurance ID and admission date identifying a record across runs"""
+    parts = [record['Patient Name'], record['Insurance ID'], record['Admission Date']]
+    text = "|".join(" ".join(str(part).split()).upper() for part in parts)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+def result_key(extracted_data):
+    """Record key of a journaled result, from the original record it carries"""
+    return record_key({
+        'Patient Name': extracted_data.get('Original Patient Name'),
+        'Insurance ID': extracted_data.get('Original Insurance ID'),
+        'Admission Date': extracted_data.get('Original Admission Date')
+    })
+
+def load_checkpoint(checkpoint_file):
+    """Replay the checkpoint journal into {record key: {"status", "attempts"}}"""
+    checkpoint = {}
+    for event in load_journal(checkpoint_file):
+        checkpoint[event["key"]] = {"status": event["status"], "attempts": event["attempts"]}
+    return checkpoint
+
+def update_checkpoint(checkpoint, checkpoint_file, record, status):
+    """Record a patient as "done" or "failed"; returns how many times it has failed"""
+    key = record_key(record)
+    entry = checkpoint.setdefault(key, {"status": None, "attempts": 0})
+    entry["status"] = status
+    if status == "failed":
+        entry["attempts"] += 1
+    append_to_journal({
+        "key": key,
+        "status": status,
+        "attempts": entry["attempts"],
+        "patient": record['Patient Name'],
+        "time": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    }, checkpoint_file)
+    return entry["attempts"]
+
+def pending_records(records, checkpoint):
+    """Drop records the checkpoint shows as completed or out of retries"""
+    pending = []
+    completed = 0
+    exhausted = 0
+    for record in records:
+        entry = checkpoint.get(record_key(record))
+        if entry and entry["status"] == "done":
+            completed += 1
+        elif entry and entry["attempts"] >= MAX_RECORD_ATTEMPTS:
+            exhausted += 1
+        else:
+            pending.append(record)
+    print(f"✓ Resuming: {completed} already completed, {exhausted} failed {MAX_RECORD_ATTEMPTS} times, "
+          f"{len(pending)} left to process")
+    return pending
+
+# =============================================================================
+# PORTAL SESSION - LOGIN, NAVIGATION AND FORM
+# =============================================================================
+
+# Portal elements the waits look for
+LOGGED_IN_XPATH = (
+    "//a[contains(text(), 'Logout') or contains(text(), 'Log Out') or contains(text(), 'Sign Out')]"
+    " | //*[contains(@class, 'user-profile')]"
+    " | //*[contains(text(), 'Welcome')]"
+)
+
+ELIGIBILITY_FORM_XPATH = (
+    "//input[@id='hicn'] | //input[@id='mbi']"
+    " | //input[contains(@name, 'beneficiary') or contains(@id, 'beneficiary') or contains(@placeholder, 'Medicare')]"
+)
+
+DATE_FIELDS_XPATH = "//input[contains(@id, 'fromDate') or contains(@name, 'fromDate')]"
+
+def setup_driver(profile_name="chrome_temp_profile"):
+    """Setup Chrome driver with minimal options"""
+    chrome_options = Options()
+    
+    # Minimal options to avoid detection and conflicts
+    chrome_options.add_argument("--disable-blink-features=AutomationControlled")
+    chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
+    chrome_options.add_experimental_option('useAutomationExtension', False)
+    
+    # Use a simple profile in current directory (one per browser, Chrome locks it)
+    automation_profile = os.path.join(os.getcwd(), profile_name)
+    chrome_options.add_argument(f"--user-data-dir={automation_profile}")
+    
+    try:
+        # Use webdriver_manager to automatically handle ChromeDriver
+        service = Service(ChromeDriverManager().install())
+        driver = webdriver.Chrome(service=service, options=chrome_options)
+        
+        # Remove webdriver property to avoid detection
+        driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+        
+        print("✓ Chrome driver initialized successfully")
+        return driver
+        
+    except Exception as e:
+        print(f"✗ Error initializing Chrome driver: {e}")
+        raise
+
+def manual_setup_instructions(extracts=("Basic eligibility information",)):
+    """Display manual setup instructions, listing what the calling script extracts"""
+    print("=" * 70)
+    print("ENHANCED MEDICARE ELIGIBILITY AUTOMATION")
+    print("=" * 70)
+    print("This version now extracts:")
+    for extract in extracts:
+        print(f"  - {extract}")
+    print("=" * 70)
+    print("STEP 1: VPN CONNECTION")
+    print("  - Connect to your organization's VPN manually")
+    print("  - Use your regular VPN client/software")
+    print("  - Ensure you have stable internet connection through VPN")
+    print()
+    print("STEP 2: BROWSER PREPARATION")
+    print("  - Keep this window open")
+    print("  - The script will open Chrome browser automatically")
+    print("  - You will manually log into Noridian Medicare Portal")
+    print()
+    print("STEP 3: LOGIN PROCESS")
+    print("  - Manually navigate to: https://www.noridianmedicareportal.com")
+    print("  - Enter your credentials and complete login")
+    print("  - Stay on the dashboard page")
+    print("=" * 70)
+    input("Press Enter to continue after you've read the instructions...")
+
+def wait_for_manual_login(driver):
+    """Wait for user to manually complete login"""
+    print("\n" + "=" * 60)
+    print("WAITING FOR MANUAL LOGIN")
+    print("=" * 60)
+    print("Please complete these steps in the Chrome browser that opened:")
+    print("1. If not already there, go to: https://www.noridianmedicareportal.com")
+    print("2. Log in with your credentials")
+    print("3. Wait until you see the main dashboard")
+    print(f"4. The script continues as soon as you are logged in (up to {LOGIN_TIMEOUT:.0f} seconds)")
+    print("=" * 60)
+    
+    # Navigate to the portal
+    driver.get("https://www.noridianmedicareportal.com")
+    
+    print("Waiting for you to complete manual login...")
+    if wait_for(driver, element_present(LOGGED_IN_XPATH), "manual_login", LOGIN_TIMEOUT):
+        print("✓ Login detected! Continuing with automation...")
+        return True
+    
+    # Check if we're on a logged-in page
+    try:
+        # Try multiple indicators of successful login
+        logged_in_indicators = [
+            "//a[contains(@href, 'eligibility')]",
+            "//a[contains(text(), 'Logout')]",
+            "//*[contains(text(), 'Welcome')]",
+            "//*[contains(text(), 'Dashboard')]",
+            "//*[contains(@class, 'user-profile')]",
+            "//button[contains(text(), 'Search')]",
+            "//*[contains(text(), 'Eligibility')]",
+            "//title[contains(text(), 'Portal')]",
+            "//*[contains(text(), 'Noridian')]"
+        ]
+        
+        for indicator in logged_in_indicators:
+            try:
+                WebDriverWait(driver, 10).until(
+                    EC.presence_of_element_located((By.XPATH, indicator))
+                )
+                print("✓ Login detected! Continuing with automation...")
+                return True
+            except:
+                continue
+                
+        print("⚠ Could not detect specific login elements, but continuing anyway...")
+        return True
+        
+    except Exception as e:
+        print(f"⚠ Continuing despite login detection issues: {str(e)}")
+        return True
+
+def detect_eligibility_page_type(driver):
+    """Detect what type of eligibility page we're on"""
+    try:
+        # Check for different form layouts
+        
+        # Layout 1: Standard form with hicn, lastName, dob fields
+        try:
+            hicn_field = driver.find_element(By.ID, "hicn")
+            last_name_field = driver.find_element(By.ID, "lastName")
+            dob_field = driver.find_element(By.ID, "dob")
+            print("✓ Detected Standard Eligibility Form Layout")
+            return "standard"
+        except:
+            pass
+        
+        # Layout 2: MBI Lookup form
+        try:
+            mbi_field = driver.find_element(By.ID, "mbi")
+            print("✓ Detected MBI Lookup Form Layout")
+            return "mbi_lookup"
+        except:
+            pass
+        
+        # Layout 3: Benefits Inquiry form
+        try:
+            # Look for elements that might indicate Benefits Inquiry form
+            beneficiary_fields = driver.find_elements(By.XPATH, 
+                "//input[contains(@name, 'beneficiary') or contains(@id, 'beneficiary') or contains(@placeholder, 'Medicare')]")
+            if beneficiary_fields:
+                print("✓ Detected Benefits Inquiry Form Layout")
+                return "benefits_inquiry"
+        except:
+            pass
+        
+        # Layout 4: Check for any form that might be eligibility related
+        try:
+            form_elements = driver.find_elements(By.XPATH, 
+                "//input[@type='text'] | //select | //textarea")
+            if len(form_elements) > 2:
+                print("✓ Detected Generic Form Layout (will attempt to fill)")
+                return "generic_form"
+        except:
+            pass
+        
+        print("✗ Could not identify specific eligibility form layout")
+        return "unknown"
+        
+    except Exception as e:
+        print(f"✗ Error detecting page type: {str(e)}")
+        return "unknown"
+
+def wait_for_manual_eligibility_navigation(driver):
+    """Wait for user to manually navigate to eligibility section and detect form type"""
+    print("\n" + "=" * 60)
+    print("MANUAL ELIGIBILITY NAVIGATION REQUIRED")
+    print("=" * 60)
+    print("Please manually navigate to the Eligibility section:")
+    print("1. Look for 'Eligibility or MBI Lookup' in the menu")
+    print("2. Click on 'Eligibility Benefits Inquiry' or similar")
+    print("3. Wait for the page to load completely")
+    print("4. Make sure you see form fields for patient information")
+    print("=" * 60)
+    
+    # Wait for the eligibility form to appear
+    print(f"Waiting up to {NAVIGATION_TIMEOUT:.0f} seconds for you to navigate to Eligibility page...")
+    wait_for(driver, element_present(ELIGIBILITY_FORM_XPATH), "manual_navigation", NAVIGATION_TIMEOUT)
+    
+    # Detect what type of page we're on
+    page_type = detect_eligibility_page_type(driver)
+    
+    if page_type != "unknown":
+        print(f"✓ Successfully detected {page_type} form layout")
+        return True
+    else:
+        print("✗ Could not detect eligibility form. Please check if you're on the correct page.")
+        print("Current page URL:", driver.current_url)
+        print("Current page title:", driver.title)
+        
+        # Ask user to confirm they're on the right page
+        confirm = input("Are you on the Eligibility Benefits Inquiry page? (y/n): ").lower().strip()
+        if confirm == 'y':
+            print("✓ Continuing with automation based on user confirmation")
+            return True
+        else:
+            print("✗ Please navigate to the correct page and run the script again")
+            return False
+
+def navigate_to_eligibility(driver):
+    """Navigate to Eligibility or MBI Lookup section"""
+    max_attempts = 2
+    
+    for attempt in range(max_attempts):
+        try:
+            print(f"\nAttempt {attempt + 1} to find Eligibility section...")
+            
+            # Try multiple selectors for the eligibility link
+            selectors = [
+                "//a[contains(@href, 'eligibility') and contains(., 'Eligibility')]",
+                "//a[contains(text(), 'Eligibility')]",
+                "//a[contains(text(), 'MBI Lookup')]",
+                "//a[@aria-labelledby='layout_18']",
+                "//a[contains(@href, 'eligibility')]",
+                "//*[contains(text(), 'Eligibility or MBI Lookup')]",
+                "//a[contains(., 'Eligibility')]"
+            ]
+            
+            for selector in selectors:
+                try:
+                    print(f"  Trying selector: {selector[:50]}...")
+                    eligibility_link = WebDriverWait(driver, 10).until(
+                        EC.element_to_be_clickable((By.XPATH, selector))
+                    )
+                    driver.execute_script("arguments[0].click();", eligibility_link)
+                    print("✓ Clicked Eligibility link")
+                    
+                    # Wait for the form to load then detect what page we're on
+                    wait_for(driver, all_of(network_idle(), element_present(ELIGIBILITY_FORM_XPATH)),
+                             "eligibility_page")
+                    page_type = detect_eligibility_page_type(driver)
+                    
+                    if page_type != "unknown":
+                        print("✓ Successfully reached eligibility page")
+                        return True
+                    else:
+                        # If we can't detect the form, try to click "Eligibility Benefits Inquiry"
+                        try:
+                            benefits_link = driver.find_element(By.XPATH, 
+                                "//a[contains(text(), 'Eligibility Benefits Inquiry')] | " +
+                                "//button[contains(text(), 'Eligibility Benefits')]")
+                            driver.execute_script("arguments[0].click();", benefits_link)
+                            print("✓ Clicked Eligibility Benefits Inquiry")
+                            wait_for(driver, all_of(network_idle(), element_present(ELIGIBILITY_FORM_XPATH)),
+                                     "benefits_inquiry_page")
+                            
+                            page_type = detect_eligibility_page_type(driver)
+                            if page_type != "unknown":
+                                return True
+                        except:
+                            pass
+                            
+                except Exception as e:
+                    continue
+                    
+            print("✗ Could not find Eligibility link with automated selectors")
+            
+            # If automated navigation fails, wait for manual navigation
+            if attempt == max_attempts - 1:
+                print("\nSwitching to manual navigation mode...")
+                return wait_for_manual_eligibility_navigation(driver)
+            else:
+                print("Retrying...")
+                wait_for(driver, network_idle(), "navigation_retry")
+                
+        except Exception as e:
+            print(f"✗ Attempt {attempt + 1} failed: {str(e)}")
+            if attempt == max_attempts - 1:
+                return wait_for_manual_eligibility_navigation(driver)
+    
+    return False
+
+def fill_eligibility_form(driver, record):
+    """Fill the eligibility form with patient data based on detected form type"""
+    try:
+        # First detect what type of form we're dealing with
+        page_type = detect_eligibility_page_type(driver)
+        print(f"  Detected form type: {page_type}")
+        
+        if page_type == "unknown":
+            print("  ✗ Cannot fill form - unknown form layout")
+            return False
+        
+        print(f"  Filling form for: {record['Patient Name']}")
+        
+        # Extract last name from patient name
+        last_name = record['Patient Name'].split(',')[0].strip()
+        
+        # Convert Date of Birth to proper format
+        def convert_date_format(date_str):
+            """Convert date from mm/dd/yy to mm/dd/yyyy format"""
+            try:
+                parts = date_str.split('/')
+                if len(parts) == 3:
+                    month = parts[0].zfill(2)  # Ensure 2-digit month
+                    day = parts[1].zfill(2)    # Ensure 2-digit day
+                    year = parts[2]
+                    
+                    # Handle 2-digit year (convert to 4-digit)
+                    if len(year) == 2:
+                        # Assuming years 00-25 are 2000-2025, 26-99 are 1926-1999
+                        year_int = int(year)
+                        if year_int <= 25:
+                            year = f"20{year}"
+                        else:
+                            year = f"19{year}"
+                    
+                    return f"{month}/{day}/{year}"
+                return date_str
+            except:
+                return date_str
+        
+        formatted_dob = convert_date_format(record['Date of Birth'])
+        print(f"    Original DOB: {record['Date of Birth']}, Formatted: {formatted_dob}")
+        
+        if page_type == "standard":
+            # Standard form with hicn, lastName, dob fields
+            hicn_field = driver.find_element(By.ID, "hicn")
+            hicn_field.clear()
+            hicn_field.send_keys(str(record['Insurance ID']))
+            
+            last_name_field = driver.find_element(By.ID, "lastName")
+            last_name_field.clear()
+            last_name_field.send_keys(last_name)
+            
+            dob_field = driver.find_element(By.ID, "dob")
+            dob_field.clear()
+            dob_field.send_keys(formatted_dob)  # Use formatted DOB
+            
+            # Handle date of service selection and fields
+            handle_date_of_service(driver, record)
+                
+        elif page_type in ["benefits_inquiry", "generic_form"]:
+            # For benefits inquiry or generic forms, try to find fields by various attributes
+            print("    Attempting to fill generic form...")
+            
+            # Try to find Medicare Number field
+            medicare_selectors = [
+                "//input[contains(@id, 'hicn')]",
+                "//input[contains(@name, 'hicn')]",
+                "//input[contains(@placeholder, 'Medicare')]",
+                "//input[contains(@id, 'mbi')]",
+                "//input[contains(@name, 'mbi')]",
+                "//input[@type='text']"  # Fallback to first text input
+            ]
+            
+            for selector in medicare_selectors:
+                try:
+                    medicare_field = driver.find_element(By.XPATH, selector)
+                    medicare_field.clear()
+                    medicare_field.send_keys(str(record['Insurance ID']))
+                    print(f"    Medicare Number: {record['Insurance ID']}")
+                    break
+                except:
+                    continue
+            
+            # Try to find Last Name field
+            last_name_selectors = [
+                "//input[contains(@id, 'lastName')]",
+                "//input[contains(@name, 'lastName')]",
+                "//input[contains(@placeholder, 'Last Name')]",
+                "//input[contains(@id, 'lastname')]",
+                "//input[contains(@name, 'lastname')]"
+            ]
+            
+            for selector in last_name_selectors:
+                try:
+                    last_name_field = driver.find_element(By.XPATH, selector)
+                    last_name_field.clear()
+                    last_name_field.send_keys(last_name)
+                    print(f"    Last Name: {last_name}")
+                    break
+                except:
+                    continue
+            
+            # Try to find Date of Birth field
+            dob_selectors = [
+                "//input[contains(@id, 'dob')]",
+                "//input[contains(@name, 'dob')]",
+                "//input[contains(@placeholder, 'Date of Birth')]",
+                "//input[contains(@id, 'birth')]",
+                "//input[contains(@name, 'birth')]"
+            ]
+            
+            for selector in dob_selectors:
+                try:
+                    dob_field = driver.find_element(By.XPATH, selector)
+                    dob_field.clear()
+                    dob_field.send_keys(formatted_dob)  # Use formatted DOB
+                    print(f"    Date of Birth: {formatted_dob}")
+                    break
+                except:
+                    continue
+            
+            # Handle date of service for generic forms too
+            handle_date_of_service(driver, record)
+        
+        print(f"    ✓ Form filled successfully for {record['Patient Name']}")
+        return True
+        
+    except Exception as e:
+        print(f"✗ Error filling form for {record['Patient Name']}: {str(e)}")
+        return False
+
+def handle_date_of_service(driver, record):
+    """Handle the date of service section - click radio button and fill dates"""
+    try:
+        print("    Handling date of service section...")
+        
+        # Convert dates to proper format (mm/dd/yyyy)
+        def convert_date_format(date_str):
+            """Convert date from mm/dd/yy to mm/dd/yyyy format"""
+            try:
+                parts = date_str.split('/')
+                if len(parts) == 3:
+                    month = parts[0].zfill(2)  # Ensure 2-digit month
+                    day = parts[1].zfill(2)    # Ensure 2-digit day
+                    year = parts[2]
+                    
+                    # Handle 2-digit year (convert to 4-digit)
+                    if len(year) == 2:
+                        # Assuming years 00-25 are 2000-2025, 26-99 are 1926-1999
+                        year_int = int(year)
+                        if year_int <= 25:
+                            year = f"20{year}"
+                        else:
+                            year = f"19{year}"
+                    
+                    return f"{month}/{day}/{year}"
+                return date_str
+            except:
+                return date_str
+        
+        # Convert admission date to proper format
+        formatted_admission_date = convert_date_format(record['Admission Date'])
+        print(f"    Original date: {record['Admission Date']}, Formatted: {formatted_admission_date}")
+        
+        # Method 1: Click the label that contains the radio button
+        label_selectors = [
+            "//label[@for='default_date_radio2']",
+            "//label[contains(@class, 'radio-icon') and @for='default_date_radio2']",
+            "//label[contains(., 'Provide date of service below')]",
+            "//label[contains(@class, 'radio-icon') and contains(., 'Provide date of service below')]"
+        ]
+        
+        radio_clicked = False
+        for selector in label_selectors:
+            try:
+                print(f"      Trying label selector: {selector}")
+                label_element = WebDriverWait(driver, 5).until(
+                    EC.element_to_be_clickable((By.XPATH, selector))
+                )
+                print("      Clicking label element...")
+                driver.execute_script("arguments[0].click();", label_element)
+                print("    ✓ Selected 'Provide date of service below' via label")
+                radio_clicked = True
+                break
+            except Exception as e:
+                print(f"      Label selector failed: {str(e)}")
+                continue
+        
+        # Method 2: If label clicking doesn't work, try the radio button directly
+        if not radio_clicked:
+            print("    Trying direct radio button approaches...")
+            try:
+                radio_button = WebDriverWait(driver, 5).until(
+                    EC.element_to_be_clickable((By.ID, "default_date_radio2"))
+                )
+                if not radio_button.is_selected():
+                    driver.execute_script("arguments[0].click();", radio_button)
+                    print("    ✓ Selected 'Provide date of service below' via radio button")
+                    radio_clicked = True
+            except Exception as e:
+                print(f"      Radio button approaches failed: {str(e)}")
+        
+        if not radio_clicked:
+            print("    ⚠ Could not select 'Provide date of service below'")
+            return False
+        
+        # Wait for the date fields to become editable
+        wait_for(driver, EC.element_to_be_clickable((By.XPATH, DATE_FIELDS_XPATH)), "date_of_service_fields", 5)
+        
+        # Now fill the fromDate and toDate fields with formatted dates
+        print("    Filling date fields...")
+        from_date_filled = False
+        to_date_filled = False
+        
+        # Try multiple selectors for fromDate field
+        from_date_selectors = [
+            "//input[@id='fromDate']",
+            "//input[@name='fromDate']",
+            "//input[contains(@id, 'fromDate')]",
+            "//input[contains(@name, 'fromDate')]",
+            "//input[contains(@placeholder, 'From Date')]",
+            "//input[contains(@placeholder, 'mm/dd/yyyy')]"
+        ]
+        
+        for selector in from_date_selectors:
+            try:
+                from_date_field = driver.find_element(By.XPATH, selector)
+                from_date_field.clear()
+                from_date_field.send_keys(formatted_admission_date)
+                print(f"    From Date: {formatted_admission_date}")
+                from_date_filled = True
+                break
+            except:
+                continue
+        
+        # Try multiple selectors for toDate field
+        to_date_selectors = [
+            "//input[@id='toDate']",
+            "//input[@name='toDate']",
+            "//input[contains(@id, 'toDate')]",
+            "//input[contains(@name, 'toDate')]",
+            "//input[contains(@placeholder, 'To Date')]",
+            "//input[contains(@placeholder, 'mm/dd/yyyy')]"
+        ]
+        
+        for selector in to_date_selectors:
+            try:
+                to_date_field = driver.find_element(By.XPATH, selector)
+                to_date_field.clear()
+                to_date_field.send_keys(formatted_admission_date)
+                print(f"    To Date: {formatted_admission_date}")
+                to_date_filled = True
+                break
+            except:
+                continue
+        
+        if not from_date_filled or not to_date_filled:
+            print(f"    ⚠ Could not fill date fields - From: {from_date_filled}, To: {to_date_filled}")
+            return False
+        else:
+            print("    ✓ Date of service fields filled successfully")
+            return True
+            
+    except Exception as e:
+        print(f"    ⚠ Error handling date of service: {str(e)}")
+        return False
+
+def submit_form(driver, results_xpath):
+    """Submit the eligibility form and wait for the page matching results_xpath"""
+    try:
+        # Try multiple submit button selectors
+        submit_selectors = [
+            "//button[@id='btnSubmit']",
+            "//input[@type='submit']",
+            "//button[contains(text(), 'Submit')]",
+            "//button[contains(text(), 'Search')]",
+            "//button[contains(text(), 'Inquiry')]",
+            "//input[contains(@value, 'Submit')]",
+            "//input[contains(@value, 'Search')]"
+        ]
+        
+        for selector in submit_selectors:
+            try:
+                submit_button = WebDriverWait(driver, 10).until(
+                    EC.element_to_be_clickable((By.XPATH, selector))
+                )
+                driver.execute_script("arguments[0].click();", submit_button)
+                print("    ✓ Form submitted")
+                
+                # Wait until the form is replaced or results are shown, then for the page to settle
+                wait_for(driver, EC.any_of(EC.staleness_of(submit_button), element_present(results_xpath)),
+                         "submit")
+                wait_for(driver, network_idle(), "submit_idle")
+                return True
+            except:
+                continue
+        
+        print("✗ Could not find submit button")
+        return False
+        
+    except Exception as e:
+        print(f"✗ Error submitting form: {str(e)}")
+        return False
+
+def process_excel_data(file_path, checkpoint=None):
+    """Read and process Excel data, skipping records the checkpoint has finished with"""
+    try:
+        df = pd.read_excel(file_path, sheet_name='Sheet1')
+        
+        # Remove duplicates based on Patient Name and Insurance ID
+        df_unique = df.drop_duplicates(subset=['Patient Name', 'Insurance ID'])
+        
+        records = df_unique.to_dict('records')
+        for row, record in zip(df_unique.index, records):
+            record[INPUT_ROW_FIELD] = int(row)
+        print(f"✓ Found {len(records)} unique patients to process")
+        if checkpoint:
+            records = pending_records(records, checkpoint)
+        return records
+    except Exception as e:
+        print(f"✗ Error reading Excel file: {str(e)}")
+        return []
+
+# =============================================================================
+# PARALLEL WORKER POOL
+# =============================================================================
+
+# Upper limit on concurrent browser sessions. The portal throttles heavy use and
+# may flag an account with many simultaneous sessions, so raise this with care.
+MAX_WORKERS = int(os.environ.get("NORIDIAN_MAX_WORKERS", "4"))
+DEFAULT_WORKERS = int(os.environ.get("NORIDIAN_WORKERS", "1"))
+# Pause each worker takes between patients, to pace requests to the portal
+PATIENT_DELAY_SECONDS = float(os.environ.get("NORIDIAN_PATIENT_DELAY", "3"))
+
+# Start browsers one at a time; ChromeDriverManager is not safe to run concurrently
+driver_setup_lock = threading.Lock()
+
+def profile_dir_for(worker_id):
+    """Chrome profile directory for a worker - worker 1 keeps the original profile"""
+    if worker_id == 1:
+        return "chrome_temp_profile"
+    return f"chrome_temp_profile_{worker_id}"
+
+def driver_is_alive(driver):
+    """Check whether the browser session still responds"""
+    try:
+        driver.current_url
+        return True
+    except:
+        return False
+
+def run_worker_pool(records, num_workers, process_record, journal_file, checkpoint, checkpoint_file, drivers):
+    """Process records across several Chrome browsers sharing one work queue
+    
+    Each worker opens its own browser and profile, waits for its manual login,
+    then takes patients off the queue until every patient is finished, running
+    each through process_record(driver, record), which returns the extracted
+    data or None. A failed patient - including one whose browser died under it,
+    which also stops that worker - goes back on the queue until it has been
+    tried MAX_RECORD_ATTEMPTS times. Each result is appended to journal_file as it arrives and every
+    outcome to the checkpoint, so an interrupted run can be resumed. Browsers
+    are added to drivers as they start, so the caller can close them even after
+    an error.
+    
+    Returns (successful, failed)
+    """
+    num_workers = max(1, min(num_workers, MAX_WORKERS, len(records)))
+    work_queue = queue.Queue()
+    for index, record in enumerate(records):
+        work_queue.put((index, record))
+    
+    results = {}
+    failed = set()
+    unprocessed = set()
+    running = num_workers
+    lock = threading.Lock()
+    
+    def retire():
+        # The last worker to stop takes what is left off the queue, so work_queue.join() returns
+        nonlocal running
+        with lock:
+            running -= 1
+            if running:
+                return
+            while True:
+                try:
+                    item = work_queue.get_nowait()
+                except queue.Empty:
+                    return
+                if item is not None:
+                    unprocessed.add(item[0])
+                work_queue.task_done()
+    
+    def worker(worker_id):
+        tag = f"[Worker {worker_id}]"
+        try:
+            with driver_setup_lock:
+                print(f"\n{tag} Initializing Chrome browser ({profile_dir_for(worker_id)})...")
+                driver = setup_driver(profile_dir_for(worker_id))
+        except Exception as e:
+            print(f"{tag} ✗ Could not start browser, worker stopping: {str(e)}")
+            retire()
+            return
+        with lock:
+            drivers.append(driver)
+        
+        try:
+            # Wait for manual login
+            if not wait_for_manual_login(driver):
+                print(f"{tag} ⚠ Continuing despite login detection issues...")
+            
+            # Let the portal finish loading before starting automation
+            print(f"\n{tag} STARTING AUTOMATION ONCE THE PORTAL IS IDLE...")
+            wait_for(driver, network_idle(), "portal_ready")
+            
+            while True:
+                # Blocks until there is work; None means every patient is finished
+                item = work_queue.get()
+                try:
+                    if item is None:
+                        return
+                    if not work_one(tag, driver, *item):
+                        print(f"{tag} ✗ Browser is no longer responding, worker stopping")
+                        return
+                finally:
+                    work_queue.task_done()
+        finally:
+            retire()
+    
+    def work_one(tag, driver, index, record):
+        """Process one patient; returns False once the browser has died"""
+        print(f"\n{'='*50}")
+        print(f"{tag} Processing patient {index + 1}/{len(records)}: {record['Patient Name']}")
+        print(f"{'='*50}")
+        
+        try:
+            extracted_data = process_record(driver, record)
+        except Exception as e:
+            print(f"{tag} ✗ Error processing {record['Patient Name']}: {str(e)}")
+            extracted_data = None
+        browser_alive = bool(extracted_data) or driver_is_alive(driver)
+        
+        with lock:
+            if extracted_data:
+                results[index] = extracted_data
+                print(f"{tag} ✓ Successfully processed and extracted: {record['Patient Name']}")
+                
+                # Journal each result right away so a crash never loses it
+                extracted_data[INPUT_ROW_FIELD] = record.get(INPUT_ROW_FIELD, index)
+                append_to_journal(extracted_data, journal_file)
+                update_checkpoint(checkpoint, checkpoint_file, record, "done")
+            else:
+                # A dead browser counts as an attempt too, so a patient that crashes it can't loop forever
+                attempts = update_checkpoint(checkpoint, checkpoint_file, record, "failed")
+                if attempts < MAX_RECORD_ATTEMPTS:
+                    print(f"{tag} ⚠ Will retry {record['Patient Name']} (attempt {attempts}/{MAX_RECORD_ATTEMPTS} failed)")
+                    # Queued before this item's task_done, so work_queue.join() waits for the retry
+                    work_queue.put((index, record))
+                else:
+                    failed.add(index)
+        
+        if browser_alive:
+            # Wait before next patient
+            time.sleep(PATIENT_DELAY_SECONDS)
+        return browser_alive
+    
+    print(f"\nStarting {num_workers} browser worker(s)...")
+    threads = [threading.Thread(target=worker, args=(worker_id,), daemon=True)
+               for worker_id in range(1, num_workers + 1)]
+    for thread in threads:
+        thread.start()
+    # Returns once every patient (retries included) is finished, or the last browser has failed
+    work_queue.join()
+    for _ in threads:
+        work_queue.put(None)
+    for thread in threads:
+        thread.join()
+    
+    # Patients left over when every browser failed
+    if unprocessed:
+        print(f"⚠ {len(unprocessed)} patients were not processed - no browser was available")
+    
+    return len(results), len(failed) + len(unprocessed)
+
+def ask_worker_count():
+    """Ask how many browsers to run in parallel"""
+    answer = input(f"Number of parallel browsers (1-{MAX_WORKERS}, default {DEFAULT_WORKERS}): ").strip()
+    try:
+        count = int(answer) if answer else DEFAULT_WORKERS
+    except ValueError:
+        print(f"⚠ Invalid number, using {DEFAULT_WORKERS}")
+        count = DEFAULT_WORKERS
+    if count > MAX_WORKERS:
+        print(f"⚠ Limited to {MAX_WORKERS} browsers (set NORIDIAN_MAX_WORKERS to change)")
+    return max(1, min(count, MAX_WORKERS))